@@ -0,0 +1,284 @@
+# core/analytics.py
+"""
+Analytics service shared by summary_page and the analytics cards on the list pages.
+
+Every count and sum for a model is computed in a single query, using conditional
+aggregation (Count/Sum with filter=) or one grouped query, instead of one
+count() and one aggregate() per status. The cached_* wrappers keep the results in
+the versioned cache (core/versioning.py) until the underlying tables change.
+
+Spend figures are read from the daily rollups (core/rollups.py), which are far
+smaller than SpendEntry itself.
+
+Invoices, purchase orders and spend can be limited to a date range (DATE_FIELDS).
+"""
+from decimal import Decimal
+
+from django.utils.dateparse import parse_date
+
+from django.db.models import Sum, Q, Count
+
+from .models import (
+    Supplier, Category, CategoryClosure, PurchaseOrder, Invoice, SpendEntry, SpendDailyRollup,
+    InvoiceStatus, PurchaseOrderStatus,
+)
+from .versioning import cached_aggregate
+
+ZERO_AMOUNT = Decimal('0.00')
+
+# The date each dated model is filtered on by the date-range filter
+DATE_FIELDS = {
+    SpendEntry: 'date',
+    SpendDailyRollup: 'date',
+    Invoice: 'invoice_date',
+    PurchaseOrder: 'issue_date',
+}
+
+
+def parse_date_range(params):
+    """
+    Reads `date_from` and `date_to` (YYYY-MM-DD, both optional and inclusive) from a QueryDict.
+    Raises ValueError when either one is present but not a valid date.
+    """
+    dates = []
+    for name in ('date_from', 'date_to'):
+        raw = params.get(name, '').strip()
+        value = parse_date(raw) if raw else None
+        if raw and value is None:
+            raise ValueError(f"{name} must be a date in YYYY-MM-DD format.")
+        dates.append(value)
+    return tuple(dates)
+
+
+def date_range_filter(model, date_from=None, date_to=None):
+    """Q limiting `model` to the date range; empty for undated models or an open range."""
+    date_field = DATE_FIELDS.get(model)
+    q = Q()
+    if date_field and date_from:
+        q &= Q(**{f'{date_field}__gte': date_from})
+    if date_field and date_to:
+        q &= Q(**{f'{date_field}__lte': date_to})
+    return q
+
+
+def _status_aggregates(statuses):
+    """Count and Sum(amount) aggregates for each (key, status) pair, for use in one aggregate() call."""
+    aggregates = {'total_records': Count('id')}
+    for key, status in statuses:
+        status_q = Q(status=status) # Statuses are stored canonically, so this can use the (status, amount) index
+        aggregates[f'total_{key}'] = Count('id', filter=status_q)
+        aggregates[f'sum_{key}_amount'] = Sum('amount', filter=status_q)
+    return aggregates
+
+
+def _fill_zero_sums(metrics):
+    for key, value in metrics.items():
+        if key.startswith('sum_') and value is None:
+            metrics[key] = ZERO_AMOUNT
+    return metrics
+
+
+def invoice_metrics(date_from=None, date_to=None):
+    """Totals plus pending/paid counts and amounts for invoices, in one query."""
+    metrics = Invoice.objects.filter(date_range_filter(Invoice, date_from, date_to)).aggregate(**_status_aggregates([('pending', InvoiceStatus.PENDING), ('paid', InvoiceStatus.PAID)]))
+    return _fill_zero_sums(metrics)
+
+
+def purchase_order_metrics(date_from=None, date_to=None):
+    """Totals plus pending/approved counts and amounts for purchase orders, in one query."""
+    metrics = PurchaseOrder.objects.filter(date_range_filter(PurchaseOrder, date_from, date_to)).aggregate(**_status_aggregates([('pending', PurchaseOrderStatus.PENDING), ('approved', PurchaseOrderStatus.APPROVED)]))
+    return _fill_zero_sums(metrics)
+
+
+def spend_metrics(include_breakdowns=True, date_from=None, date_to=None):
+    """
+    Entry count and total spend in one query; optionally the spend by category and
+    by supplier breakdowns (one grouped query each). All of it comes from the daily rollups.
+    """
+    rollups = SpendDailyRollup.objects.filter(date_range_filter(SpendDailyRollup, date_from, date_to))
+    metrics = rollups.aggregate(total_records=Sum('entry_count'), total_spend_amount=Sum('total_amount'))
+    metrics['total_records'] = metrics['total_records'] or 0
+    metrics['total_spend_amount'] = metrics['total_spend_amount'] or ZERO_AMOUNT
+    if include_breakdowns:
+        metrics['spend_by_category'] = list(rollups.values('category__name').annotate(total=Sum('total_amount')).order_by('-total'))
+        metrics['spend_by_supplier'] = list(rollups.values('supplier__name').annotate(total=Sum('total_amount')).order_by('-total'))
+    return metrics
+
+
+def supplier_metrics():
+    """
+    Total, active and inactive counts plus the per-type breakdown, all folded out of a
+    single query grouped by (type, is_active).
+    """
+    metrics = {'total_records': 0, 'active_suppliers': 0, 'inactive_suppliers': 0}
+    by_type = {}
+    for row in Supplier.objects.values('type', 'is_active').annotate(count=Count('id')).order_by():
+        metrics['total_records'] += row['count']
+        if row['is_active']:
+            metrics['active_suppliers'] += row['count']
+        else:
+            metrics['inactive_suppliers'] += row['count']
+        by_type[row['type']] = by_type.get(row['type'], 0) + row['count']
+    metrics['suppliers_by_type'] = [
+        {'type': supplier_type, 'count': count}
+        for supplier_type, count in sorted(by_type.items(), key=lambda item: -item[1])
+    ]
+    return metrics
+
+
+def model_card_metrics(model, date_from=None, date_to=None):
+    """
+    Analytics shown above the table on a model's list page, limited to the date range
+    for dated models. Models without specific analytics just get their record count.
+    """
+    if model == Invoice:
+        analytics_data = invoice_metrics(date_from, date_to)
+        analytics_data['analytics_title'] = "Invoice Status Summary"
+    elif model == PurchaseOrder:
+        analytics_data = purchase_order_metrics(date_from, date_to)
+        analytics_data['analytics_title'] = "Purchase Order Status Summary"
+    elif model == SpendEntry:
+        analytics_data = spend_metrics(include_breakdowns=False, date_from=date_from, date_to=date_to)
+        analytics_data['analytics_title'] = "Spend Entry Summary"
+    elif model == Supplier:
+        analytics_data = supplier_metrics()
+        del analytics_data['suppliers_by_type']
+        analytics_data['analytics_title'] = "Supplier Status Summary"
+    else:
+        analytics_data = {'total_records': model.objects.count()}
+        analytics_data['analytics_title'] = f"{model.__name__} Data Summary"
+    return analytics_data
+
+
+def summary_context(invoices=None, purchase_orders=None, spend=None, suppliers=None):
+    """
+    Keys the per-table metrics the way the summary template expects.
+    A group passed as None (e.g. it timed out, see core/async_summary.py) leaves its keys as None.
+    """
+    invoices, purchase_orders, spend, suppliers = (group or {} for group in (invoices, purchase_orders, spend, suppliers))
+    return {
+        'total_invoices_summary': invoices.get('total_records'),
+        'total_pending_invoices_summary': invoices.get('total_pending'),
+        'sum_pending_invoice_amount_summary': invoices.get('sum_pending_amount'),
+        'total_paid_invoices_summary': invoices.get('total_paid'),
+        'sum_paid_invoice_amount_summary': invoices.get('sum_paid_amount'),
+
+        'total_purchase_orders_summary': purchase_orders.get('total_records'),
+        'total_pending_pos_summary': purchase_orders.get('total_pending'),
+        'sum_pending_po_amount_summary': purchase_orders.get('sum_pending_amount'),
+        'total_approved_pos_summary': purchase_orders.get('total_approved'),
+        'sum_approved_po_amount_summary': purchase_orders.get('sum_approved_amount'),
+
+        'total_spend_entries_summary': spend.get('total_records'),
+        'total_spend_amount_summary': spend.get('total_spend_amount'),
+        'spend_by_category_summary': spend.get('spend_by_category'),
+        'spend_by_supplier_summary': spend.get('spend_by_supplier'),
+
+        'total_suppliers_summary': suppliers.get('total_records'),
+        'active_suppliers_summary': suppliers.get('active_suppliers'),
+        'inactive_suppliers_summary': suppliers.get('inactive_suppliers'),
+        'suppliers_by_type_summary': suppliers.get('suppliers_by_type'),
+    }
+
+
+def summary_metrics(date_from=None, date_to=None):
+    """
+    Everything summary_page shows, keyed the way its template expects.
+    The date range applies to invoices, purchase orders and spend; suppliers are undated.
+    """
+    return summary_context(
+        invoices=invoice_metrics(date_from, date_to),
+        purchase_orders=purchase_order_metrics(date_from, date_to),
+        spend=spend_metrics(date_from=date_from, date_to=date_to),
+        suppliers=supplier_metrics(),
+    )
+
+
+def category_spend_tree(date_from=None, date_to=None):
+    """
+    Spend for every category, with and without its subcategories, as a nested tree.
+
+    The subtree totals come from a single grouped join of the closure table
+    (core/closure.py) with the daily rollups, so the cost doesn't depend on the
+    depth of the tree. Spend without a category is reported separately.
+    """
+    date_q = Q()
+    if date_from:
+        date_q &= Q(descendant__spend_rollups__date__gte=date_from)
+    if date_to:
+        date_q &= Q(descendant__spend_rollups__date__lte=date_to)
+    own_q = date_q & Q(depth=0)
+    totals = {
+        row['ancestor_id']: row
+        for row in CategoryClosure.objects.values('ancestor_id').order_by().annotate(
+            total=Sum('descendant__spend_rollups__total_amount', filter=date_q),
+            entry_count=Sum('descendant__spend_rollups__entry_count', filter=date_q),
+            own_total=Sum('descendant__spend_rollups__total_amount', filter=own_q),
+            own_entry_count=Sum('descendant__spend_rollups__entry_count', filter=own_q),
+        )
+    }
+
+    nodes = {}
+    for category_id, name, parent_id in Category.objects.order_by('name').values_list('id', 'name', 'parent_id'):
+        row = totals.get(category_id, {})
+        nodes[category_id] = {
+            'id': category_id,
+            'name': name,
+            'parent_id': parent_id,
+            'total': row.get('total') or ZERO_AMOUNT,
+            'entry_count': row.get('entry_count') or 0,
+            'own_total': row.get('own_total') or ZERO_AMOUNT,
+            'own_entry_count': row.get('own_entry_count') or 0,
+            'children': [],
+        }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent_id'])
+        (parent['children'] if parent else roots).append(node)
+
+    uncategorized = SpendDailyRollup.objects.filter(
+        date_range_filter(SpendDailyRollup, date_from, date_to), category__isnull=True,
+    ).aggregate(total=Sum('total_amount'), entry_count=Sum('entry_count'))
+    return {
+        'categories': roots,
+        'uncategorized': {
+            'total': uncategorized['total'] or ZERO_AMOUNT,
+            'entry_count': uncategorized['entry_count'] or 0,
+        },
+    }
+
+
+# Models each cached result reads; their versions are part of the cache key.
+SUMMARY_DEPENDENCIES = (Invoice, PurchaseOrder, SpendEntry, SpendDailyRollup, Supplier, Category)
+CATEGORY_SPEND_DEPENDENCIES = (Category, CategoryClosure, SpendEntry, SpendDailyRollup)
+
+
+def cached_summary_metrics(date_from=None, date_to=None):
+    """summary_metrics(), served from the versioned cache until one of its tables changes."""
+    return cached_aggregate(
+        'summary', SUMMARY_DEPENDENCIES, lambda: summary_metrics(date_from, date_to),
+        params=(date_from, date_to),
+    )
+
+
+def cached_category_spend_tree(date_from=None, date_to=None):
+    """category_spend_tree(), served from the versioned cache until the tree or the spend changes."""
+    return cached_aggregate(
+        'category-spend', CATEGORY_SPEND_DEPENDENCIES,
+        lambda: category_spend_tree(date_from, date_to), params=(date_from, date_to),
+    )
+
+
+def card_dependencies(model):
+    """Models model_card_metrics(model) reads: the spend card reads the rollups."""
+    return (model, SpendDailyRollup) if model == SpendEntry else (model,)
+
+
+def cached_model_card_metrics(model, date_from=None, date_to=None):
+    """model_card_metrics(model), served from the versioned cache until the model's table changes."""
+    if model not in DATE_FIELDS:
+        date_from = date_to = None # Keep a single cache entry for undated models
+    return cached_aggregate(
+        'card', card_dependencies(model), lambda: model_card_metrics(model, date_from, date_to),
+        params=(model._meta.label_lower, date_from, date_to),
+    )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Keeps the per-model change versions (core/versioning.py) and spend rollups up to date
+        from . import signals  # noqa: F401
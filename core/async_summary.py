@@ -0,0 +1,87 @@
+# core/async_summary.py
+"""
+Summary metrics computed concurrently, for the async summary views.
+
+The invoice, purchase order, spend and supplier metrics read different tables, so
+they run side by side on a small shared thread pool (each thread has its own database
+connection) and the page waits for the slowest group rather than for all of them in
+turn. Each group is cached on its own through the versioned cache, so a write to one
+table only recomputes that group.
+
+Groups still running when the timeout expires are reported as missing and the rest is
+returned. Their threads are not interrupted: they finish in the background and cache
+their result for the next request.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .analytics import invoice_metrics, purchase_order_metrics, spend_metrics, supplier_metrics
+from .models import Category, Invoice, PurchaseOrder, SpendDailyRollup, SpendEntry, Supplier
+from .versioning import cached_aggregate
+
+SUMMARY_TIMEOUT = getattr(settings, 'SUMMARY_TIMEOUT_SECONDS', 5)
+# Shared by every request, so it also caps the database connections the summary holds
+SUMMARY_MAX_WORKERS = getattr(settings, 'SUMMARY_MAX_WORKERS', 4)
+
+
+class MetricGroup:
+    """One independently computed part of the summary and the models it reads."""
+
+    def __init__(self, label, compute, dependencies):
+        self.label = label
+        self.compute = compute # (date_from, date_to) -> dict
+        self.dependencies = dependencies
+
+
+SUMMARY_GROUPS = {
+    'invoices': MetricGroup('Invoices', invoice_metrics, (Invoice,)),
+    'purchase_orders': MetricGroup('Purchase Orders', purchase_order_metrics, (PurchaseOrder,)),
+    'spend': MetricGroup(
+        'Spend', lambda date_from, date_to: spend_metrics(date_from=date_from, date_to=date_to),
+        (SpendEntry, SpendDailyRollup, Category, Supplier), # The breakdowns show category and supplier names
+    ),
+    'suppliers': MetricGroup('Suppliers', lambda date_from, date_to: supplier_metrics(), (Supplier,)),
+}
+
+_executor = ThreadPoolExecutor(max_workers=SUMMARY_MAX_WORKERS, thread_name_prefix='summary')
+
+
+def compute_group(name, date_from=None, date_to=None):
+    """One group's metrics from the versioned cache, computed on a miss. Runs in a pool thread."""
+    group = SUMMARY_GROUPS[name]
+    try:
+        return cached_aggregate(
+            'summary-group', group.dependencies, lambda: group.compute(date_from, date_to),
+            params=(name, date_from, date_to),
+        )
+    finally:
+        # Pool threads outlive the request, so give their connections the usual end-of-request treatment
+        close_old_connections()
+
+
+async def gather_summary_groups(names=None, date_from=None, date_to=None, timeout=SUMMARY_TIMEOUT):
+    """
+    Runs the named groups (all by default) concurrently.
+    Returns (results, missing, errors): {name: metrics} for the groups that finished,
+    the names still running at the timeout, and {name: message} for groups that failed.
+    """
+    names = list(names or SUMMARY_GROUPS)
+    run = sync_to_async(compute_group, thread_sensitive=False, executor=_executor)
+    tasks = {name: asyncio.ensure_future(run(name, date_from, date_to)) for name in names}
+    await asyncio.wait(tasks.values(), timeout=timeout)
+
+    results, missing, errors = {}, [], {}
+    for name, task in tasks.items():
+        if not task.done():
+            task.cancel() # Stops waiting; the thread still finishes and fills the cache
+            missing.append(name)
+        elif task.exception() is not None:
+            errors[name] = str(task.exception())
+        else:
+            results[name] = task.result()
+    return results, missing, errors
+
@@ -0,0 +1,208 @@
+# core/bulk_delete.py
+"""
+Set-based deletes for cleaning up many rows at once.
+
+instance.delete() (and queryset.delete()) lets Django's collector load every row the
+delete cascades to and delete them in batches of primary keys, sending signals per row;
+for a supplier that owns thousands of orders and invoices that is thousands of rows
+pulled into Python. DeletePlan instead follows the model's foreign keys once, at the
+model level, and turns every step into one statement whose WHERE clause is a subquery on
+the step before:
+  - CASCADE: DELETE FROM child WHERE fk IN (SELECT id FROM <parent rows>), children first;
+  - SET_NULL: UPDATE child SET fk = NULL WHERE fk IN (...), before any delete;
+  - PROTECT / RESTRICT (or anything else): the delete is refused if such rows exist.
+The same plan gives the cascade preview (a count per model) without deleting anything.
+
+No signals are sent, so execute() does what the handlers in core/signals.py would:
+recomputes the spend rollups of the days whose entries were deleted, rebuilds the
+category closure table when categories were deleted, refreshes the scorecards of the
+suppliers whose invoices or orders were deleted, writes the deletion tombstones of the
+columnar copies (one INSERT ... SELECT per table) and bumps the model versions.
+"""
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import CASCADE, DO_NOTHING, SET_NULL
+from django.utils import timezone
+
+from .analytics import DATE_FIELDS, date_range_filter, parse_date_range
+from .closure import rebuild_category_closure
+from .columnar import record_deletions
+from .models import Category, CategoryClosure, Invoice, PurchaseOrder, SpendEntry, SpendDailyRollup, Supplier
+from .rollups import refresh_spend_rollups
+from .scorecards import mark_suppliers_changed
+from .versioning import bump_model_versions_on_commit
+
+BULK_DELETE_MAX_PKS = 5000
+
+
+def _reverse_foreign_keys(model):
+    """(model holding the key, foreign key field, on_delete) for every FK pointing at `model`."""
+    return [
+        (relation.related_model, relation.field, relation.on_delete)
+        for relation in model._meta.related_objects
+        if not relation.many_to_many
+    ]
+
+
+def _cascade_order(model):
+    """`model` and every model a delete cascades to, each after all the models cascading to it."""
+    reachable = set()
+    stack = [model]
+    while stack:
+        current = stack.pop()
+        if current in reachable:
+            continue
+        reachable.add(current)
+        stack.extend(child for child, _, on_delete in _reverse_foreign_keys(current) if on_delete is CASCADE)
+
+    order, visiting, done = [], set(), set()
+
+    def visit(current):
+        if current in done:
+            return
+        if current in visiting:
+            raise ValueError(f"{current.__name__} deletes cascade in a cycle; delete the rows one at a time.")
+        visiting.add(current)
+        for parent in reachable:
+            if any(child is current and on_delete is CASCADE for child, _, on_delete in _reverse_foreign_keys(parent)):
+                visit(parent)
+        visiting.discard(current)
+        done.add(current)
+        order.append(current)
+
+    for current in sorted(reachable, key=lambda m: m._meta.label):
+        visit(current)
+    return order
+
+
+def _touch(model):
+    """Bumps auto_now fields, as save() would, so change markers (core/columnar.py) see the update."""
+    return {
+        field.name: timezone.now()
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+    }
+
+
+def selected_rows(model, params):
+    """
+    The rows a bulk delete request selects: `pks` (a list of primary keys) or a filter of
+    exact field values (e.g. supplier=12, status=Pending) and/or date_from/date_to.
+    Raises ValueError for an empty selection (it would mean the whole table), an unknown
+    field or a bad value.
+    """
+    queryset = model._base_manager.all()
+    pks = [pk for pk in params.get('pks', []) if str(pk).strip()]
+    if pks:
+        if len(pks) > BULK_DELETE_MAX_PKS:
+            raise ValueError(f"At most {BULK_DELETE_MAX_PKS} ids per request; use a filter for more.")
+        try:
+            pks = [int(pk) for pk in pks]
+        except (TypeError, ValueError):
+            raise ValueError("pks must be integers.")
+        queryset = queryset.filter(pk__in=pks)
+    fields = {field.name: field for field in model._meta.concrete_fields}
+    fields.update({field.attname: field for field in model._meta.concrete_fields})
+    filters = {name: value for name, value in params.get('filter', {}).items() if value not in ('', None)}
+    date_from, date_to = parse_date_range(filters)
+    filters.pop('date_from', None)
+    filters.pop('date_to', None)
+    if (date_from or date_to) and not DATE_FIELDS.get(model):
+        raise ValueError(f"{model.__name__} has no date to filter on.")
+    for name, value in filters.items():
+        if name not in fields:
+            raise ValueError(f"Unknown field '{name}' for {model.__name__}.")
+        try:
+            fields[name].to_python(value)
+        except ValidationError:
+            raise ValueError(f"Invalid value for '{name}': {value}")
+    if not (pks or filters or date_from or date_to):
+        raise ValueError("Select rows by pks or a filter.")
+    return queryset.filter(date_range_filter(model, date_from, date_to), **filters)
+
+
+class DeletePlan:
+    """
+    Everything deleting `queryset` (rows of `model`) touches, as querysets: the rows to
+    delete per model, the foreign keys to set to NULL and the rows protecting the delete.
+    """
+
+    def __init__(self, model, queryset, using=DEFAULT_DB_ALIAS):
+        self.model = model
+        self.using = using
+        self.order = _cascade_order(model)
+        self.deletes = {model: queryset.using(using)} # model -> rows to delete
+        self.updates = [] # (model, field, rows whose field is set to NULL)
+        self.protected = [] # (model, field, rows that block the delete)
+        for parent in self.order:
+            selected = self.deletes.get(parent)
+            if selected is None:
+                continue
+            parent_pks = selected.values('pk')
+            for child, field, on_delete in _reverse_foreign_keys(parent):
+                rows = child._base_manager.using(using).filter(**{f'{field.name}__in': parent_pks})
+                if on_delete is CASCADE:
+                    self.deletes[child] = self.deletes[child] | rows if child in self.deletes else rows
+                elif on_delete is SET_NULL:
+                    self.updates.append((child, field, rows))
+                elif on_delete is not DO_NOTHING:
+                    self.protected.append((child, field, rows))
+        # Rows that are deleted anyway need no update
+        self.updates = [
+            (child, field, rows.exclude(pk__in=self.deletes[child].values('pk')) if child in self.deletes else rows)
+            for child, field, rows in self.updates
+        ]
+
+    def preview(self):
+        """Row counts per model: {'delete': {...}, 'set_null': {...}, 'protected': {...}}."""
+        return {
+            'delete': {model._meta.label: self.deletes[model].count() for model in self.order if model in self.deletes},
+            'set_null': {f'{model._meta.label}.{field.name}': rows.count() for model, field, rows in self.updates},
+            'protected': {f'{model._meta.label}.{field.name}': rows.count() for model, field, rows in self.protected},
+        }
+
+    def _deleted_spend_days(self):
+        if SpendEntry not in self.deletes:
+            return []
+        return sorted(self.deletes[SpendEntry].order_by().values_list('date', flat=True).distinct())
+
+    def _scorecard_suppliers(self):
+        """Suppliers whose invoices or orders are deleted, except those deleted themselves."""
+        supplier_ids = set()
+        for model in (Invoice, PurchaseOrder):
+            if model in self.deletes:
+                supplier_ids.update(self.deletes[model].order_by().values_list('supplier_id', flat=True).distinct())
+        if Supplier in self.deletes:
+            supplier_ids -= set(self.deletes[Supplier].values_list('pk', flat=True))
+        return supplier_ids
+
+    def execute(self):
+        """
+        Runs the plan in one transaction. Returns the deleted row counts per model.
+        Raises ValueError, deleting nothing, when protected rows exist.
+        """
+        with transaction.atomic(using=self.using):
+            blocking = [f'{model.__name__}.{field.name}' for model, field, rows in self.protected if rows.exists()]
+            if blocking:
+                raise ValueError(f"Rows are still referenced through {', '.join(blocking)}.")
+            days = self._deleted_spend_days()
+            suppliers = self._scorecard_suppliers()
+            for model, field, rows in self.updates:
+                rows.update(**{field.name: None, **_touch(model)})
+            deleted = {}
+            for model in reversed(self.order): # Children before the rows they point to
+                if model in self.deletes:
+                    record_deletions(model, self.deletes[model], using=self.using)
+                    deleted[model._meta.label] = self.deletes[model]._raw_delete(self.using)
+
+            refresh_spend_rollups(days, using=self.using)
+            if Category in self.deletes:
+                rebuild_category_closure(self.using) # Children of deleted categories are roots now
+            mark_suppliers_changed(suppliers, using=self.using)
+            touched = {*self.deletes, *(model for model, _, _ in self.updates)}
+            if days:
+                touched.add(SpendDailyRollup)
+            if Category in self.deletes:
+                touched.add(CategoryClosure)
+            bump_model_versions_on_commit(*touched)
+        return deleted
@@ -0,0 +1,166 @@
+# core/bulkload.py
+"""
+Bulk write helpers used by load_brake_data (and anything else that moves whole tables).
+
+bulk_insert() takes an iterable of {attname: value} dicts and writes them in batches,
+using PostgreSQL's COPY FROM STDIN when the connection supports it and
+bulk_create() everywhere else. Neither path sends model signals, so callers are
+responsible for bumping versions (core/versioning.py) afterwards.
+copy_out() and copy_in() stream a whole table through COPY's text format (core/snapshots.py).
+"""
+import io
+import re
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connections, DEFAULT_DB_ALIAS
+
+DEFAULT_BATCH_SIZE = 5000
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def copy_supported(using=DEFAULT_DB_ALIAS):
+    """True when the connection is PostgreSQL through psycopg 3 or psycopg2."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    connection.ensure_connection()
+    raw_cursor_class = type(connection.connection.cursor())
+    return hasattr(raw_cursor_class, 'copy') or hasattr(raw_cursor_class, 'copy_expert')
+
+
+def copy_text(value):
+    """Encodes one value for COPY's text format."""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+_COPY_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '\\': '\\'}
+_COPY_ESCAPE_RE = re.compile(r'\\(.)')
+
+
+def parse_copy_line(line):
+    """Splits one line of COPY's text format into its values (str, or None for NULL)."""
+    return [
+        None if value == '\\N' else _COPY_ESCAPE_RE.sub(lambda m: _COPY_ESCAPES.get(m.group(1), m.group(1)), value)
+        for value in line.rstrip('\n').split('\t')
+    ]
+
+
+def _model_values(model, concrete_fields, row, connection):
+    """Database values for one row, with defaults and pre_save hooks (e.g. auto_now) applied."""
+    instance = model(**row)
+    return [
+        field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for field in concrete_fields
+    ]
+
+
+def _copy_batch(model, concrete_fields, rows, connection):
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in concrete_fields)
+    sql = f'COPY {table} ({columns}) FROM STDIN'
+    buffer = io.StringIO()
+    for row in rows:
+        values = _model_values(model, concrete_fields, row, connection)
+        buffer.write('\t'.join(copy_text(value) for value in values))
+        buffer.write('\n')
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy'):  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+        else:  # psycopg2
+            raw_cursor.copy_expert(sql, buffer)
+
+
+def bulk_insert(model, rows, batch_size=DEFAULT_BATCH_SIZE, using=DEFAULT_DB_ALIAS, use_copy=None):
+    """
+    Inserts every {attname: value} dict in `rows` in batches of `batch_size`.
+    Rows must carry explicit primary keys when COPY is used; call reset_sequences() afterwards.
+    Returns the number of rows written.
+    """
+    connection = connections[using]
+    if use_copy is None:
+        use_copy = copy_supported(using)
+    concrete_fields = model._meta.concrete_fields
+    written = 0
+    for batch in batched(rows, batch_size):
+        if use_copy:
+            _copy_batch(model, concrete_fields, batch, connection)
+        else:
+            model.objects.using(using).bulk_create([model(**row) for row in batch], batch_size=batch_size)
+        written += len(batch)
+    return written
+
+
+def copy_out(sql, target, using=DEFAULT_DB_ALIAS):
+    """
+    Runs `sql` (a COPY ... TO STDOUT statement) and writes its output to the binary file
+    `target` as it arrives. Returns the number of rows copied.
+    """
+    with connections[using].cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy'):  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                for block in copy:
+                    target.write(block)
+        else:  # psycopg2
+            raw_cursor.copy_expert(sql, target)
+        return raw_cursor.rowcount
+
+
+def copy_in(sql, source, using=DEFAULT_DB_ALIAS, block_size=COPY_BLOCK_SIZE):
+    """Runs `sql` (a COPY ... FROM STDIN statement), feeding it the binary file `source` block by block."""
+    with connections[using].cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy'):  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                while block := source.read(block_size):
+                    copy.write(block)
+        else:  # psycopg2
+            raw_cursor.copy_expert(sql, source, size=block_size)
+        return raw_cursor.rowcount
+
+
+def reset_sequences(models, using=DEFAULT_DB_ALIAS):
+    """Moves the id sequences past the largest id, needed after inserting explicit ids."""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def raw_wipe(models, using=DEFAULT_DB_ALIAS):
+    """
+    Deletes every row of `models` with one DELETE per table, without Django's collector
+    loading the rows first. `models` must be ordered children first; no signals are sent.
+    """
+    for model in models:
+        queryset = model._base_manager.using(using).all()
+        queryset._raw_delete(using)
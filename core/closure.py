@@ -0,0 +1,105 @@
+# core/closure.py
+"""
+Closure table for the category tree (CategoryClosure).
+
+Every category has a row linking it to itself (depth 0) and one to each of its ancestors,
+so "everything under X" is a single join on ancestor = X however deep or wide the tree is.
+The Category signals in core/signals.py keep it current:
+  - a new category gets its parent's ancestor rows plus its own (insert_category);
+  - changing a parent moves the whole subtree (move_category);
+  - deleting a category detaches its subtree from its ancestors first (detach_category),
+    because its children are SET_NULL by a plain UPDATE and become roots.
+Writes that skip signals (bulk_create, raw SQL, load_brake_data) must call
+rebuild_category_closure() afterwards.
+"""
+from django.db import connections, transaction, IntegrityError, DEFAULT_DB_ALIAS
+
+from .models import Category, CategoryClosure
+
+
+def is_descendant(category_id, possible_descendant_id, using=DEFAULT_DB_ALIAS):
+    """True when `possible_descendant_id` is `category_id` itself or somewhere below it."""
+    return CategoryClosure.objects.using(using).filter(
+        ancestor_id=category_id, descendant_id=possible_descendant_id,
+    ).exists()
+
+
+def _ancestor_depths(category_id, using):
+    """{ancestor id: depth} for the category, itself included at depth 0."""
+    return dict(
+        CategoryClosure.objects.using(using).filter(descendant_id=category_id).values_list('ancestor_id', 'depth')
+    )
+
+
+def insert_category(category_id, parent_id, using=DEFAULT_DB_ALIAS):
+    """Adds the rows for a new category (a leaf when created)."""
+    links = [CategoryClosure(ancestor_id=category_id, descendant_id=category_id, depth=0)]
+    if parent_id is not None:
+        links += [
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth + 1)
+            for ancestor_id, depth in _ancestor_depths(parent_id, using).items()
+        ]
+    CategoryClosure.objects.using(using).bulk_create(links)
+
+
+def detach_category(category_id, using=DEFAULT_DB_ALIAS):
+    """Removes the links between the category's subtree and the category's ancestors."""
+    subtree = CategoryClosure.objects.using(using).filter(ancestor_id=category_id).values('descendant_id')
+    ancestors = CategoryClosure.objects.using(using).filter(descendant_id=category_id, depth__gt=0).values('ancestor_id')
+    CategoryClosure.objects.using(using).filter(descendant_id__in=subtree, ancestor_id__in=ancestors)._raw_delete(using)
+
+
+def move_category(category_id, new_parent_id, using=DEFAULT_DB_ALIAS):
+    """Re-links the category and its whole subtree under `new_parent_id` (None makes it a root)."""
+    if new_parent_id is not None and is_descendant(category_id, new_parent_id, using):
+        raise ValueError("A category can't be moved under itself or one of its subcategories.")
+    with transaction.atomic(using=using):
+        detach_category(category_id, using)
+        if new_parent_id is None:
+            return
+        subtree = dict(
+            CategoryClosure.objects.using(using).filter(ancestor_id=category_id).values_list('descendant_id', 'depth')
+        )
+        CategoryClosure.objects.using(using).bulk_create([
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + 1 + depth)
+            for ancestor_id, ancestor_depth in _ancestor_depths(new_parent_id, using).items()
+            for descendant_id, depth in subtree.items()
+        ])
+
+
+def rebuild_category_closure(using=DEFAULT_DB_ALIAS):
+    """
+    Rebuilds the whole closure table, one INSERT ... SELECT per tree level.
+    Returns the number of rows. Raises ValueError if the parent links contain a cycle.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    closure = quote(CategoryClosure._meta.db_table)
+    category = quote(Category._meta.db_table)
+    with transaction.atomic(using=using):
+        CategoryClosure.objects.using(using).all()._raw_delete(using)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {closure} (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM {category}"
+            )
+            category_count = cursor.rowcount
+            depth = 0
+            while True:
+                # Paths one level longer: every path ending at a parent, extended to its children
+                try:
+                    cursor.execute(
+                        f"INSERT INTO {closure} (ancestor_id, descendant_id, depth) "
+                        f"SELECT path.ancestor_id, child.id, %s FROM {closure} path "
+                        f"JOIN {category} child ON child.parent_id = path.descendant_id "
+                        f"WHERE path.depth = %s",
+                        [depth + 1, depth],
+                    )
+                except IntegrityError:
+                    # Only a cycle can lead a path back to a pair that is already linked
+                    raise ValueError("The category parent links contain a cycle.") from None
+                if cursor.rowcount == 0:
+                    break
+                depth += 1
+                if depth > category_count:
+                    raise ValueError("The category parent links contain a cycle.")
+    return CategoryClosure.objects.using(using).count()
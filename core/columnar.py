@@ -0,0 +1,408 @@
+# core/columnar.py
+"""
+Optional process-local columnar copy of SpendEntry and Invoice for interactive slicing.
+
+Each table is held as NumPy arrays: int32 codes for foreign keys (-1 for NULL), int64
+amounts in paise, int32 date ordinals (0 for NULL) and dictionary-encoded strings
+(cost_center, status). Group-by/sum/count queries with filters are answered with
+vectorized masks and np.bincount, without a database round trip.
+
+The store refreshes itself before answering when the table's version (core/versioning.py)
+has moved, reading only what changed since the last refresh:
+  - deletes, from the RowDeletion tombstones written by the post_delete signal and by the
+    set-based deletes (record_deletions()); a tombstone without a row id (a wipe or a
+    snapshot restore, record_table_reset()) makes the store reload everything;
+  - inserts and updates, as the rows past the largest id seen or whose `updated_at` is
+    within COMMIT_LAG of the largest one seen. The lag window catches rows saved before
+    the last refresh but committed after it; a transaction open longer than that is
+    missed until the next full reload.
+Both markers are read before the rows they cover, and re-reading a row or a tombstone is
+harmless. Tombstones older than TOMBSTONE_RETENTION are pruned, and a store that hasn't
+refreshed for that long reloads. Writes that bypass both the signals and `updated_at`
+(queryset.update()) are only picked up by the next full reload.
+
+NumPy is not a hard dependency: when it isn't installed, or COLUMNAR_ANALYTICS is off in
+settings, columnar_available() is False and callers use the database instead.
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Count, Max, Q, QuerySet, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import RowDeletion, SpendEntry, Invoice
+from .routers import pinned_to_primary
+from .versioning import get_model_version
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+LOAD_CHUNK_SIZE = 50000
+NULL_CODE = -1
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# How long a write may stay uncommitted and still be picked up by the next refresh
+COMMIT_LAG = timedelta(minutes=5)
+TOMBSTONE_RETENTION = timedelta(days=1)
+
+
+def columnar_available():
+    return np is not None and getattr(settings, 'COLUMNAR_ANALYTICS', False)
+
+
+class Dictionary:
+    """Dictionary encoding for a string column: value <-> small integer code."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        return self.codes.get(value, NULL_CODE)
+
+    def nbytes(self):
+        return sum(len(value.encode()) for value in self.values if value) + 8 * len(self.values)
+
+
+# Column kinds: how a model value becomes an array element, and back
+def _fk(value):
+    return NULL_CODE if value is None else value
+
+
+def _date(value):
+    return 0 if value is None else value.toordinal()
+
+
+def _paise(value):
+    return int(round(value * 100))
+
+
+class TableSpec:
+    """Which columns of a model are loaded, and how each one is encoded."""
+
+    def __init__(self, model, fk_columns, date_columns, dictionary_columns, period_column):
+        self.model = model
+        self.fk_columns = fk_columns # attnames, stored as int32
+        self.date_columns = date_columns # stored as int32 ordinals
+        self.dictionary_columns = dictionary_columns # stored as int32 codes
+        self.period_column = period_column # date column the date range and 'month' grouping use
+
+    @property
+    def fields(self):
+        return ['id', 'amount', *self.fk_columns, *self.date_columns, *self.dictionary_columns]
+
+    @property
+    def group_keys(self):
+        return [*self.fk_columns, *self.date_columns, *self.dictionary_columns, 'month']
+
+    @property
+    def filter_keys(self):
+        return [*self.fk_columns, *self.dictionary_columns]
+
+
+TABLE_SPECS = {
+    'spend': TableSpec(SpendEntry, ['category_id', 'supplier_id'], ['date'], ['cost_center'], 'date'),
+    'invoices': TableSpec(
+        Invoice, ['supplier_id', 'purchase_order_id'], ['invoice_date', 'due_date', 'paid_date'], ['status'], 'invoice_date',
+    ),
+}
+TRACKED_MODELS = {spec.model for spec in TABLE_SPECS.values()}
+
+
+class ColumnarTable:
+    """The arrays for one model, plus the bookkeeping needed to refresh them."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.lock = threading.Lock()
+        self.version = None
+        self.row_marker = (None, None) # Largest id and updated_at seen so far
+        self.deletion_marker = (None, None) # Largest RowDeletion id and deleted_at seen so far
+        self.resets = set() # RowDeletion ids of the resets the loaded rows already reflect
+        self.dictionaries = {name: Dictionary() for name in spec.dictionary_columns}
+        self.columns = {}
+        self.loaded_at = None
+        self.last_refresh = None
+
+    # --- Loading ---
+
+    def _encode_rows(self, rows):
+        """Column arrays for a list of .values_list(*spec.fields) tuples."""
+        spec = self.spec
+        names = spec.fields
+        columns = {}
+        for index, name in enumerate(names):
+            raw = [row[index] for row in rows]
+            if name == 'id':
+                columns[name] = np.array(raw, dtype=np.int64)
+            elif name == 'amount':
+                columns[name] = np.array([_paise(value) for value in raw], dtype=np.int64)
+            elif name in spec.fk_columns:
+                columns[name] = np.array([_fk(value) for value in raw], dtype=np.int32)
+            elif name in spec.date_columns:
+                columns[name] = np.array([_date(value) for value in raw], dtype=np.int32)
+            else:
+                dictionary = self.dictionaries[name]
+                columns[name] = np.array([dictionary.encode(value) for value in raw], dtype=np.int32)
+        # Derived: months since 1970-01, for grouping by month
+        period = columns[spec.period_column]
+        days = (period.astype(np.int64) - EPOCH_ORDINAL).astype('datetime64[D]')
+        columns['month'] = np.where(period > 0, days.astype('datetime64[M]').astype(np.int64), NULL_CODE).astype(np.int32)
+        return columns
+
+    def _load_columns(self, queryset):
+        """Encodes the queryset chunk by chunk, ordered by id, so rows are never all held as tuples."""
+        chunks = []
+        rows = []
+        for row in queryset.order_by('id').values_list(*self.spec.fields).iterator(chunk_size=LOAD_CHUNK_SIZE):
+            rows.append(row)
+            if len(rows) >= LOAD_CHUNK_SIZE:
+                chunks.append(self._encode_rows(rows))
+                rows = []
+        chunks.append(self._encode_rows(rows))
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+    def _deletions(self):
+        return RowDeletion.objects.filter(table_name=self.spec.model._meta.db_table)
+
+    def _markers(self):
+        """(row marker, deletion marker): the largest id and change time of each."""
+        rows = self.spec.model.objects.aggregate(last_id=Max('id'), latest=Max('updated_at'))
+        deletions = self._deletions().aggregate(last_id=Max('id'), latest=Max('deleted_at'))
+        return (rows['last_id'], rows['latest']), (deletions['last_id'], deletions['latest'])
+
+    @staticmethod
+    def _since(queryset, time_field, marker):
+        """Rows of `queryset` past the marker's id, or within COMMIT_LAG of its time."""
+        last_id, latest = marker
+        if last_id is None:
+            return queryset
+        return queryset.filter(Q(id__gt=last_id) | Q(**{f'{time_field}__gte': latest - COMMIT_LAG}))
+
+    def full_load(self):
+        model = self.spec.model
+        version = get_model_version(model)
+        row_marker, deletion_marker = self._markers()
+        resets = set(self._deletions().filter(row_id__isnull=True).values_list('id', flat=True))
+        self.dictionaries = {name: Dictionary() for name in self.spec.dictionary_columns}
+        self.columns = self._load_columns(model.objects.all())
+        self.version, self.row_marker, self.deletion_marker, self.resets = version, row_marker, deletion_marker, resets
+        self.loaded_at = self.last_refresh = time.time()
+
+    @staticmethod
+    def _apply_changes(columns, changed):
+        """
+        New arrays with the rows already present in `columns` overwritten and new ones
+        appended, keeping ids sorted. `columns` is left as it is for the queries reading it.
+        """
+        ids = columns['id']
+        positions = np.searchsorted(ids, changed['id'])
+        present = positions < len(ids)
+        present[present] = ids[positions[present]] == changed['id'][present]
+        columns = {name: column.copy() for name, column in columns.items()}
+        for name, column in columns.items():
+            column[positions[present]] = changed[name][present]
+        if (~present).any():
+            merged = {name: np.concatenate([column, changed[name][~present]]) for name, column in columns.items()}
+            order = np.argsort(merged['id'], kind='stable')
+            columns = {name: column[order] for name, column in merged.items()}
+        return columns
+
+    @staticmethod
+    def _drop(columns, row_ids):
+        """`columns` without the rows with these ids (ids not present are ignored)."""
+        ids = columns['id']
+        row_ids = np.unique(np.asarray(row_ids, dtype=np.int64))
+        positions = np.searchsorted(ids, row_ids)
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == row_ids[found]
+        if not found.any():
+            return columns
+        keep = np.ones(len(ids), dtype=bool)
+        keep[positions[found]] = False
+        return {name: column[keep] for name, column in columns.items()}
+
+    def refresh(self):
+        """Brings the arrays up to date; cheap when the model's version hasn't moved."""
+        with self.lock:
+            if self.version is None:
+                self.full_load()
+                return
+            model = self.spec.model
+            version = get_model_version(model)
+            if version == self.version:
+                return
+            if time.time() - self.last_refresh > TOMBSTONE_RETENTION.total_seconds():
+                # Tombstones this store hasn't read may have been pruned already
+                self.full_load()
+                return
+            row_marker, deletion_marker = self._markers()
+            deletions = list(self._since(self._deletions(), 'deleted_at', self.deletion_marker).values_list('id', 'row_id'))
+            if any(row_id is None and pk not in self.resets for pk, row_id in deletions):
+                self.full_load()
+                return
+            # Deletes first: a row deleted and then inserted again is among the changed rows
+            columns = self.columns
+            deleted_ids = [row_id for _, row_id in deletions if row_id is not None]
+            if deleted_ids:
+                columns = self._drop(columns, deleted_ids)
+            changed_columns = self._load_columns(self._since(model.objects.all(), 'updated_at', self.row_marker))
+            if len(changed_columns['id']):
+                columns = self._apply_changes(columns, changed_columns)
+            # Swapped in whole, so queries running meanwhile see either version
+            self.columns = columns
+            self.version, self.row_marker, self.deletion_marker = version, row_marker, deletion_marker
+            self.last_refresh = time.time()
+            stale = self._deletions().filter(deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION)
+            stale._raw_delete(router.db_for_write(RowDeletion))
+
+    # --- Querying ---
+
+    def _mask(self, columns, filters, date_from, date_to):
+        mask = np.ones(len(columns['id']), dtype=bool)
+        for name, value in filters.items():
+            column = columns[name]
+            if name in self.dictionaries:
+                value = self.dictionaries[name].lookup(value)
+            mask &= column == value
+        period = columns[self.spec.period_column]
+        if date_from:
+            mask &= period >= date_from.toordinal()
+        if date_to:
+            mask &= period <= date_to.toordinal()
+        return mask
+
+    def _decode_key(self, name, code):
+        if code == NULL_CODE:
+            return None
+        if name in self.dictionaries:
+            return self.dictionaries[name].values[code]
+        if name in self.spec.date_columns:
+            return date.fromordinal(code) if code else None
+        if name == 'month':
+            return f"{1970 + code // 12:04d}-{code % 12 + 1:02d}"
+        return code
+
+    def group_by(self, key, filters=None, date_from=None, date_to=None):
+        """
+        [{'key', 'total', 'count'}] for the rows matching `filters` ({column: value},
+        equality) and the date range, grouped by `key`. Totals are in rupees, biggest first.
+        """
+        columns = self.columns # A refresh may swap in new arrays meanwhile
+        mask = self._mask(columns, filters or {}, date_from, date_to)
+        codes = columns[key][mask]
+        amounts = columns['amount'][mask]
+        if not len(codes):
+            return []
+        # Shift codes to start at 0 so bincount stays as small as the range of keys
+        offset = int(codes.min())
+        shifted = codes - offset
+        counts = np.bincount(shifted)
+        # float64 sums are exact for integer paise up to 2**53 (about 90 trillion rupees)
+        totals = np.rint(np.bincount(shifted, weights=amounts.astype(np.float64))).astype(np.int64)
+        present = np.nonzero(counts)[0]
+        groups = [
+            {'key': self._decode_key(key, int(code) + offset), 'total': int(totals[code]) / 100, 'count': int(counts[code])}
+            for code in present
+        ]
+        groups.sort(key=lambda group: -group['total'])
+        return groups
+
+    def memory_usage(self):
+        """Bytes held per column (dictionaries included) and in total."""
+        usage = {name: int(column.nbytes) for name, column in self.columns.items()}
+        for name, dictionary in self.dictionaries.items():
+            usage[f'{name} (dictionary)'] = dictionary.nbytes()
+        usage['total'] = sum(usage.values())
+        return usage
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_table(name):
+    """The process-wide ColumnarTable for 'spend' or 'invoices', refreshed and ready to query."""
+    with _tables_lock:
+        table = _tables.get(name)
+        if table is None:
+            table = _tables[name] = ColumnarTable(TABLE_SPECS[name])
+    # The refresh records the current version; a lagging replica would pair it with old rows
+    with pinned_to_primary():
+        table.refresh()
+    return table
+
+
+def record_deletions(model, rows, using=DEFAULT_DB_ALIAS):
+    """
+    Writes the tombstones of deleted rows of `model`: `rows` is a list of ids or a
+    queryset of rows about to be deleted without signals (one INSERT ... SELECT). Does
+    nothing for models without a columnar copy.
+    """
+    if model not in TRACKED_MODELS:
+        return
+    table_name = model._meta.db_table
+    if not isinstance(rows, QuerySet):
+        RowDeletion.objects.using(using).bulk_create([RowDeletion(table_name=table_name, row_id=row_id) for row_id in rows])
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    pk = quote(model._meta.pk.column)
+    sql, params = rows.using(using).order_by().values('pk').query.sql_with_params()
+    deleted_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(RowDeletion._meta.db_table)} (table_name, row_id, deleted_at) "
+            f"SELECT %s, {pk}, %s FROM {quote(table_name)} WHERE {pk} IN ({sql})",
+            [table_name, deleted_at, *params],
+        )
+
+
+def record_table_reset(*tracked, using=DEFAULT_DB_ALIAS):
+    """Marks every row of these models as replaced (a wipe or a restore): the stores reload."""
+    RowDeletion.objects.using(using).bulk_create([
+        RowDeletion(table_name=model._meta.db_table, row_id=None) for model in tracked if model in TRACKED_MODELS
+    ])
+
+
+def database_group_by(name, key, filters=None, date_from=None, date_to=None):
+    """The same answer as ColumnarTable.group_by(), computed by the database."""
+    spec = TABLE_SPECS[name]
+    queryset = spec.model.objects.filter(**(filters or {}))
+    if date_from:
+        queryset = queryset.filter(**{f'{spec.period_column}__gte': date_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{spec.period_column}__lte': date_to})
+    if key == 'month':
+        queryset = queryset.annotate(month=TruncMonth(spec.period_column))
+    rows = queryset.values(key).order_by().annotate(total=Sum('amount'), count=Count('id'))
+    groups = []
+    for row in rows:
+        value = row[key]
+        if key == 'month' and value is not None:
+            value = value.strftime('%Y-%m')
+        groups.append({'key': value, 'total': _paise(row['total']) / 100, 'count': row['count']})
+    groups.sort(key=lambda group: -group['total'])
+    return groups
+
+
+def group_by(name, key, filters=None, date_from=None, date_to=None):
+    """
+    Sum and count of `amount` per `key` for table `name`, from the columnar store when it
+    is available and from the database otherwise. Returns (groups, source).
+    """
+    if columnar_available():
+        return get_table(name).group_by(key, filters, date_from, date_to), 'columnar'
+    return database_group_by(name, key, filters, date_from, date_to), 'database'
@@ -0,0 +1,70 @@
+# core/conditional.py
+"""
+ETag / Last-Modified support for the pages and endpoints that only change when the data does.
+
+The ETag is a hash of the versions (core/versioning.py) of every model the response
+reads, plus everything else the response depends on: the path and query string, the
+user and their CSRF secret (pages embed a CSRF token). When a request's If-None-Match
+matches, Django's condition() answers 304 before the view runs, so the repeat visit
+costs a couple of cache reads instead of the queries, rendering or export.
+Responses read from a replica right after a change get no validators (core/routers.py).
+"""
+import hashlib
+from functools import wraps
+
+from django.views.decorators.http import condition
+
+from .versioning import get_last_modified, get_model_versions, replica_may_be_stale
+
+
+def _models_for(dependencies, request, args, kwargs):
+    if callable(dependencies):
+        return tuple(dependencies(request, *args, **kwargs) or ())
+    return tuple(dependencies)
+
+
+def versioned_etag(request, models):
+    """Strong ETag for `request` given the models its response is built from."""
+    versions = get_model_versions(models)
+    parts = [
+        request.get_full_path(),
+        str(request.user.pk),
+        request.META.get('CSRF_COOKIE', ''),
+        *sorted(f'{model._meta.label_lower}={versions[model]}' for model in models),
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def conditional_on(dependencies):
+    """
+    View decorator adding ETag and Last-Modified headers and answering conditional
+    GETs with 304. `dependencies` is a tuple of models, or a callable taking the view's
+    arguments and returning them; no models (e.g. an unknown model name) skips the
+    headers and runs the view as usual. Only 200 responses keep the headers, so an
+    error (a bad parameter, a missing optional dependency) is never revalidated.
+    """
+    def etag(request, *args, **kwargs):
+        models = _models_for(dependencies, request, args, kwargs)
+        if not models or replica_may_be_stale(models):
+            return None # A page read from a lagging replica must not be revalidated as current
+        return versioned_etag(request, models)
+
+    def last_modified(request, *args, **kwargs):
+        models = _models_for(dependencies, request, args, kwargs)
+        if not models or replica_may_be_stale(models):
+            return None
+        return get_last_modified(models)
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                del response['ETag']
+                del response['Last-Modified']
+            return response
+        return wrapper
+
+    return decorator
@@ -0,0 +1,173 @@
+# core/datatables.py
+"""
+Server-side processing for DataTables (https://datatables.net/manual/server-side).
+
+The list pages no longer embed every row in the HTML. DataTables asks this
+module for one page at a time and paging, sorting, global search and the
+per-column footer filters are all translated into SQL.
+
+Rows go out column-oriented ({'fields': [...], 'columns': [[...], ...]}, see
+core/serializers.py) and the list page's dataSrc turns them back into row objects.
+Other clients can ask for `layout=rows` to get DataTables' usual list of row objects.
+"""
+import json
+
+from django.db.models import (
+    Q, BooleanField, CharField, TextField, DateField, DateTimeField,
+    DecimalField, FloatField, IntegerField, ForeignKey,
+)
+
+from .serializers import get_serializer
+
+MAX_PAGE_LENGTH = 500
+DEFAULT_PAGE_LENGTH = 10
+
+
+def _int_or_default(raw, default):
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return default
+
+
+def _column_lookup(field, term):
+    """
+    Builds the Q object for filtering one column with the given search term.
+    Returns None if the term can never match this column (e.g. 'abc' on an integer).
+    """
+    name = field.attname
+    if isinstance(field, ForeignKey) or (isinstance(field, IntegerField) and field.primary_key):
+        if not term.isdigit():
+            return None
+        return Q(**{name: int(term)})
+    if isinstance(field, BooleanField):
+        lowered = term.lower()
+        if lowered in ('true', 'yes', '1'):
+            return Q(**{name: True})
+        if lowered in ('false', 'no', '0'):
+            return Q(**{name: False})
+        return None
+    if isinstance(field, (CharField, TextField)):
+        return Q(**{f'{name}__icontains': term})
+    if isinstance(field, (DateField, DateTimeField, DecimalField, FloatField, IntegerField)):
+        # Matches the way the value is rendered in the table, e.g. '2021-03' or '6558'
+        return Q(**{f'{name}__startswith': term})
+    return Q(**{f'{name}__icontains': term})
+
+
+def _cursor_value(value):
+    """A sort value as JSON without losing precision: floats as-is, the rest as text."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def _keyset_allowed(field):
+    """Keyset paging needs a sort column that never holds NULLs."""
+    return not field.null
+
+
+def datatables_response(request, model, fields, queryset=None):
+    """
+    Answers one DataTables server-side request for `model`, returning only the
+    requested page of `fields`. `fields` uses the same names as the list views
+    (attnames such as 'supplier_id'), and 'id' is always included for the actions column.
+    `queryset` narrows the rows before any DataTables filtering (e.g. a date range);
+    recordsTotal counts the rows it contains.
+    """
+    params = request.GET
+    draw = _int_or_default(params.get('draw'), 0)
+    start = max(_int_or_default(params.get('start'), 0), 0)
+    length = _int_or_default(params.get('length'), DEFAULT_PAGE_LENGTH)
+    if length < 0 or length > MAX_PAGE_LENGTH:
+        # DataTables sends -1 for "All"; never hand out an unbounded page
+        length = MAX_PAGE_LENGTH
+
+    model_fields = {name: model._meta.get_field(name) for name in fields}
+    values_fields = list(dict.fromkeys(list(fields) + ['id']))
+    if queryset is None:
+        queryset = model.objects.all()
+    records_total = queryset.count()
+
+    # --- Global search: any text column contains the term, or an exact id/FK match ---
+    filtered = False
+    search_term = params.get('search[value]', '').strip()
+    if search_term:
+        search_q = Q()
+        for field in model_fields.values():
+            if isinstance(field, (CharField, TextField)):
+                search_q |= Q(**{f'{field.attname}__icontains': search_term})
+            elif search_term.isdigit() and (isinstance(field, ForeignKey) or field.primary_key):
+                search_q |= Q(**{field.attname: int(search_term)})
+        queryset = queryset.filter(search_q) if search_q else queryset.none()
+        filtered = True
+
+    # --- Per-column filters from the table footer ---
+    for index, name in enumerate(fields):
+        term = params.get(f'columns[{index}][search][value]', '').strip()
+        if not term:
+            continue
+        column_q = _column_lookup(model_fields[name], term)
+        queryset = queryset.filter(column_q) if column_q is not None else queryset.none()
+        filtered = True
+
+    records_filtered = queryset.count() if filtered else records_total
+
+    # --- Sorting (always tie-broken on id so pages are stable) ---
+    order_index = _int_or_default(params.get('order[0][column]'), -1)
+    order_dir = 'desc' if params.get('order[0][dir]') == 'desc' else 'asc'
+    sort_name = fields[order_index] if 0 <= order_index < len(fields) else 'id'
+    sort_field = model_fields.get(sort_name) or model._meta.pk
+    prefix = '-' if order_dir == 'desc' else ''
+    ordering = [f'{prefix}{sort_field.attname}']
+    if sort_field.attname != 'id':
+        ordering.append(f'{prefix}id')
+    queryset = queryset.order_by(*ordering)
+
+    # --- Keyset paging: when the client sends the last row of the previous page ---
+    keyset = _keyset_allowed(sort_field)
+    after = params.get('after')
+    used_keyset = False
+    if keyset and after and start > 0:
+        try:
+            after_value, after_id = json.loads(after)
+            after_id = int(after_id)
+        except (TypeError, ValueError):
+            after_value = after_id = None
+        if after_id is not None:
+            op = 'lt' if order_dir == 'desc' else 'gt'
+            if sort_field.attname == 'id':
+                queryset = queryset.filter(**{f'id__{op}': after_id})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{sort_field.attname}__{op}': after_value}) |
+                    Q(**{sort_field.attname: after_value, f'id__{op}': after_id})
+                )
+            used_keyset = True
+
+    if used_keyset:
+        rows = list(queryset.values_list(*values_fields)[:length])
+    else:
+        rows = list(queryset.values_list(*values_fields)[start:start + length])
+
+    serializer = get_serializer(model, values_fields)
+    columns = serializer.columns(rows)
+
+    response = {
+        'draw': draw,
+        'recordsTotal': records_total,
+        'recordsFiltered': records_filtered,
+    }
+    if params.get('layout') == 'rows':
+        response['data'] = [dict(zip(values_fields, row)) for row in zip(*columns)]
+    else:
+        response['fields'] = values_fields
+        response['columns'] = columns
+    if keyset and rows:
+        # Cursor the client can send back as `after` to fetch the next page without OFFSET.
+        # Built from the stored values: the displayed ones may be rounded (floats)
+        last = rows[-1]
+        response['after'] = [
+            _cursor_value(last[values_fields.index(sort_field.attname)]), last[values_fields.index('id')],
+        ]
+    return response
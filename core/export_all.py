@@ -0,0 +1,198 @@
+# core/export_all.py
+"""
+Whole-dataset exports: every exported model in one file, either a workbook with one
+sheet per model or a zip of per-model CSVs.
+
+Each model is written by a worker process (openpyxl is CPU bound) into a part file: a
+single-sheet workbook, or a CSV. The pool is started on first use and kept for the life
+of the process, so only the first export pays for spawning the workers and setting up
+Django in them. It is separate from the background export pool, whose workers may be busy
+with long jobs; inside one of those workers (or with one worker) the parts are written
+in-process instead. The parts are then combined into the final
+file entry by entry, streaming through zipfile, so memory stays flat however large
+the dataset is:
+  - an .xlsx file is a zip archive. The parts are written with inline strings and the
+    same style table (register_sheet_styles() in core/exports.py), so a sheet's XML can
+    be copied as-is into a skeleton workbook that has one empty sheet per model;
+  - the CSVs are copied into the zip.
+All the parts read the same data: on PostgreSQL the workers join one exported snapshot
+(pg_export_snapshot), so the file is consistent even if rows change while it is written.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import openpyxl
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .analytics import parse_date_range
+from .export_worker import in_worker
+from .export_jobs import export_queryset
+from .exports import XLSX_CONTENT_TYPE, add_model_sheet, register_sheet_styles, sheet_title, stream_temporary_file
+from .flat_exports import iter_csv, write_text_export
+from .routers import replica_for_read
+
+EXPORT_ALL_WORKERS = getattr(settings, 'EXPORT_ALL_WORKERS', getattr(settings, 'EXPORT_WORKERS', 2))
+EXPORT_ALL_FORMATS = {
+    'xlsx': ('xlsx', XLSX_CONTENT_TYPE),
+    'csv': ('zip', 'application/zip'),
+}
+STYLES_PATH = 'xl/styles.xml'
+
+
+@contextmanager
+def _shared_snapshot(alias):
+    """
+    On PostgreSQL, holds a REPEATABLE READ transaction open and yields its exported
+    snapshot id for the workers to join. Elsewhere yields None.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        yield None
+        return
+    with transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cursor.execute("SELECT pg_export_snapshot()")
+            yield cursor.fetchone()[0]
+
+
+_pools = {} # Worker count -> ProcessPoolExecutor
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            from .export_worker import init_worker
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+            )
+        return pool
+
+
+def _map_parts(workers, args):
+    from .export_worker import write_part
+    try:
+        return list(_get_pool(workers).map(write_part, args))
+    except BrokenProcessPool:
+        # A worker died and took the pool with it: start a new one (see submit_export_job())
+        with _pools_lock:
+            _pools.pop(workers, None)
+        return list(_get_pool(workers).map(write_part, args))
+
+
+def write_model_part(model_label, path, export_format, params, alias, snapshot=None):
+    """
+    Writes one model's part file. Runs in a worker process (core/export_worker.py), or
+    in-process when there is one worker. Returns (row count, archive path of the sheet).
+    """
+    model = apps.get_model(model_label)
+    with transaction.atomic(using=alias):
+        if snapshot:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("SET TRANSACTION SNAPSHOT %s", [snapshot])
+        queryset = export_queryset(model, params).using(alias)
+        if export_format == 'csv':
+            return write_text_export(iter_csv)(model, path, queryset), None
+        workbook = openpyxl.Workbook(write_only=True)
+        row_count = add_model_sheet(workbook, model, queryset=queryset)
+        workbook.save(path)
+        return row_count, workbook.worksheets[0].path[1:]
+
+
+def _merge_workbooks(models, parts, path):
+    """Copies each part's sheet into a skeleton workbook with one empty sheet per model."""
+    skeleton = openpyxl.Workbook(write_only=True)
+    sheets = [skeleton.create_sheet(title=sheet_title(model)) for model in models]
+    register_sheet_styles(sheets[0])
+    skeleton_path = path + '.skeleton'
+    skeleton.save(skeleton_path)
+    # Sheet XML in the final file -> (part file, sheet XML inside it)
+    replacements = {sheet.path[1:]: part for sheet, part in zip(sheets, parts)}
+    try:
+        with zipfile.ZipFile(skeleton_path) as source, \
+                zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as target:
+            styles = source.read(STYLES_PATH)
+            for info in source.infolist():
+                if info.filename not in replacements:
+                    target.writestr(info, source.read(info.filename))
+                    continue
+                part_path, sheet_path = replacements[info.filename]
+                with zipfile.ZipFile(part_path) as part:
+                    if part.read(STYLES_PATH) != styles:
+                        raise ValueError(f"{part_path} was written with a different style table.")
+                    with part.open(sheet_path) as src, target.open(info.filename, 'w', force_zip64=True) as dst:
+                        shutil.copyfileobj(src, dst)
+    finally:
+        os.remove(skeleton_path)
+
+
+def _zip_csvs(models, parts, path):
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as target:
+        for model, (part_path, _) in zip(models, parts):
+            with open(part_path, 'rb') as src, \
+                    target.open(f"{model.__name__.lower()}_data.csv", 'w', force_zip64=True) as dst:
+                shutil.copyfileobj(src, dst)
+
+
+def write_export_all(models, path, export_format='xlsx', params=None, workers=None):
+    """
+    Writes every model in `models` to one file at `path` (see the module docstring).
+    `params` may hold date_from/date_to, applied to each model with a date.
+    Returns {model: row count}.
+    """
+    params = {key: value for key, value in (params or {}).items() if value}
+    parse_date_range(params) # Raises ValueError on a bad date before any worker starts
+    workers = EXPORT_ALL_WORKERS if workers is None else workers
+    if in_worker():
+        workers = 1 # Already one of a pool's workers: don't start another pool from it
+    alias = replica_for_read() or DEFAULT_DB_ALIAS # Every part reads from the same database
+    part_dir = tempfile.mkdtemp(prefix='export-all-')
+    part_paths = [
+        os.path.join(part_dir, f"{index}.{'csv' if export_format == 'csv' else 'xlsx'}") for index in range(len(models))
+    ]
+    try:
+        with _shared_snapshot(alias) as snapshot:
+            # In-process parts already read inside the snapshot's transaction
+            part_snapshot = snapshot if workers > 1 else None
+            args = [
+                (model._meta.label, part_path, export_format, params, alias, part_snapshot)
+                for model, part_path in zip(models, part_paths)
+            ]
+            if workers > 1:
+                results = _map_parts(workers, args)
+            else:
+                results = [write_model_part(*arg) for arg in args]
+        parts = [(part_path, sheet_path) for part_path, (_, sheet_path) in zip(part_paths, results)]
+        if export_format == 'csv':
+            _zip_csvs(models, parts, path)
+        else:
+            _merge_workbooks(models, parts, path)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+    return {model: row_count for model, (row_count, _) in zip(models, results)}
+
+
+def export_all_response(models, export_format='xlsx', params=None, filename='procurement_data'):
+    """Builds the whole-dataset file in a temporary file and streams it back."""
+    extension, content_type = EXPORT_ALL_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(suffix=f'.{extension}')
+    os.close(fd)
+    try:
+        write_export_all(models, path, export_format, params)
+    except Exception:
+        os.remove(path)
+        raise
+    suffix = '_csv' if export_format == 'csv' else ''
+    return stream_temporary_file(path, f"{filename}{suffix}.{extension}", content_type)
@@ -0,0 +1,270 @@
+# core/export_jobs.py
+"""
+Background exports: a request creates an ExportJob, a pool of worker processes writes
+the file into EXPORT_SPOOL_DIR, and the client polls the job for progress and then
+downloads the file.
+
+  - Processes rather than threads: openpyxl is CPU bound and would hold the GIL.
+    Workers are started with 'spawn' so they never share the web process's database
+    connections (core/export_worker.py).
+  - An identical request (same user, model, format and parameters) made while a job for
+    it is still pending or running gets that job back instead of a new one; a partial
+    unique constraint on ExportJob.dedup_key settles concurrent requests. Users only see
+    and download their own jobs.
+  - Finished files expire after EXPORT_TTL_SECONDS. cleanup_export_jobs() deletes them
+    (and stray files in the spool directory); it runs whenever a job is created and from
+    `manage.py export_jobs --cleanup`.
+Jobs queued by a web process that dies before running them stay Pending; run them with
+`manage.py export_jobs --run-pending`.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .analytics import date_range_filter, parse_date_range
+from .exports import XLSX_CONTENT_TYPE, write_model_workbook
+from .flat_exports import (
+    CSV_CONTENT_TYPE, NDJSON_CONTENT_TYPE, PARQUET_CONTENT_TYPE,
+    iter_csv, iter_ndjson, parquet_available, write_parquet, write_text_export,
+)
+from .models import ExportJob, ExportJobStatus
+from .routers import replica_reads
+
+logger = logging.getLogger(__name__)
+
+EXPORT_SPOOL_DIR = str(getattr(settings, 'EXPORT_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'export_spool')))
+EXPORT_TTL_SECONDS = getattr(settings, 'EXPORT_TTL_SECONDS', 24 * 60 * 60)
+EXPORT_WORKERS = getattr(settings, 'EXPORT_WORKERS', 2)
+ACTIVE_STATUSES = (ExportJobStatus.PENDING, ExportJobStatus.RUNNING)
+
+
+class ExportFormat:
+    """How one export format is written and served."""
+
+    def __init__(self, extension, content_type, write):
+        self.extension = extension
+        self.content_type = content_type
+        self.write = write # (model, path, queryset, progress) -> row count
+
+
+EXPORT_FORMATS = {
+    'xlsx': ExportFormat(
+        'xlsx', XLSX_CONTENT_TYPE,
+        lambda model, path, queryset, progress: write_model_workbook(model, path, queryset=queryset, progress=progress),
+    ),
+    'csv': ExportFormat('csv', CSV_CONTENT_TYPE, write_text_export(iter_csv)),
+    'ndjson': ExportFormat('ndjson', NDJSON_CONTENT_TYPE, write_text_export(iter_ndjson)),
+}
+if parquet_available():
+    EXPORT_FORMATS['parquet'] = ExportFormat('parquet', PARQUET_CONTENT_TYPE, write_parquet)
+
+
+def _dedup_key(model_name, export_format, params, user_id=None):
+    payload = json.dumps([model_name, export_format, params, user_id], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def export_queryset(model, params):
+    """The rows a job exports: the model's rows, limited to the date range in `params`."""
+    date_from, date_to = parse_date_range(params)
+    return model.objects.filter(date_range_filter(model, date_from, date_to))
+
+
+def create_export_job(model_name, export_format='xlsx', params=None, user=None):
+    """
+    Returns (job, created). A pending or running job for the same request is reused.
+    New jobs are handed to the worker pool once the surrounding transaction commits.
+    """
+    params = {key: value for key, value in (params or {}).items() if value}
+    parse_date_range(params) # Raises ValueError on a bad date before anything is queued
+    if user is not None and not user.is_authenticated:
+        user = None
+    key = _dedup_key(model_name, export_format, params, user.pk if user else None)
+    cleanup_export_jobs()
+    existing = ExportJob.objects.filter(dedup_key=key, status__in=ACTIVE_STATUSES).first()
+    if existing:
+        return existing, False
+    try:
+        with transaction.atomic():
+            job = ExportJob.objects.create(
+                model_name=model_name, format=export_format, params=params, dedup_key=key,
+                created_by=user,
+            )
+    except IntegrityError:
+        # A concurrent identical request won the race
+        return ExportJob.objects.get(dedup_key=key, status__in=ACTIVE_STATUSES), False
+    transaction.on_commit(lambda: submit_export_job(job.pk))
+    return job, True
+
+
+# --- Worker pool ---
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from .export_worker import init_worker
+            _pool = ProcessPoolExecutor(
+                max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+            )
+        return _pool
+
+
+def _report_failure(job_id, future, submitter):
+    error = future.exception()
+    if error is None:
+        return
+    # The worker marks the job failed itself; this covers the pool dying underneath it
+    logger.error("Export job %s failed in the worker pool", job_id, exc_info=error)
+    try:
+        ExportJob.objects.filter(pk=job_id, status__in=ACTIVE_STATUSES).update(
+            status=ExportJobStatus.FAILED, error=str(error), finished_at=timezone.now(),
+        )
+    finally:
+        # On the pool's callback thread no request cycle ever closes the connection. (A future
+        # that is already done runs the callback straight away, on the submitting thread.)
+        if threading.get_ident() != submitter:
+            connections.close_all()
+
+
+def submit_export_job(job_id):
+    global _pool
+    from .export_worker import run_job
+    try:
+        future = _get_pool().submit(run_job, job_id)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory) and took the pool with it: start a new one
+        with _pool_lock:
+            _pool = None
+        future = _get_pool().submit(run_job, job_id)
+    submitter = threading.get_ident()
+    future.add_done_callback(lambda f: _report_failure(job_id, f, submitter))
+
+
+# --- Running a job (in a worker process, or in `manage.py export_jobs --run-pending`) ---
+
+def _spool_path(job):
+    fmt = EXPORT_FORMATS[job.format]
+    return os.path.join(EXPORT_SPOOL_DIR, f"export-{job.pk}-{job.model_name}.{fmt.extension}")
+
+
+def run_export_job(job_id):
+    """Writes the job's file into the spool directory, recording progress as it goes."""
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJobStatus.PENDING).update(
+        status=ExportJobStatus.RUNNING, started_at=timezone.now(),
+    )
+    if not claimed:
+        return # Already picked up (or cancelled) elsewhere
+    job = ExportJob.objects.get(pk=job_id)
+    jobs = ExportJob.objects.filter(pk=job_id)
+    path = _spool_path(job)
+    partial_path = path + '.part'
+    try:
+        from .views import MODEL_MAP # core.views imports this module
+        model = MODEL_MAP[job.model_name]
+        os.makedirs(EXPORT_SPOOL_DIR, exist_ok=True)
+        with replica_reads():
+            queryset = export_queryset(model, job.params)
+            jobs.update(rows_total=queryset.count())
+            row_count = EXPORT_FORMATS[job.format].write(
+                model, partial_path, queryset, lambda done: jobs.update(rows_processed=done),
+            )
+        os.replace(partial_path, path) # Only complete files ever carry the final name
+        finished = timezone.now()
+        jobs.update(
+            status=ExportJobStatus.DONE, rows_processed=row_count, file_path=path,
+            file_size=os.path.getsize(path), finished_at=finished,
+            expires_at=finished + timedelta(seconds=EXPORT_TTL_SECONDS),
+        )
+    except Exception as e:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        jobs.update(status=ExportJobStatus.FAILED, error=str(e), finished_at=timezone.now())
+        raise
+
+
+def run_pending_export_jobs():
+    """Runs every pending job in this process, oldest first. Returns how many ran."""
+    count = 0
+    for job_id in ExportJob.objects.filter(status=ExportJobStatus.PENDING).order_by('created_at').values_list('pk', flat=True):
+        try:
+            run_export_job(job_id)
+        except Exception:
+            pass # Recorded on the job
+        count += 1
+    return count
+
+
+# --- Progress and cleanup ---
+
+def job_progress(job):
+    """Status fields for the polling endpoint, including an ETA while the job runs."""
+    percent = eta = None
+    if job.rows_total:
+        percent = round(min(job.rows_processed / job.rows_total, 1) * 100, 1)
+    if job.status == ExportJobStatus.RUNNING and job.started_at and job.rows_processed and job.rows_total:
+        elapsed = (timezone.now() - job.started_at).total_seconds()
+        eta = round(elapsed / job.rows_processed * max(job.rows_total - job.rows_processed, 0), 1)
+    elif job.status == ExportJobStatus.DONE:
+        percent, eta = 100.0, 0
+    return {
+        'id': job.pk,
+        'model_name': job.model_name,
+        'format': job.format,
+        'params': job.params,
+        'state': job.status,
+        'rows_processed': job.rows_processed,
+        'rows_total': job.rows_total,
+        'percent': percent,
+        'eta_seconds': eta,
+        'file_size': job.file_size,
+        'error': job.error or None,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+        'expires_at': job.expires_at,
+    }
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def cleanup_export_jobs(now=None):
+    """
+    Deletes the files of expired jobs (marking them Expired) and any spool file no job
+    points to that is older than the TTL. Returns the number of files removed.
+    """
+    now = now or timezone.now()
+    removed = 0
+    for job in ExportJob.objects.filter(status=ExportJobStatus.DONE, expires_at__lt=now):
+        if job.file_path and os.path.exists(job.file_path):
+            _remove(job.file_path)
+            removed += 1
+        ExportJob.objects.filter(pk=job.pk).update(status=ExportJobStatus.EXPIRED, file_path='')
+    if os.path.isdir(EXPORT_SPOOL_DIR):
+        live = set(ExportJob.objects.exclude(file_path='').values_list('file_path', flat=True))
+        cutoff = time.time() - EXPORT_TTL_SECONDS
+        for entry in os.scandir(EXPORT_SPOOL_DIR):
+            # Old enough that no running job can still be writing it
+            if entry.is_file() and entry.path not in live and entry.stat().st_mtime < cutoff:
+                _remove(entry.path)
+                removed += 1
+    return removed
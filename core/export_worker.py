@@ -0,0 +1,44 @@
+# core/export_worker.py
+"""
+Entry points of the export worker processes (core/export_jobs.py, core/export_all.py).
+
+Spawned workers start from a fresh interpreter and import this module to find these
+functions, so it must not import models at the top: Django is only set up by
+init_worker().
+"""
+import os
+
+_in_worker = False
+
+
+def init_worker():
+    """Sets up Django once per worker process, with the settings the web process uses."""
+    global _in_worker
+    _in_worker = True
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'procurement_analytics.settings')
+    import django
+    django.setup()
+
+
+def in_worker():
+    """True in an export worker process: work there runs in-process rather than in a pool of its own."""
+    return _in_worker
+
+
+def run_job(job_id):
+    from django.db import close_old_connections
+    from .export_jobs import run_export_job
+    try:
+        run_export_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def write_part(args):
+    """One model's part of a whole-dataset export (core/export_all.py)."""
+    from django.db import close_old_connections
+    from .export_all import write_model_part
+    try:
+        return write_model_part(*args)
+    finally:
+        close_old_connections()
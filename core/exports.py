@@ -0,0 +1,234 @@
+# core/exports.py
+"""
+Export helpers shared by the export views.
+
+Rows are read with values_list() from a chunked iterator, with the display name of
+every foreign key joined in by the same query, so an export costs a fixed number of
+queries no matter how many rows or FKs the model has. Workbooks are written with
+openpyxl's write-only mode to a temporary file and streamed back to the client.
+"""
+import os
+import tempfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.utils import get_column_letter
+
+from django.db.models import (
+    Max, BooleanField, CharField, TextField, DateField, DateTimeField, DecimalField,
+    ForeignKey, OneToOneField, EmailField,
+)
+from django.db.models.fields.related import ManyToManyField
+from django.db.models.functions import Length
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Supplier, Category, PurchaseOrder, Invoice
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BLOCK_SIZE = 64 * 1024
+MIN_COLUMN_WIDTH = 10
+MAX_COLUMN_WIDTH = 75
+
+# Field used as the display value of a foreign key (matches each model's __str__)
+EXPORT_LABEL_FIELDS = {
+    Supplier: 'name',
+    Category: 'name',
+    PurchaseOrder: 'po_number',
+    Invoice: 'invoice_number',
+}
+
+
+class ExportColumn:
+    """One exported column: the model field, its header and the values_list() path to read."""
+
+    def __init__(self, field):
+        self.field = field
+        self.header = field.verbose_name.replace('_', ' ').title()
+        self.is_relation = isinstance(field, (ForeignKey, OneToOneField))
+        if self.is_relation:
+            label = EXPORT_LABEL_FIELDS.get(field.related_model)
+            self.path = f'{field.name}__{label}' if label else field.attname
+        else:
+            self.path = field.attname
+
+    def convert(self, value):
+        if self.is_relation:
+            return str(value) if value else 'N/A'
+        if isinstance(value, bool):
+            return "Yes" if value else "No"
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            # Spreadsheets have no time zones: write the local wall-clock time
+            return timezone.localtime(value).replace(tzinfo=None)
+        return value
+
+
+@lru_cache(maxsize=None)
+def get_export_columns(model):
+    """
+    Concrete, non-auto-created fields of the model, in definition order. Built once per model.
+    auto_now fields are left out: they are change markers for core/columnar.py, not data.
+    """
+    return tuple(
+        ExportColumn(field) for field in model._meta.get_fields(include_hidden=False)
+        if field.concrete and not field.auto_created and not isinstance(field, ManyToManyField)
+        and not getattr(field, 'auto_now', False)
+    )
+
+
+def export_dependencies(model):
+    """The model plus the models its export joins in for FK labels."""
+    return (model, *{column.field.related_model for column in get_export_columns(model) if column.is_relation})
+
+
+def iter_export_rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields converted rows, reading the queryset in chunks with FK names joined in."""
+    rows = queryset.order_by('pk').values_list(*[column.path for column in columns])
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield [column.convert(value) for column, value in zip(columns, row)]
+
+
+def _is_text_column(column):
+    if column.is_relation:
+        return EXPORT_LABEL_FIELDS.get(column.field.related_model) is not None
+    return isinstance(column.field, (CharField, TextField, EmailField))
+
+
+def compute_column_widths(queryset, columns):
+    """
+    Sizes every column in a single aggregate query: MAX(LENGTH(...)) for text columns
+    and a width derived from the field definition for everything else.
+    Write-only worksheets need their widths before the first row is written.
+    """
+    text_columns = [column for column in columns if _is_text_column(column)]
+    lengths = {}
+    if text_columns:
+        lengths = queryset.aggregate(**{
+            f'w{index}': Max(Length(column.path)) for index, column in enumerate(text_columns)
+        })
+    widths = []
+    text_index = 0
+    for column in columns:
+        field = column.field
+        if column in text_columns:
+            content_length = lengths.get(f'w{text_index}') or 0
+            text_index += 1
+        elif column.is_relation:
+            content_length = 10 # Falls back to the id
+        elif isinstance(field, DateTimeField):
+            content_length = 19
+        elif isinstance(field, DateField):
+            content_length = 10
+        elif isinstance(field, DecimalField):
+            content_length = field.max_digits + 1
+        elif isinstance(field, BooleanField):
+            content_length = 3
+        else:
+            content_length = 12
+        width = max(content_length, len(column.header)) + 2
+        widths.append(min(max(width, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH))
+    return widths
+
+
+def _header_cells(worksheet, headers):
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+    border_thin = Side(style='thin', color="000000")
+    header_border = Border(left=border_thin, right=border_thin, top=border_thin, bottom=border_thin)
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.border = header_border
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        cells.append(cell)
+    return cells
+
+
+def sheet_title(model):
+    return (model.__name__ + " Data")[:31]
+
+
+def register_sheet_styles(worksheet):
+    """
+    Registers the header style and the date formats with the workbook, in a fixed order,
+    before anything is written. Every workbook written here then has the same style
+    table, so sheets from separately written workbooks can be combined (core/export_all.py).
+    """
+    for cell in _header_cells(worksheet, ['']):
+        cell.style_id
+    for value in (date(2000, 1, 1), datetime(2000, 1, 1), time(0)):
+        WriteOnlyCell(worksheet, value=value).style_id
+
+
+def add_model_sheet(workbook, model, queryset=None, progress=None):
+    """
+    Appends a sheet for `model` to a write-only workbook and streams its rows into it.
+    `progress`, if given, is called with the running row count after every chunk.
+    Returns the number of rows written.
+    """
+    queryset = model.objects.all() if queryset is None else queryset
+    columns = get_export_columns(model)
+    worksheet = workbook.create_sheet(title=sheet_title(model))
+    register_sheet_styles(worksheet)
+    for index, width in enumerate(compute_column_widths(queryset, columns), 1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+    worksheet.append(_header_cells(worksheet, [column.header for column in columns]))
+
+    row_count = 0
+    for row in iter_export_rows(queryset, columns):
+        worksheet.append(row)
+        row_count += 1
+        if progress and row_count % EXPORT_CHUNK_SIZE == 0:
+            progress(row_count)
+    if progress:
+        progress(row_count)
+    return row_count
+
+
+def write_model_workbook(model, path, queryset=None, progress=None):
+    """Writes a single-sheet workbook for `model` to `path`. Returns the row count."""
+    workbook = openpyxl.Workbook(write_only=True)
+    row_count = add_model_sheet(workbook, model, queryset=queryset, progress=progress)
+    workbook.save(path)
+    return row_count
+
+
+def _iter_file_and_remove(path):
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.remove(path)
+
+
+def stream_temporary_file(path, filename, content_type):
+    """Streams a finished temporary file to the client and deletes it afterwards."""
+    response = StreamingHttpResponse(_iter_file_and_remove(path), content_type=content_type)
+    response['Content-Length'] = os.path.getsize(path)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def excel_export_response(model, queryset=None):
+    """Builds the workbook for `model` in a temporary file and returns a streaming response."""
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_model_workbook(model, path, queryset=queryset)
+    except Exception:
+        os.remove(path)
+        raise
+    return stream_temporary_file(path, f"{model.__name__.lower()}_data.xlsx", XLSX_CONTENT_TYPE)
@@ -0,0 +1,186 @@
+# core/flat_exports.py
+"""
+Flat-file exports (CSV, newline-delimited JSON, Parquet) for BI jobs that don't need Excel.
+
+They use the same columns and foreign key labels as the Excel export (core/exports.py)
+and read the rows the same way, in chunks from a values_list() iterator, but skip
+openpyxl entirely:
+  - CSV and NDJSON are produced as a generator of text blocks, one per chunk, so a
+    response can stream them while memory stays at one chunk;
+  - Parquet is written one row group per chunk with pyarrow into a file (the format's
+    footer comes last), then streamed. pyarrow is optional: without it Parquet is
+    simply not offered (parquet_available()).
+Values keep their types where the format has them: decimals stay exact (strings in
+CSV/JSON, decimal128 in Parquet), dates are ISO dates, NULLs are empty / null.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import (
+    BigIntegerField, BooleanField, DateField, DateTimeField, DecimalField, FloatField, IntegerField,
+)
+from django.http import StreamingHttpResponse
+
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_LABEL_FIELDS, get_export_columns, stream_temporary_file
+from .routers import pinned_to_primary, replica_for_read, replica_reads
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency
+    pa = pq = None
+
+PARQUET_ROW_GROUP_SIZE = 50000
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+
+
+def parquet_available():
+    return pa is not None
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return _json_value(value)
+
+
+def iter_export_chunks(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields lists of raw values_list() rows (FK labels joined in), `chunk_size` at a time."""
+    rows = queryset.order_by('pk').values_list(*[column.path for column in columns])
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(model, queryset, progress=None):
+    """CSV text of the export, one block per chunk, header first."""
+    columns = get_export_columns(model)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.header for column in columns])
+    row_count = 0
+    for chunk in iter_export_chunks(queryset, columns):
+        writer.writerows([[_csv_value(value) for value in row] for row in chunk])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        row_count += len(chunk)
+        if progress:
+            progress(row_count)
+    yield buffer.getvalue() # The header, when there were no rows
+
+
+def iter_ndjson(model, queryset, progress=None):
+    """One JSON object per line, keyed by field name, one block per chunk."""
+    columns = get_export_columns(model)
+    names = [column.field.name for column in columns]
+    row_count = 0
+    for chunk in iter_export_chunks(queryset, columns):
+        yield ''.join(
+            json.dumps(dict(zip(names, [_json_value(value) for value in row])), separators=(',', ':')) + '\n'
+            for row in chunk
+        )
+        row_count += len(chunk)
+        if progress:
+            progress(row_count)
+
+
+def _arrow_type(column):
+    field = column.field
+    if column.is_relation:
+        # The joined label, or the raw id when the target has no label field
+        return pa.string() if EXPORT_LABEL_FIELDS.get(field.related_model) else pa.int64()
+    if isinstance(field, DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, DateField):
+        return pa.date32()
+    if isinstance(field, BooleanField):
+        return pa.bool_()
+    if isinstance(field, (IntegerField, BigIntegerField)):
+        return pa.int64()
+    if isinstance(field, FloatField):
+        return pa.float64()
+    return pa.string()
+
+
+def write_parquet(model, path, queryset, progress=None):
+    """Writes the export to `path` as Parquet, one row group per PARQUET_ROW_GROUP_SIZE rows. Returns the row count."""
+    columns = get_export_columns(model)
+    schema = pa.schema([pa.field(column.field.name, _arrow_type(column)) for column in columns])
+    row_count = 0
+    with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+        for chunk in iter_export_chunks(queryset, columns, chunk_size=PARQUET_ROW_GROUP_SIZE):
+            arrays = [pa.array(values, type=schema.field(index).type) for index, values in enumerate(zip(*chunk))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            row_count += len(chunk)
+            if progress:
+                progress(row_count)
+    return row_count
+
+
+def write_text_export(iter_blocks):
+    """File writer (model, path, queryset, progress) -> row count for a text block generator."""
+    def write(model, path, queryset, progress=None):
+        counted = [0]
+
+        def track(row_count):
+            counted[0] = row_count
+            if progress:
+                progress(row_count)
+
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for block in iter_blocks(model, queryset, track):
+                f.write(block)
+        return counted[0]
+    return write
+
+
+def streaming_text_response(iter_blocks, model, queryset, filename, content_type):
+    """Streams a CSV/NDJSON export straight from the chunked query, reading from a replica when configured."""
+    # The view's routing has ended by the time the response is consumed: carry its choice over
+    routing = replica_reads if replica_for_read() else pinned_to_primary
+
+    def blocks():
+        with routing():
+            yield from iter_blocks(model, queryset)
+
+    response = StreamingHttpResponse(blocks(), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def parquet_export_response(model, queryset, filename):
+    """Writes the Parquet file to a temporary file and streams it back."""
+    fd, path = tempfile.mkstemp(suffix='.parquet')
+    os.close(fd)
+    try:
+        write_parquet(model, path, queryset)
+    except Exception:
+        os.remove(path)
+        raise
+    return stream_temporary_file(path, filename, PARQUET_CONTENT_TYPE)
+
@@ -1,33 +1,49 @@
+"""
+Synthetic procurement data generator for the brake manufacturing sample data.
+
+Writes the nine CSV files load_brake_data reads, straight to disk in batches, so it
+can produce tens of millions of rows per table with flat memory use. The same seed
+and counts always produce the same files.
+
+    python core/generate_data.py --out /tmp/sample                 # about the size of core/data
+    python core/generate_data.py --out /tmp/bench --seed 7 \\
+        --suppliers 5000 --purchase-orders 2000000 --spend-entries 10000000
+
+The default counts give a data set about the size of the sample in core/data, not those
+files: the sample was made by an earlier generator and is kept as-is for load_brake_data
+and the tests. --out is required so that replacing it is always a deliberate choice.
+
+Invoices are derived from purchase orders (one per issued or delivered PO), so their
+count follows --purchase-orders.
+"""
+import argparse
 import csv
-import io
+import os
 import random
+import sys
+import time
+from array import array
 from datetime import date, timedelta
 
-# --- Configuration Parameters ---
-NUM_SUPPLIERS = 20
-NUM_CATEGORIES = 20
-NUM_POS_PER_YEAR = 50 # Generates approximately 250 POs over 5 years
-NUM_SPEND_ENTRIES_PER_YEAR = 80 # Generates approximately 400 spend entries over 5 years
-NUM_PRODUCTS_PRICED = 100 # Total unique product pricing entries
-NUM_CONTRACTS = 20 # Total contracts generated
-NUM_DISCOUNTS = 30 # Total discounts generated
-NUM_ALTERNATE_SUPPLIERS_ENTRIES = 20 # Total alternate supplier pairings
+# --- Configuration Parameters (defaults: about the size of the core/data sample) ---
+DEFAULT_COUNTS = {
+    'suppliers': 20,
+    'categories': 20,
+    'purchase_orders': 250, # Approximately 50 per year over 5 years
+    'spend_entries': 400, # Approximately 80 per year over 5 years
+    'pricing': 100, # Total unique product pricing entries
+    'contracts': 20, # Total contracts generated
+    'discounts': 30, # Total discounts generated
+    'alternates': 20, # Total alternate supplier pairings
+}
+DEFAULT_SEED = 42
 
 START_DATE = date(2020, 7, 1) # Data starts from July 1, 2020
 END_DATE = date(2025, 6, 24) # Data ends on current date
+TOTAL_DAYS = (END_DATE - START_DATE).days
 
-# --- Helper Functions ---
-def random_date(start, end):
-    """Generates a random date between start and end dates."""
-    return start + timedelta(days=random.randint(0, (end - start).days))
-
-def generate_csv_string(header, data):
-    """Converts a list of lists into a CSV string."""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(header)
-    writer.writerows(data)
-    return output.getvalue()
+BATCH_SIZE = 10000 # Rows generated and written per batch
+DISCOUNT_RESERVOIR_SIZE = 100000 # (supplier, product) pairs kept for discounts
 
 # --- Core Data Definitions (Expanded for Realism) ---
 
@@ -49,29 +65,6 @@ supplier_domains = [
     "brakelinings.com", "autosprings.com"
 ]
 
-# Supplier Data Generation
-suppliers_data = []
-for i in range(1, NUM_SUPPLIERS + 1):
-    name = supplier_names[i-1] if i-1 < len(supplier_names) else f"Supplier {i}"
-    domain = supplier_domains[i-1] if i-1 < len(supplier_domains) else f"supplier{i}.com"
-    email = f"contact@{domain}"
-    phone = f"98{random.randint(10000000, 99999999)}"
-    address = f"{random.randint(100, 999)} Industrial Rd, {random.choice(['Pune', 'Chennai', 'Gurgaon', 'Bangalore'])}"
-    gstin = f"27ABCDE{random.randint(1000, 9999)}F{random.randint(1,9)}Z{random.randint(0,9)}"
-    pan = f"ABCDE{random.randint(1000, 9999)}{chr(random.randint(65,90))}"
-    score = round(random.uniform(7.0, 9.5), 1)
-    type_ = random.choice(["Direct", "Indirect"])
-    # Simulate some suppliers becoming inactive over time
-    is_active = random.choices([True, False], weights=[0.9, 0.1], k=1)[0] if i > NUM_SUPPLIERS * 0.7 else True
-    share_of_business = round(random.uniform(0.01, 0.30), 2) if is_active else 0.00
-    lead_time_days = random.randint(5, 45)
-    base_currency = random.choice(["INR", "INR", "INR", "USD", "EUR"]) # More INR
-    unit_of_measure = random.choice(["KG", "PCS", "LITRE", "METER", "SERVICE", "UNIT"])
-    suppliers_data.append([
-        i, name, email, phone, address, gstin, pan, score, type_, is_active,
-        share_of_business, lead_time_days, base_currency, unit_of_measure
-    ])
-
 # Category Data (Hierarchical structure)
 categories_data = [
     [1, "Raw Materials", None], [2, "Components", None], [3, "Services", None], [4, "Manufacturing Equipment", None],
@@ -115,315 +108,388 @@ category_supplier_type_map = {
     15: ["Indirect", "Direct"], 16: ["Indirect"], 17: ["Indirect"], 18: ["Indirect"], 19: ["Indirect"], 20: ["Indirect", "Direct"] # Services
 }
 
-# Get active supplier IDs for linking
-active_supplier_ids = [s[0] for s in suppliers_data if s[9] == True]
-direct_supplier_ids = [s[0] for s in suppliers_data if s[8] == "Direct" and s[9] == True]
-indirect_supplier_ids = [s[0] for s in suppliers_data if s[8] == "Indirect" and s[9] == True]
 
+# Spend descriptions for categories that have a specific one
+spend_description_lookup = {
+    15: "CNC machining charges", 16: "Freight and logistics costs", 17: "Software license fees",
+    18: "Factory maintenance services", 19: "Monthly electricity bill", 20: "Product quality testing",
+    # General descriptions for parent categories if a specific child isn't picked
+    3: "General services expenditure", 4: "Minor equipment purchase",
+}
 
-# --- 1. Supplier Table ---
-supplier_header = [
-    "id", "name", "contact_email", "phone", "address", "gstin", "pan", "score", "type",
-    "is_active", "share_of_business", "lead_time_days", "base_currency", "unit_of_measure"
-]
-supplier_csv = generate_csv_string(supplier_header, suppliers_data)
-print("#### `supplier.csv`\n```csv\n" + supplier_csv + "```\n")
-
-
-# --- 2. Category Table ---
-category_header = ["id", "name", "parent"]
-category_csv = generate_csv_string(category_header, categories_data)
-print("#### `category.csv`\n```csv\n" + category_csv + "```\n")
-
-
-# --- 3. PurchaseOrder Table ---
-po_data = []
-po_id = 1
-for current_year in range(START_DATE.year, END_DATE.year + 1):
-    year_start = date(current_year, 1, 1)
-    year_end = date(current_year, 12, 31)
-    # Adjust start/end dates for the first/last partial years
-    if current_year == START_DATE.year:
-        year_start = START_DATE
-    if current_year == END_DATE.year:
-        year_end = END_DATE
-
-    for _ in range(NUM_POS_PER_YEAR):
-        issue_d = random_date(year_start, year_end)
-        
-        # Select supplier, prioritizing direct for POs
-        supplier_id_for_po = random.choice(direct_supplier_ids + random.choices(indirect_supplier_ids, k=2)) # Mix in some indirect for services/equipment POs
-        
-        # Find relevant categories for the selected supplier type
-        supplier_type = next((s[8] for s in suppliers_data if s[0] == supplier_id_for_po), None)
-        valid_categories_for_po = [
-            c[0] for c in categories_data
-            if c[2] is not None and supplier_type in category_supplier_type_map.get(c[0], [])
-        ]
-        category_id = random.choice(valid_categories_for_po) if valid_categories_for_po else random.choice([c[0] for c in categories_data if c[2] is not None])
-
-        amount = round(random.uniform(5000.00, 750000.00), 2) # Wider range for manufacturing POs
-        status_options = ["Issued"] * 3 + ["Delivered"] * 5 + ["Cancelled"] * 1 # More likely to be delivered
-        status = random.choice(status_options)
-        
-        # For older POs, status is more likely to be Delivered or Cancelled
-        if issue_d < END_DATE - timedelta(days=90 * 2): # If PO is old
-            status = random.choices(["Delivered", "Cancelled"], weights=[0.9, 0.1], k=1)[0]
-        
-        # If PO date is in the future relative to current generation date, mark as Issued
-        if issue_d > END_DATE:
-            status = "Issued"
-
-        po_data.append([
-            po_id, f"PO-{issue_d.year}-{po_id:05d}", supplier_id_for_po, category_id, amount, issue_d, status
-        ])
-        po_id += 1
-
-po_header = ["id", "po_number", "supplier", "category", "amount", "issue_date", "status"]
-po_csv = generate_csv_string(po_header, po_data)
-print("#### `purchaseorder.csv`\n```csv\n" + po_csv + "```\n")
-
-
-# --- 4. Invoice Table ---
-invoice_data = []
-invoice_id = 1
-for po in po_data:
-    po_status = po[6]
-    po_issue_date = po[5]
-    po_amount = po[4]
-    po_supplier_id = po[2]
-
-    # Don't generate invoices for POs too far in the future
-    if po_issue_date > END_DATE + timedelta(days=30):
-        continue
-
-    # Only generate invoices for Issued or Delivered POs
-    if po_status in ["Issued", "Delivered"]:
-        invoice_date = po_issue_date + timedelta(days=random.randint(5, 45))
-        # Ensure invoice date isn't in the far future
-        if invoice_date > END_DATE + timedelta(days=30):
-            invoice_date = random_date(po_issue_date, END_DATE) # Cap at current data end
-            if invoice_date < po_issue_date: # Ensure invoice date is after PO
-                 invoice_date = po_issue_date + timedelta(days=1)
-
-
-        due_date = invoice_date + timedelta(days=random.choice([30, 45, 60]))
-        paid_date = '' # Placeholder for NULL
-        invoice_status = "Pending"
-
-        # Simulate payment based on age and PO status
-        if po_status == "Delivered":
-            if random.random() < 0.90: # 90% chance of being paid if delivered
-                payment_days = random.randint(1, (due_date - invoice_date).days + 15) # Allow some overdue
-                temp_paid_date = invoice_date + timedelta(days=payment_days)
-
-                if temp_paid_date <= END_DATE: # Only record paid date if it's within the data range
-                    paid_date = temp_paid_date
-                    if temp_paid_date > due_date:
-                        invoice_status = "Overdue"
-                    else:
-                        invoice_status = "Paid"
-                else:
-                    # If it would be paid in the future, it's still pending/overdue
-                    if END_DATE > due_date:
-                        invoice_status = "Overdue"
-                    else:
-                        invoice_status = "Pending"
-            else:
-                 # Even if delivered, a small chance of remaining pending/overdue
-                 if END_DATE > due_date:
-                    invoice_status = "Overdue"
-                 else:
-                    invoice_status = "Pending"
-        else: # If PO is just 'Issued' and not yet delivered
-             if END_DATE > due_date:
-                invoice_status = "Overdue"
-             else:
-                invoice_status = "Pending"
-
-        invoice_data.append([
-            invoice_id,
-            f"INV-{invoice_date.year}-{invoice_id:06d}",
-            po_supplier_id,
-            po[0], # purchase_order ID
-            invoice_date,
-            due_date,
-            paid_date if paid_date else '', # Empty string for NULL
-            po_amount, # Amount usually matches PO
-            invoice_status
-        ])
-        invoice_id += 1
-
-invoice_header = [
-    "id", "invoice_number", "supplier", "purchase_order", "invoice_date",
-    "due_date", "paid_date", "amount", "status"
+# Cost centers with the same odds as picking a department, then a number within it
+cost_centers = ["PROD001", "PROD002", "PROD003", "RND001", "ADM001", "ADM002", "IT001", "IT002", "LOG001", "SALES001"]
+cost_center_weights = [1 / 18, 1 / 18, 1 / 18, 1 / 6, 1 / 12, 1 / 12, 1 / 12, 1 / 12, 1 / 6, 1 / 6]
+
+cities = ['Pune', 'Chennai', 'Gurgaon', 'Bangalore']
+currencies = ["INR", "INR", "INR", "USD", "EUR"] # More INR
+units_of_measure = ["KG", "PCS", "LITRE", "METER", "SERVICE", "UNIT"]
+contract_names = [
+    "Annual Supply Agreement for Raw Materials", "Framework Agreement for IT Services", "Master Purchase Agreement (Components)",
+    "Volume Discount Contract for Elastomers", "Maintenance & Support Contract (Machinery)", "Component Sourcing Contract (Tier 1)",
+    "Logistics Services Master Agreement", "Chemical Supply & Disposal Agreement"
 ]
-invoice_csv = generate_csv_string(invoice_header, invoice_data)
-print("#### `invoice.csv`\n```csv\n" + invoice_csv + "```\n")
-
-
-# --- 5. SpendEntry Table ---
-spend_data = []
-spend_id = 1
-for current_year in range(START_DATE.year, END_DATE.year + 1):
-    year_start = date(current_year, 1, 1)
-    year_end = date(current_year, 12, 31)
-    if current_year == START_DATE.year:
-        year_start = START_DATE
-    if current_year == END_DATE.year:
-        year_end = END_DATE
-
-    for _ in range(NUM_SPEND_ENTRIES_PER_YEAR):
-        spend_date = random_date(year_start, year_end)
-        
-        # Select supplier, prioritizing indirect for general spend entries
-        supplier_id_for_spend = random.choice(indirect_supplier_ids * 3 + direct_supplier_ids * 1) # More indirect
-        
-        # Find relevant categories for the selected supplier type
-        supplier_type = next((s[8] for s in suppliers_data if s[0] == supplier_id_for_spend), None)
-        valid_categories_for_spend = [
-            c[0] for c in categories_data
-            if c[2] is not None and supplier_type in category_supplier_type_map.get(c[0], [])
-        ]
-        category_id = random.choice(valid_categories_for_spend) if valid_categories_for_spend else random.choice([c[0] for c in categories_data if c[2] is not None])
-        
-        amount = round(random.uniform(100.00, 75000.00), 2) # Wider range for spend
-        cost_center = random.choice([f"PROD{random.randint(1,3):03d}", f"RND{random.randint(1,1):03d}", f"ADM{random.randint(1,2):03d}", f"IT{random.randint(1,2):03d}", f"LOG{random.randint(1,1):03d}", f"SALES{random.randint(1,1):03d}"])
-        
-        # Make description more specific based on category
-        desc_lookup = {
-            15: "CNC machining charges", 16: "Freight and logistics costs", 17: "Software license fees",
-            18: "Factory maintenance services", 19: "Monthly electricity bill", 20: "Product quality testing",
-            # General descriptions for parent categories if a specific child isn't picked
-            3: "General services expenditure", 4: "Minor equipment purchase",
-            # Catch-all
-            None: "Miscellaneous operational expense"
+payment_terms = ['Net 30', 'Net 45', 'Net 60']
+
+HEADERS = {
+    'supplier.csv': [
+        "id", "name", "contact_email", "phone", "address", "gstin", "pan", "score", "type",
+        "is_active", "share_of_business", "lead_time_days", "base_currency", "unit_of_measure"
+    ],
+    'category.csv': ["id", "name", "parent"],
+    'purchaseorder.csv': ["id", "po_number", "supplier", "category", "amount", "issue_date", "status"],
+    'invoice.csv': [
+        "id", "invoice_number", "supplier", "purchase_order", "invoice_date",
+        "due_date", "paid_date", "amount", "status"
+    ],
+    'spendentry.csv': ["id", "category", "supplier", "date", "amount", "cost_center", "description"],
+    'supplierproductpricing.csv': ["id", "supplier", "product_name", "price", "currency", "unit_of_measure"],
+    'suppliercontract.csv': ["id", "supplier", "contract_name", "start_date", "end_date", "terms"],
+    'supplierdiscount.csv': ["id", "supplier", "product_name", "discount_percent", "valid_from", "valid_to"],
+    'alternatesupplier.csv': ["id", "product_name", "primary_supplier", "alternate_supplier", "lead_time_days"],
+}
+
+
+# --- Helper Functions ---
+def infer_unit_of_measure(product_name):
+    """Infers a more appropriate UOM from the product name."""
+    name = product_name.lower()
+    if "steel" in name or "iron" in name or "granules" in name or "material mix" in name:
+        return "KG"
+    elif "fluid" in name or "lubricant" in name or "chemical" in name:
+        return "LITRE"
+    elif "assembly" in name or "kit" in name or "sensor" in name or "unit" in name or "housing" in name:
+        return "PCS"
+    elif "hose" in name or "tubing" in name:
+        return "METER"
+    elif "service" in name:
+        return "SERVICE"
+    return "PCS" # Default (plates and castings are counted in pieces too)
+
+
+product_units = [infer_unit_of_measure(name) for name in product_names_list]
+
+
+def id_batches(count):
+    """Yields ranges of 1-based ids, BATCH_SIZE at a time."""
+    for start in range(1, count + 1, BATCH_SIZE):
+        yield range(start, min(start + BATCH_SIZE, count + 1))
+
+
+class CsvOutput:
+    """A CSV file in the output directory, written batch by batch."""
+
+    def __init__(self, out_dir, filename):
+        self.path = os.path.join(out_dir, filename)
+        self.file = open(self.path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(HEADERS[filename])
+        self.rows = 0
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class SupplierLookup:
+    """Compact per-supplier attributes, indexed by supplier id, used by the other tables."""
+
+    def __init__(self, count):
+        self.is_direct = bytearray(count + 1)
+        self.currency = [None] * (count + 1)
+        self.active_ids = array('I')
+        self.direct_ids = array('I') # Active direct suppliers
+        self.indirect_ids = array('I') # Active indirect suppliers
+
+    def add(self, supplier_id, supplier_type, is_active, currency):
+        self.is_direct[supplier_id] = supplier_type == "Direct"
+        self.currency[supplier_id] = currency
+        if is_active:
+            self.active_ids.append(supplier_id)
+            (self.direct_ids if supplier_type == "Direct" else self.indirect_ids).append(supplier_id)
+
+    def finish(self):
+        # Never leave a pool empty, so tiny data sets still link up
+        if not self.active_ids:
+            self.active_ids = array('I', range(1, len(self.is_direct)))
+        if not self.direct_ids:
+            self.direct_ids = self.active_ids
+        if not self.indirect_ids:
+            self.indirect_ids = self.active_ids
+
+
+class CategoryLookup:
+    """Category rows plus the leaf categories valid for each supplier type."""
+
+    def __init__(self, count):
+        roots = [c for c in categories_data if c[2] is None]
+        self.rows = [list(c) for c in categories_data[:count]]
+        type_map = dict(category_supplier_type_map)
+        # Categories beyond the predefined tree become extra children of the top-level ones
+        for category_id in range(len(self.rows) + 1, count + 1):
+            root = roots[(category_id - 1) % len(roots)]
+            self.rows.append([category_id, f"{root[1]} Subcategory {category_id}", root[0]])
+            type_map[category_id] = category_supplier_type_map[root[0]]
+        self.names = {row[0]: row[1] for row in self.rows}
+        leaves = [row[0] for row in self.rows if row[2] is not None] or [row[0] for row in self.rows]
+        self.leaves_by_type = {
+            supplier_type: [c for c in leaves if supplier_type in type_map.get(c, [])] or leaves
+            for supplier_type in ("Direct", "Indirect")
         }
-        description = desc_lookup.get(category_id, f"Purchase of {categories_data[category_id-1][1].lower()} item/service.")
-
-        spend_data.append([
-            spend_id, category_id, supplier_id_for_spend, spend_date, amount, cost_center, description
-        ])
-        spend_id += 1
-
-spend_header = ["id", "category", "supplier", "date", "amount", "cost_center", "description"]
-spend_csv = generate_csv_string(spend_header, spend_data)
-print("#### `spendentry.csv`\n```csv\n" + spend_csv + "```\n")
-
-
-# --- 6. SupplierProductPricing Table ---
-product_pricing_data = []
-product_pricing_id = 1
-for _ in range(NUM_PRODUCTS_PRICED):
-    supplier_id_for_pricing = random.choice(direct_supplier_ids) # Only direct suppliers for product pricing
-    product_name_choice = random.choice(product_names_list)
-    price = round(random.uniform(10.00, 25000.00), 2) # Wider price range
-    currency = next((s[13] for s in suppliers_data if s[0] == supplier_id_for_pricing), "INR") # Use supplier's base currency
-    
-    # Logic to infer a more appropriate UOM from product name
-    unit_of_measure = "PCS" # Default
-    if "steel" in product_name_choice.lower() or "iron" in product_name_choice.lower() or "granules" in product_name_choice.lower() or "material mix" in product_name_choice.lower():
-        unit_of_measure = "KG"
-    elif "fluid" in product_name_choice.lower() or "lubricant" in product_name_choice.lower() or "chemical" in product_name_choice.lower():
-        unit_of_measure = "LITRE"
-    elif "assembly" in product_name_choice.lower() or "kit" in product_name_choice.lower() or "sensor" in product_name_choice.lower() or "unit" in product_name_choice.lower() or "housing" in product_name_choice.lower():
-        unit_of_measure = "PCS"
-    elif "hose" in product_name_choice.lower() or "tubing" in product_name_choice.lower():
-        unit_of_measure = "METER"
-    elif "service" in product_name_choice.lower():
-        unit_of_measure = "SERVICE"
-    elif "plates" in product_name_choice.lower() or "casting" in product_name_choice.lower():
-        unit_of_measure = "PCS" # Could be KG, but PCS is also common for finished parts
-
-    product_pricing_data.append([
-        product_pricing_id, supplier_id_for_pricing, product_name_choice, price, currency, unit_of_measure
-    ])
-    product_pricing_id += 1
-
-product_pricing_header = ["id", "supplier", "product_name", "price", "currency", "unit_of_measure"]
-product_pricing_csv = generate_csv_string(product_pricing_header, product_pricing_data)
-print("#### `supplierproductpricing.csv`\n```csv\n" + product_pricing_csv + "```\n")
-
-
-# --- 7. SupplierContract Table ---
-contract_data = []
-contract_id = 1
-for _ in range(NUM_CONTRACTS):
-    supplier_id_for_contract = random.choice(active_supplier_ids)
-    start_d = random_date(START_DATE, END_DATE - timedelta(days=90)) # Contracts usually start before end date
-    end_d = start_d + timedelta(days=random.choice([365, 730, 1095, 1460])) # 1, 2, 3, or 4 year contracts
-    
-    # Ensure contract end date doesn't extend too far beyond END_DATE for relevance
-    if end_d > END_DATE + timedelta(days=365):
-        end_d = END_DATE + timedelta(days=random.randint(0, 365)) # Cap contracts to finish within a year of END_DATE
-
-    contract_name = random.choice([
-        "Annual Supply Agreement for Raw Materials", "Framework Agreement for IT Services", "Master Purchase Agreement (Components)",
-        "Volume Discount Contract for Elastomers", "Maintenance & Support Contract (Machinery)", "Component Sourcing Contract (Tier 1)",
-        "Logistics Services Master Agreement", "Chemical Supply & Disposal Agreement"
-    ])
-    terms = f"Standard terms, Payment terms {random.choice(['Net 30', 'Net 45', 'Net 60'])}, annual review clause, auto-renewal option."
-    contract_data.append([
-        contract_id, supplier_id_for_contract, contract_name, start_d, end_d, terms
-    ])
-    contract_id += 1
-
-contract_header = ["id", "supplier", "contract_name", "start_date", "end_date", "terms"]
-contract_csv = generate_csv_string(contract_header, contract_data)
-print("#### `suppliercontract.csv`\n```csv\n" + contract_csv + "```\n")
-
-
-# --- 8. SupplierDiscount Table ---
-discount_data = []
-discount_id = 1
-# Get a list of (supplier_id, product_name) from existing pricing to link discounts
-available_priced_products = [(p[1], p[2]) for p in product_pricing_data]
-
-for _ in range(NUM_DISCOUNTS):
-    if not available_priced_products: continue # Skip if no products exist to discount
-
-    supplier_id_for_discount, product_name_for_discount = random.choice(available_priced_products)
-    discount_percent = round(random.uniform(1.00, 15.00), 2) # Wider discount range
-    valid_from = random_date(START_DATE, END_DATE - timedelta(days=90))
-    valid_to = valid_from + timedelta(days=random.choice([90, 180, 270, 365]))
-
-    # Ensure discount valid_to doesn't extend too far beyond END_DATE
-    if valid_to > END_DATE + timedelta(days=60):
-        valid_to = END_DATE + timedelta(days=random.randint(0, 60))
-
-    discount_data.append([
-        discount_id, supplier_id_for_discount, product_name_for_discount, discount_percent, valid_from, valid_to
-    ])
-    discount_id += 1
-
-discount_header = ["id", "supplier", "product_name", "discount_percent", "valid_from", "valid_to"]
-discount_csv = generate_csv_string(discount_header, discount_data)
-print("#### `supplierdiscount.csv`\n```csv\n" + discount_csv + "```\n")
-
-
-# --- 9. AlternateSupplier Table ---
-alternate_supplier_data = []
-alternate_supplier_id = 1
-# Products that might have alternate suppliers (a subset of all products)
-products_for_alternates = random.sample(product_names_list, min(len(product_names_list), NUM_ALTERNATE_SUPPLIERS_ENTRIES * 3))
-
-for product in products_for_alternates:
-    primary_s_id = random.choice(direct_supplier_ids)
-    
-    # Try to find an alternate that is not the primary and is also direct
-    alt_s_candidates = [s for s in direct_supplier_ids if s != primary_s_id]
-    if not alt_s_candidates: continue # Skip if no distinct alternate available
-
-    alternate_s_id = random.choice(alt_s_candidates)
-    lead_time = random.randint(7, 90) # Wider lead time range for alternate
-
-    alternate_supplier_data.append([
-        alternate_supplier_id, product, primary_s_id, alternate_s_id, lead_time
-    ])
-    alternate_supplier_id += 1
-    if alternate_supplier_id > NUM_ALTERNATE_SUPPLIERS_ENTRIES: # Cap the number of entries
-        break
-
-alternate_supplier_header = ["id", "product_name", "primary_supplier", "alternate_supplier", "lead_time_days"]
-alternate_supplier_csv = generate_csv_string(alternate_supplier_header, alternate_supplier_data)
-print("#### `alternatesupplier.csv`\n```csv\n" + alternate_supplier_csv + "```\n")
\ No newline at end of file
+        self.descriptions = {
+            category_id: spend_description_lookup.get(category_id, f"Purchase of {name.lower()} item/service.")
+            for category_id, name in self.names.items()
+        }
+
+
+# --- Table Generators ---
+def generate_suppliers(rng, count, out):
+    lookup = SupplierLookup(count)
+    for ids in id_batches(count):
+        n = len(ids)
+        types = rng.choices(["Direct", "Indirect"], k=n)
+        base_currencies = rng.choices(currencies, k=n)
+        uoms = rng.choices(units_of_measure, k=n)
+        supplier_cities = rng.choices(cities, k=n)
+        rows = []
+        for i, type_, base_currency, unit_of_measure, city in zip(ids, types, base_currencies, uoms, supplier_cities):
+            name = supplier_names[i-1] if i-1 < len(supplier_names) else f"Supplier {i}"
+            domain = supplier_domains[i-1] if i-1 < len(supplier_domains) else f"supplier{i}.com"
+            # Simulate some suppliers becoming inactive over time
+            is_active = rng.random() < 0.9 if i > count * 0.7 else True
+            rows.append([
+                i, name, f"contact@{domain}", f"98{rng.randint(10000000, 99999999)}",
+                f"{rng.randint(100, 999)} Industrial Rd, {city}",
+                f"27ABCDE{rng.randint(1000, 9999)}F{rng.randint(1,9)}Z{rng.randint(0,9)}",
+                f"ABCDE{rng.randint(1000, 9999)}{chr(rng.randint(65,90))}",
+                round(rng.uniform(7.0, 9.5), 1), type_, is_active,
+                round(rng.uniform(0.01, 0.30), 2) if is_active else 0.00,
+                rng.randint(5, 45), base_currency, unit_of_measure,
+            ])
+            lookup.add(i, type_, is_active, base_currency)
+        out.write(rows)
+    lookup.finish()
+    return lookup
+
+
+def generate_categories(count, out):
+    lookup = CategoryLookup(count)
+    out.write([[c[0], c[1], c[2] if c[2] is not None else ''] for c in lookup.rows])
+    return lookup
+
+
+def _pick_supplier(rng, suppliers, indirect_share):
+    pool = suppliers.indirect_ids if rng.random() < indirect_share else suppliers.direct_ids
+    return pool[rng.randrange(len(pool))]
+
+
+def _invoice_for_po(rng, invoice_id, po_id, supplier_id, issue_d, amount, po_status):
+    """Invoice row for a PO, or None when the PO would not be invoiced."""
+    # Don't generate invoices for POs too far in the future, and only for Issued or Delivered POs
+    if issue_d > END_DATE + timedelta(days=30) or po_status not in ("Issued", "Delivered"):
+        return None
+
+    invoice_date = issue_d + timedelta(days=rng.randint(5, 45))
+    # Ensure invoice date isn't in the far future
+    if invoice_date > END_DATE + timedelta(days=30):
+        invoice_date = issue_d + timedelta(days=rng.randint(0, max((END_DATE - issue_d).days, 1)))
+
+    due_date = invoice_date + timedelta(days=rng.choice([30, 45, 60]))
+    paid_date = ''
+    overdue_or_pending = "Overdue" if END_DATE > due_date else "Pending"
+    invoice_status = overdue_or_pending
+
+    # Simulate payment based on age and PO status
+    if po_status == "Delivered" and rng.random() < 0.90: # 90% chance of being paid if delivered
+        payment_days = rng.randint(1, (due_date - invoice_date).days + 15) # Allow some overdue
+        temp_paid_date = invoice_date + timedelta(days=payment_days)
+        if temp_paid_date <= END_DATE: # Only record paid date if it's within the data range
+            paid_date = temp_paid_date
+            invoice_status = "Overdue" if temp_paid_date > due_date else "Paid"
+
+    return [
+        invoice_id, f"INV-{invoice_date.year}-{invoice_id:06d}", supplier_id, po_id,
+        invoice_date, due_date, paid_date, amount, invoice_status
+    ]
+
+
+def generate_purchase_orders_and_invoices(rng, count, suppliers, categories, po_out, invoice_out):
+    # Same odds as picking from all direct suppliers plus two indirect ones
+    indirect_share = 2 / (len(suppliers.direct_ids) + 2)
+    old_po_cutoff = END_DATE - timedelta(days=90 * 2)
+    invoice_id = 1
+    for ids in id_batches(count):
+        n = len(ids)
+        offsets = [rng.randrange(TOTAL_DAYS + 1) for _ in range(n)]
+        statuses = rng.choices(["Issued", "Delivered", "Cancelled"], weights=[3, 5, 1], k=n) # More likely to be delivered
+        po_rows = []
+        invoice_rows = []
+        for po_id, offset, status in zip(ids, offsets, statuses):
+            issue_d = START_DATE + timedelta(days=offset)
+            supplier_id = _pick_supplier(rng, suppliers, indirect_share)
+            valid_categories = categories.leaves_by_type["Direct" if suppliers.is_direct[supplier_id] else "Indirect"]
+            category_id = valid_categories[rng.randrange(len(valid_categories))]
+            amount = round(rng.uniform(5000.00, 750000.00), 2) # Wider range for manufacturing POs
+            # For older POs, status is more likely to be Delivered or Cancelled
+            if issue_d < old_po_cutoff:
+                status = "Delivered" if rng.random() < 0.9 else "Cancelled"
+            po_rows.append([po_id, f"PO-{issue_d.year}-{po_id:05d}", supplier_id, category_id, amount, issue_d, status])
+
+            invoice = _invoice_for_po(rng, invoice_id, po_id, supplier_id, issue_d, amount, status)
+            if invoice:
+                invoice_rows.append(invoice)
+                invoice_id += 1
+        po_out.write(po_rows)
+        invoice_out.write(invoice_rows)
+
+
+def generate_spend_entries(rng, count, suppliers, categories, out):
+    # Same odds as the original 3:1 weighting of indirect over direct suppliers
+    indirect_total = 3 * len(suppliers.indirect_ids)
+    indirect_share = indirect_total / (indirect_total + len(suppliers.direct_ids))
+    for ids in id_batches(count):
+        n = len(ids)
+        centers = rng.choices(cost_centers, weights=cost_center_weights, k=n)
+        rows = []
+        for spend_id, cost_center in zip(ids, centers):
+            supplier_id = _pick_supplier(rng, suppliers, indirect_share)
+            valid_categories = categories.leaves_by_type["Direct" if suppliers.is_direct[supplier_id] else "Indirect"]
+            category_id = valid_categories[rng.randrange(len(valid_categories))]
+            rows.append([
+                spend_id, category_id, supplier_id, START_DATE + timedelta(days=rng.randrange(TOTAL_DAYS + 1)),
+                round(rng.uniform(100.00, 75000.00), 2), cost_center, categories.descriptions[category_id],
+            ])
+        out.write(rows)
+
+
+def generate_pricing(rng, count, suppliers, out):
+    """Writes pricing rows and returns a bounded random sample of (supplier, product) pairs for discounts."""
+    reservoir = []
+    seen = 0
+    for ids in id_batches(count):
+        n = len(ids)
+        products = [rng.randrange(len(product_names_list)) for _ in range(n)]
+        rows = []
+        for pricing_id, product in zip(ids, products):
+            supplier_id = suppliers.direct_ids[rng.randrange(len(suppliers.direct_ids))] # Only direct suppliers for product pricing
+            rows.append([
+                pricing_id, supplier_id, product_names_list[product], round(rng.uniform(10.00, 25000.00), 2),
+                suppliers.currency[supplier_id], product_units[product], # Use supplier's base currency
+            ])
+            seen += 1
+            if len(reservoir) < DISCOUNT_RESERVOIR_SIZE:
+                reservoir.append((supplier_id, product))
+            else:
+                slot = rng.randrange(seen)
+                if slot < DISCOUNT_RESERVOIR_SIZE:
+                    reservoir[slot] = (supplier_id, product)
+        out.write(rows)
+    return reservoir
+
+
+def generate_contracts(rng, count, suppliers, out):
+    latest_start = (END_DATE - timedelta(days=90) - START_DATE).days # Contracts usually start before end date
+    for ids in id_batches(count):
+        rows = []
+        for contract_id in ids:
+            start_d = START_DATE + timedelta(days=rng.randrange(latest_start + 1))
+            end_d = start_d + timedelta(days=rng.choice([365, 730, 1095, 1460])) # 1, 2, 3, or 4 year contracts
+            # Cap contracts to finish within a year of END_DATE for relevance
+            if end_d > END_DATE + timedelta(days=365):
+                end_d = END_DATE + timedelta(days=rng.randint(0, 365))
+            rows.append([
+                contract_id, suppliers.active_ids[rng.randrange(len(suppliers.active_ids))],
+                rng.choice(contract_names), start_d, end_d,
+                f"Standard terms, Payment terms {rng.choice(payment_terms)}, annual review clause, auto-renewal option.",
+            ])
+        out.write(rows)
+
+
+def generate_discounts(rng, count, priced_products, out):
+    if not priced_products: # Skip if no products exist to discount
+        return
+    latest_start = (END_DATE - timedelta(days=90) - START_DATE).days
+    for ids in id_batches(count):
+        rows = []
+        for discount_id in ids:
+            supplier_id, product = priced_products[rng.randrange(len(priced_products))]
+            valid_from = START_DATE + timedelta(days=rng.randrange(latest_start + 1))
+            valid_to = valid_from + timedelta(days=rng.choice([90, 180, 270, 365]))
+            # Ensure discount valid_to doesn't extend too far beyond END_DATE
+            if valid_to > END_DATE + timedelta(days=60):
+                valid_to = END_DATE + timedelta(days=rng.randint(0, 60))
+            rows.append([
+                discount_id, supplier_id, product_names_list[product],
+                round(rng.uniform(1.00, 15.00), 2), valid_from, valid_to,
+            ])
+        out.write(rows)
+
+
+def generate_alternates(rng, count, suppliers, out):
+    direct_ids = suppliers.direct_ids
+    if len(direct_ids) < 2: # Skip if no distinct alternate available
+        return
+    for ids in id_batches(count):
+        rows = []
+        for alternate_id in ids:
+            primary = direct_ids[rng.randrange(len(direct_ids))]
+            # Pick a different direct supplier as the alternate
+            alternate = direct_ids[rng.randrange(len(direct_ids) - 1)]
+            if alternate == primary:
+                alternate = direct_ids[-1]
+            rows.append([
+                alternate_id, rng.choice(product_names_list), primary, alternate,
+                rng.randint(7, 90), # Wider lead time range for alternate
+            ])
+        out.write(rows)
+
+
+def generate(out_dir, counts, seed=DEFAULT_SEED, log=sys.stderr):
+    """Generates every table into `out_dir`. Returns {filename: rows written}."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    outputs = {filename: CsvOutput(out_dir, filename) for filename in HEADERS}
+    started = time.monotonic()
+    try:
+        suppliers = generate_suppliers(rng, counts['suppliers'], outputs['supplier.csv'])
+        categories = generate_categories(max(counts['categories'], 1), outputs['category.csv'])
+        generate_purchase_orders_and_invoices(
+            rng, counts['purchase_orders'], suppliers, categories,
+            outputs['purchaseorder.csv'], outputs['invoice.csv'],
+        )
+        generate_spend_entries(rng, counts['spend_entries'], suppliers, categories, outputs['spendentry.csv'])
+        priced_products = generate_pricing(rng, counts['pricing'], suppliers, outputs['supplierproductpricing.csv'])
+        generate_contracts(rng, counts['contracts'], suppliers, outputs['suppliercontract.csv'])
+        generate_discounts(rng, counts['discounts'], priced_products, outputs['supplierdiscount.csv'])
+        generate_alternates(rng, counts['alternates'], suppliers, outputs['alternatesupplier.csv'])
+    finally:
+        for output in outputs.values():
+            output.close()
+    elapsed = time.monotonic() - started
+    written = {filename: output.rows for filename, output in outputs.items()}
+    if log:
+        for filename, rows in written.items():
+            log.write(f"{filename:<30} {rows:>12,} rows\n")
+        log.write(f"Wrote {sum(written.values()):,} rows to {out_dir} in {elapsed:.1f}s\n")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic procurement CSV files for load_brake_data.")
+    parser.add_argument('--out', required=True, help="Output directory (core/data replaces the committed sample).")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Random seed (default: %(default)s).")
+    for name, default in DEFAULT_COUNTS.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", type=int, default=default, dest=name,
+            help=f"Number of {name.replace('_', ' ')} rows (default: {default}).",
+        )
+    args = parser.parse_args(argv)
+    counts = {name: getattr(args, name) for name in DEFAULT_COUNTS}
+    generate(args.out, counts, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+# core/management/commands/benchmark.py
+"""
+End-to-end benchmark for the views, exports and loader, at several data sizes.
+
+For every size the command generates a data set with core/generate_data.py, loads it
+with load_brake_data (that load is itself the first scenario), then requests every page
+through the test client. Each scenario records wall time, query count, peak Python
+memory (tracemalloc) and response bytes. Everything runs against a throwaway test
+database created from the configured one (SQLite or PostgreSQL), never the real data.
+
+    python manage.py benchmark --sizes 10000,100000 --output bench.json
+    python manage.py benchmark --sizes 10000 --compare bench.json
+"""
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core.generate_data import DEFAULT_COUNTS, DEFAULT_SEED, generate
+from core.routers import pinned_to_primary
+from core.views import MODEL_MAP
+
+DEFAULT_SIZES = '10000,100000,1000000'
+LIST_VIEWS = [
+    'supplier_list', 'category_list', 'purchase_order_list', 'invoice_list', 'spend_entry_list',
+    'supplier_product_pricing_list', 'supplier_contract_list', 'supplier_discount_list',
+    'alternate_supplier_list',
+]
+# The benchmark keeps its own in-process cache so it never touches the site's cache
+BENCHMARK_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}}
+
+
+def counts_for_size(size):
+    """Per-table row counts adding up to roughly `size`, in the default data set's proportions."""
+    default_total = sum(DEFAULT_COUNTS.values())
+    counts = {name: max(1, round(count * size / default_total)) for name, count in DEFAULT_COUNTS.items()}
+    counts['categories'] = DEFAULT_COUNTS['categories'] # The category tree stays the same size
+    return counts
+
+
+class QueryCounter:
+    """execute_wrapper that counts queries without keeping them, unlike CaptureQueriesContext."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _response_bytes(response):
+    # Streaming responses (the Excel export) are only produced while being consumed
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = "Time the views, exports and loader against generated data sets of several sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=DEFAULT_SIZES,
+            help="Comma separated total row counts to seed (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help="Timed runs per scenario; the median is reported (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--only', default='',
+            help="Comma separated scenario name prefixes to run, e.g. 'summary,export'.",
+        )
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Data generator seed.")
+        parser.add_argument(
+            '--loader-workers', type=int, default=1,
+            help="--workers for load_brake_data (default: %(default)s). Queries made by extra "
+                 "worker threads are not counted.",
+        )
+        parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+        parser.add_argument(
+            '--compare', default=None,
+            help="Earlier results file to compare against; regressions are listed at the end.",
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help="Percent slower (or more memory) that counts as a regression (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help="Exit with an error when --compare finds a regression.",
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help="Keep the test database between runs instead of recreating it.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers.")
+        self.repeat = max(1, options['repeat'])
+        self.only = [prefix.strip() for prefix in options['only'].split(',') if prefix.strip()]
+        self.loader_workers = options['loader_workers']
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            # Only the primary's test database holds the generated data
+            with override_settings(CACHES=BENCHMARK_CACHES), pinned_to_primary():
+                results = []
+                for size in sizes:
+                    results.extend(self._run_size(size, options['seed']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'sizes': sizes,
+                'repeat': self.repeat,
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            regressions = self._compare(options['compare'], results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}.")
+
+    # --- Running ---
+
+    def _selected(self, name):
+        return not self.only or any(name.startswith(prefix) for prefix in self.only)
+
+    def _run_size(self, size, seed):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {size:,} rows ==="))
+        results = []
+        with tempfile.TemporaryDirectory(prefix='benchmark-') as data_dir:
+            started = time.monotonic()
+            generate(data_dir, counts_for_size(size), seed=seed, log=None)
+            self.stdout.write(f"Generated data in {time.monotonic() - started:.1f}s")
+
+            # The loader always runs: the other scenarios need its data
+            load = lambda: call_command('load_brake_data', mode='bulk', data_dir=data_dir, workers=self.loader_workers)
+            results.append(self._measure(size, 'load_brake_data', load, repeat=1))
+
+        client = Client()
+        user, _ = get_user_model().objects.get_or_create(username='benchmark')
+        client.force_login(user)
+
+        for name, view in self._view_scenarios():
+            if self._selected(name):
+                results.append(self._measure(size, name, lambda: client.get(view)))
+        # Same page again without clearing the cache in between
+        if self._selected('summary_page_cached'):
+            client.get(reverse('summary_page'))
+            results.append(self._measure(size, 'summary_page_cached', lambda: client.get(reverse('summary_page')), cold=False))
+        return results
+
+    def _view_scenarios(self):
+        yield 'summary_page', reverse('summary_page')
+        for view_name in LIST_VIEWS:
+            yield view_name, reverse(view_name)
+        for model_name in MODEL_MAP:
+            yield f'rows:{model_name}', reverse('model_rows_json', args=[model_name]) + '?draw=1&start=0&length=25'
+        for model_name in MODEL_MAP:
+            yield f'export:{model_name}', reverse('export_model_excel', args=[model_name])
+
+    def _run_once(self, action, counter):
+        with connection.execute_wrapper(counter):
+            result = action()
+            response_bytes = _response_bytes(result) if hasattr(result, 'status_code') else 0
+        if hasattr(result, 'status_code') and result.status_code != 200:
+            raise CommandError(f"Unexpected status {result.status_code}")
+        return response_bytes
+
+    def _measure(self, size, name, action, repeat=None, cold=True):
+        """Times `action` `repeat` times, then runs it once more under tracemalloc for peak memory."""
+        repeat = repeat or self.repeat
+        times = []
+        for _ in range(repeat):
+            if cold:
+                cache.clear()
+            counter = QueryCounter()
+            started = time.perf_counter()
+            response_bytes = self._run_once(action, counter)
+            times.append(time.perf_counter() - started)
+
+        # tracemalloc slows everything down, so memory gets a run of its own
+        if cold:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            self._run_once(action, QueryCounter())
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            'size': size,
+            'scenario': name,
+            'wall_time_s': round(statistics.median(times), 6),
+            'wall_times_s': [round(t, 6) for t in times],
+            'queries': counter.count,
+            'peak_memory_bytes': peak_memory,
+            'response_bytes': response_bytes,
+        }
+        self.stdout.write(
+            f"  {name:<38} {result['wall_time_s'] * 1000:>10.1f} ms {result['queries']:>7} queries "
+            f"{peak_memory / 1024 / 1024:>8.1f} MiB {response_bytes:>12,} bytes"
+        )
+        return result
+
+    # --- Comparing ---
+
+    def _compare(self, path, results, threshold):
+        try:
+            with open(path, encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+        baseline = {(r['size'], r['scenario']): r for r in previous.get('results', [])}
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nCompared with {path}"))
+        regressions = []
+        for result in results:
+            old = baseline.get((result['size'], result['scenario']))
+            if not old:
+                continue
+            time_change = _percent_change(old['wall_time_s'], result['wall_time_s'])
+            memory_change = _percent_change(old['peak_memory_bytes'], result['peak_memory_bytes'])
+            problems = []
+            if time_change > threshold:
+                problems.append('time')
+            if memory_change > threshold:
+                problems.append('memory')
+            if result['queries'] > old['queries']:
+                problems.append('queries')
+            line = (
+                f"  {result['size']:>9,} {result['scenario']:<38} time {time_change:>+7.1f}%  "
+                f"memory {memory_change:>+7.1f}%  queries {old['queries']} -> {result['queries']}"
+            )
+            if problems:
+                regressions.append((result, problems))
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSION ({', '.join(problems)})"))
+            else:
+                self.stdout.write(line)
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions."))
+        return regressions
+
+
+def _percent_change(old, new):
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export_all import EXPORT_ALL_FORMATS, write_export_all
+from core.routers import replica_reads
+from core.views import MODEL_MAP
+
+
+class Command(BaseCommand):
+    help = "Export every model to one workbook (one sheet per model) or a zip of per-model CSVs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to write, e.g. snapshot-2025-01.xlsx")
+        parser.add_argument('--format', choices=list(EXPORT_ALL_FORMATS), default='xlsx')
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes (default EXPORT_ALL_WORKERS).")
+        parser.add_argument('--date-from', default='', help="YYYY-MM-DD; limits the models that have a date.")
+        parser.add_argument('--date-to', default='', help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        params = {'date_from': options['date_from'], 'date_to': options['date_to']}
+        started = time.monotonic()
+        try:
+            with replica_reads():
+                row_counts = write_export_all(
+                    list(MODEL_MAP.values()), options['path'], options['format'], params, workers=options['workers'],
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+        for model, row_count in row_counts.items():
+            self.stdout.write(f"{model.__name__}: {row_count} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {options['path']} in {time.monotonic() - started:.2f}s."
+        ))
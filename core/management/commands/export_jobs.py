@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export_jobs import cleanup_export_jobs, run_pending_export_jobs
+
+
+class Command(BaseCommand):
+    help = "Maintain background export jobs: run the ones still pending and delete expired files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--run-pending', action='store_true',
+            help="Run every pending job in this process (e.g. ones queued by a web process that died).",
+        )
+        parser.add_argument(
+            '--cleanup', action='store_true',
+            help="Delete the files of expired jobs and stray files in the spool directory.",
+        )
+
+    def handle(self, *args, **options):
+        if not (options['run_pending'] or options['cleanup']):
+            raise CommandError("Pass --run-pending, --cleanup or both.")
+        if options['run_pending']:
+            count = run_pending_export_jobs()
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} pending export job(s)."))
+        if options['cleanup']:
+            removed = cleanup_export_jobs()
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} export file(s)."))
@@ -1,332 +1,662 @@
-# core/management/commands/load_brake_data.py
 import csv
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import connection, connections, transaction
+from core.bulkload import DEFAULT_BATCH_SIZE, batched, bulk_insert, copy_supported, reset_sequences, raw_wipe
 from core.models import (
+    Supplier, Category, CategoryClosure, PurchaseOrder, Invoice, SpendEntry, SpendDailyRollup, SupplierScorecard,
+    SupplierProductPricing, SupplierContract, SupplierDiscount, AlternateSupplier,
+    InvoiceStatus, PurchaseOrderStatus, normalize_status,
+)
+from core.closure import rebuild_category_closure
+from core.columnar import record_table_reset
+from core.partitions import is_partitioned, split_default_partition
+from core.rollups import rebuild_spend_rollups, refresh_spend_rollups, rollups_suspended
+from core.scorecards import rebuild_supplier_scorecards, refresh_supplier_scorecards
+from core.versioning import bump_model_versions
+
+ALL_MODELS = (
     Supplier, Category, PurchaseOrder, Invoice, SpendEntry,
-    SupplierProductPricing, SupplierContract, SupplierDiscount, AlternateSupplier
+    SupplierProductPricing, SupplierContract, SupplierDiscount, AlternateSupplier,
 )
 
+# Only this many skipped rows are reported one by one per table; the rest are counted.
+MAX_REPORTED_SKIPS = 10
+
+# Upsert mode: the column whose old and new values say what derived data to refresh
+# afterwards (spend days -> rollups, suppliers -> scorecards, any category -> closure)
+REFRESH_KEYS = {SpendEntry: 'date', Invoice: 'supplier_id', PurchaseOrder: 'supplier_id', Category: 'id'}
+
+
+def _date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def _blank_to_none(value):
+    return value if value else None
+
+
+def _int_or_none(value):
+    return int(value) if value else None
+
+
+def _status(choices, value):
+    status = normalize_status(choices, value)
+    if status is None:
+        raise LoadError(f"Unknown status {value!r}; expected one of {', '.join(choices.values)}.")
+    return status
+
+
+# --- Row parsers: one CSV row -> {attname: value} ---
+
+def parse_supplier(row):
+    return {
+        'id': int(row['id']), # Explicitly set ID to match CSV IDs
+        'name': row['name'],
+        'contact_email': row['contact_email'],
+        'phone': _blank_to_none(row['phone']),
+        'address': _blank_to_none(row['address']),
+        'gstin': _blank_to_none(row['gstin']),
+        'pan': _blank_to_none(row['pan']),
+        'score': float(row['score']),
+        'type': row['type'],
+        'is_active': (row['is_active'].lower() == 'true'),
+        'share_of_business': Decimal(row['share_of_business']),
+        'lead_time_days': int(row['lead_time_days']),
+        'base_currency': row['base_currency'],
+        'unit_of_measure': row['unit_of_measure'],
+    }
+
+
+def parse_category(row):
+    return {
+        'id': int(row['id']),
+        'name': row['name'],
+        'parent_id': _int_or_none(row['parent']),
+    }
+
+
+def parse_purchase_order(row):
+    return {
+        'id': int(row['id']),
+        'po_number': row['po_number'],
+        'supplier_id': int(row['supplier']),
+        'category_id': _int_or_none(row['category']),
+        'amount': Decimal(row['amount']),
+        'issue_date': _date(row['issue_date']),
+        'status': _status(PurchaseOrderStatus, row['status']),
+    }
+
+
+def parse_invoice(row):
+    return {
+        'id': int(row['id']),
+        'invoice_number': row['invoice_number'],
+        'supplier_id': int(row['supplier']),
+        'purchase_order_id': _int_or_none(row['purchase_order']),
+        'invoice_date': _date(row['invoice_date']),
+        'due_date': _date(row['due_date']),
+        'paid_date': _date(row['paid_date']),
+        'amount': Decimal(row['amount']),
+        'status': _status(InvoiceStatus, row['status']),
+    }
+
+
+def parse_spend_entry(row):
+    return {
+        'id': int(row['id']),
+        'category_id': _int_or_none(row['category']),
+        'supplier_id': _int_or_none(row['supplier']),
+        'date': _date(row['date']),
+        'amount': Decimal(row['amount']),
+        'cost_center': row['cost_center'],
+        'description': _blank_to_none(row['description']),
+    }
+
+
+def parse_supplier_product_pricing(row):
+    return {
+        'id': int(row['id']),
+        'supplier_id': int(row['supplier']),
+        'product_name': row['product_name'],
+        'price': Decimal(row['price']),
+        'currency': row['currency'],
+        'unit_of_measure': row['unit_of_measure'],
+    }
+
+
+def parse_supplier_contract(row):
+    return {
+        'id': int(row['id']),
+        'supplier_id': int(row['supplier']),
+        'contract_name': row['contract_name'],
+        'start_date': _date(row['start_date']),
+        'end_date': _date(row['end_date']),
+        'terms': row['terms'],
+    }
+
+
+def parse_supplier_discount(row):
+    return {
+        'id': int(row['id']),
+        'supplier_id': int(row['supplier']),
+        'product_name': row['product_name'],
+        'discount_percent': Decimal(row['discount_percent']),
+        'valid_from': _date(row['valid_from']),
+        'valid_to': _date(row['valid_to']),
+    }
+
+
+def parse_alternate_supplier(row):
+    return {
+        'id': int(row['id']),
+        'product_name': row['product_name'],
+        'primary_supplier_id': int(row['primary_supplier']),
+        'alternate_supplier_id': _int_or_none(row['alternate_supplier']),
+        'lead_time_days': int(row['lead_time_days']),
+    }
+
+
+def _parents_first(rows, self_fk):
+    """Orders self-referencing rows so every parent comes before its children."""
+    ordered = []
+    emitted = set()
+    pending = rows
+    while pending:
+        remaining = []
+        for values in pending:
+            if values[self_fk] is None or values[self_fk] in emitted:
+                ordered.append(values)
+                emitted.add(values['id'])
+            else:
+                remaining.append(values)
+        if len(remaining) == len(pending):
+            # Cycle or dangling parent: keep the rows, they'll be linked by the deferred FK check
+            ordered.extend(remaining)
+            break
+        pending = remaining
+    return ordered
+
+
+class TableSpec:
+    """
+    How one CSV maps onto one model.
+    `required_fks`: rows whose target is missing are skipped (as the loader always did).
+    `optional_fks`: a missing target is stored as NULL.
+    `describe`: CSV column used to name a row in skip messages.
+    `self_fk`: attname of a FK to the same table (Category.parent), loaded parents first.
+    `natural_key`: unique business key upsert mode can match on instead of the id.
+    """
+
+    def __init__(self, model, filename, label, parse, describe, required_fks=None, optional_fks=None,
+                 self_fk=None, natural_key=None):
+        self.model = model
+        self.filename = filename
+        self.label = label
+        self.parse = parse
+        self.describe = describe
+        self.required_fks = required_fks or {}
+        self.optional_fks = optional_fks or {}
+        self.self_fk = self_fk
+        self.natural_key = natural_key
+
+
+TABLE_SPECS = [
+    TableSpec(Supplier, 'supplier.csv', 'Suppliers', parse_supplier, 'name'),
+    TableSpec(Category, 'category.csv', 'Categories', parse_category, 'name',
+              optional_fks={'parent_id': Category}, self_fk='parent_id'),
+    TableSpec(PurchaseOrder, 'purchaseorder.csv', 'Purchase Orders', parse_purchase_order, 'po_number',
+              required_fks={'supplier_id': Supplier}, optional_fks={'category_id': Category},
+              natural_key='po_number'),
+    TableSpec(Invoice, 'invoice.csv', 'Invoices', parse_invoice, 'invoice_number',
+              required_fks={'supplier_id': Supplier}, optional_fks={'purchase_order_id': PurchaseOrder},
+              natural_key='invoice_number'),
+    TableSpec(SpendEntry, 'spendentry.csv', 'Spend Entries', parse_spend_entry, 'id',
+              optional_fks={'category_id': Category, 'supplier_id': Supplier}),
+    TableSpec(SupplierProductPricing, 'supplierproductpricing.csv', 'Supplier Product Pricing', parse_supplier_product_pricing, 'product_name',
+              required_fks={'supplier_id': Supplier}),
+    TableSpec(SupplierContract, 'suppliercontract.csv', 'Supplier Contracts', parse_supplier_contract, 'contract_name',
+              required_fks={'supplier_id': Supplier}),
+    TableSpec(SupplierDiscount, 'supplierdiscount.csv', 'Supplier Discounts', parse_supplier_discount, 'product_name',
+              required_fks={'supplier_id': Supplier}),
+    TableSpec(AlternateSupplier, 'alternatesupplier.csv', 'Alternate Suppliers', parse_alternate_supplier, 'product_name',
+              required_fks={'primary_supplier_id': Supplier}, optional_fks={'alternate_supplier_id': Supplier}),
+]
+
+
+def dependency_graph(specs):
+    """{model: set of models it has FKs to}, limited to the tables being loaded (self-FKs ignored)."""
+    loaded = {spec.model for spec in specs}
+    return {
+        spec.model: {
+            field.related_model for field in spec.model._meta.concrete_fields
+            if field.is_relation and field.related_model in loaded and field.related_model is not spec.model
+        }
+        for spec in specs
+    }
+
+
+def dependency_levels(graph):
+    """Groups the models into levels; everything in a level only depends on earlier levels."""
+    levels = []
+    placed = set()
+    while len(placed) < len(graph):
+        level = [model for model, deps in graph.items() if model not in placed and deps <= placed]
+        if not level:
+            raise ValueError("Circular foreign key dependency between tables.")
+        levels.append(level)
+        placed.update(level)
+    return levels
+
+
+class LoadError(Exception):
+    pass
+
 
 class Command(BaseCommand):
     help = "Load sample procurement data from CSV files for a brake manufacturing company."
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write(self.style.WARNING("Wiping existing data..."))
-
-        # Delete in reverse order of dependencies to avoid FK issues
-        AlternateSupplier.objects.all().delete()
-        SupplierDiscount.objects.all().delete()
-        SupplierContract.objects.all().delete()
-        SupplierProductPricing.objects.all().delete()
-        Invoice.objects.all().delete()
-        SpendEntry.objects.all().delete() # SpendEntry does not have FKs to PO/Invoice, safe here
-        PurchaseOrder.objects.all().delete()
-        Category.objects.all().delete()
-        Supplier.objects.all().delete()
-
-        self.stdout.write(self.style.SUCCESS("Existing data wiped successfully."))
-
-        # Define the path to your CSV data directory
-        # Assuming CSVs are in core/data/
-        data_dir = os.path.join(settings.BASE_DIR, 'core', 'data')
-
-        # --- Load Suppliers ---
-        self.stdout.write(self.style.SUCCESS("Loading Suppliers from supplier.csv..."))
-        suppliers_by_id = {}
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', choices=['create', 'bulk', 'upsert'], default='create',
+            help="'create' wipes and saves row by row through the ORM; 'bulk' wipes and loads each "
+                 "table in one transaction with COPY (PostgreSQL) or batched bulk_create; 'upsert' "
+                 "keeps existing data and only inserts new rows and updates changed ones.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help="Rows per COPY/bulk_create batch in bulk and upsert modes (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--data-dir', default=None,
+            help="Directory holding the CSV files (default: core/data).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help="Tables loaded at the same time, each in its own thread with its own database "
+                 "connection (default: %(default)s). A table starts as soon as every table it "
+                 "references is loaded. SQLite always loads one table at a time.",
+        )
+        parser.add_argument(
+            '--match', choices=['id', 'natural'], default='id',
+            help="Upsert mode: match rows on id, or on the natural key where the model has one "
+                 "(po_number, invoice_number) and on id otherwise.",
+        )
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="Upsert mode: also delete rows that are no longer present in the CSV files. "
+                 "Only use this with full extracts, never with a delta feed.",
+        )
+
+    def handle(self, *args, **options):
         try:
-            with open(os.path.join(data_dir, 'supplier.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    supplier = Supplier.objects.create(
-                        id=int(row['id']), # Explicitly set ID if you want to match CSV IDs
-                        name=row['name'],
-                        contact_email=row['contact_email'],
-                        phone=row['phone'] if row['phone'] else None,
-                        address=row['address'] if row['address'] else None,
-                        gstin=row['gstin'] if row['gstin'] else None,
-                        pan=row['pan'] if row['pan'] else None,
-                        score=float(row['score']),
-                        type=row['type'],
-                        is_active=(row['is_active'].lower() == 'true'),
-                        share_of_business=Decimal(row['share_of_business']),
-                        lead_time_days=int(row['lead_time_days']),
-                        base_currency=row['base_currency'],
-                        unit_of_measure=row['unit_of_measure']
-                    )
-                    suppliers_by_id[supplier.id] = supplier
-            self.stdout.write(self.style.SUCCESS(f"Loaded {len(suppliers_by_id)} suppliers."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: supplier.csv not found at {data_dir}"))
+            # Row-by-row rollup and scorecard refreshes would dominate the load; they are rebuilt
+            # (or, after an upsert, refreshed for what changed) once at the end
+            with rollups_suspended():
+                self._load(options)
+        except LoadError as e:
+            self.stdout.write(self.style.ERROR(str(e)))
             return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading suppliers: {e}"))
-            return
-
-        # --- Load Categories ---
-        self.stdout.write(self.style.SUCCESS("Loading Categories from category.csv..."))
-        categories_by_id = {}
-        # First pass for categories without parents
-        try:
-            with open(os.path.join(data_dir, 'category.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                # Store all category rows to process parents in a second pass
-                category_rows = list(reader)
-                
-                for row in category_rows:
-                    if not row['parent']: # Load categories that don't have a parent yet
-                        category = Category.objects.create(
-                            id=int(row['id']),
-                            name=row['name'],
-                            parent=None
-                        )
-                        categories_by_id[category.id] = category
-            self.stdout.write(self.style.SUCCESS("Initial categories (without parents) loaded."))
-
-            # Second pass to link parent categories
-            for row in category_rows:
-                if row['parent']:
-                    parent_id = int(row['parent'])
-                    if parent_id in categories_by_id:
-                        parent_category = categories_by_id[parent_id]
-                        # Check if category already exists (from first pass) or create it
-                        if int(row['id']) not in categories_by_id:
-                            category = Category.objects.create(
-                                id=int(row['id']),
-                                name=row['name'],
-                                parent=parent_category
-                            )
-                            categories_by_id[category.id] = category
-                        else: # If it already exists, just update its parent
-                            category = categories_by_id[int(row['id'])]
-                            category.parent = parent_category
-                            category.save()
-                    else:
-                        self.stdout.write(self.style.WARNING(f"Parent category ID {parent_id} for category {row['name']} not found. Skipping parent link."))
-            self.stdout.write(self.style.SUCCESS(f"Loaded {len(categories_by_id)} categories."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: category.csv not found at {data_dir}"))
+        finally:
+            # Cached dashboard aggregates built from the old data must not be served again,
+            # even if the load stopped half way.
+            bump_model_versions(*ALL_MODELS, SpendDailyRollup, CategoryClosure, SupplierScorecard)
+
+        self.stdout.write(self.style.SUCCESS("✅ All sample brake manufacturing data loaded successfully from CSVs!"))
+
+    def _load(self, options):
+        self.mode = options['mode']
+        self.batch_size = options['batch_size']
+        self.match = options['match']
+        self.prune = options['prune']
+        # Assuming CSVs are in core/data/ unless told otherwise
+        self.data_dir = options['data_dir'] or os.path.join(settings.BASE_DIR, 'core', 'data')
+
+        if self.mode != 'upsert':
+            if self.prune or self.match != 'id':
+                raise LoadError("--match and --prune only apply to --mode=upsert.")
+            self._wipe()
+
+        if self.mode == 'bulk':
+            self.use_copy = copy_supported()
+            self.stdout.write(f"Bulk mode: {'COPY FROM STDIN' if self.use_copy else 'bulk_create'}, batch size {self.batch_size}.")
+
+        self.loaded_ids = {}
+        # Natural-key matching: CSV id -> database id for rows matched on their natural key
+        self.id_maps = {}
+        # Keys present in each CSV, for --prune
+        self.seen_keys = {}
+        # model -> (rows, seconds), for the final report
+        self.stats = {}
+        # Upsert mode: model -> rows inserted, and model -> REFRESH_KEYS values of changed rows
+        self.inserted = {}
+        self.touched = {}
+        self.workers = options['workers']
+        if connection.vendor == 'sqlite' and self.workers > 1:
+            # SQLite allows a single writer; concurrent loads would only wait on each other
+            self.workers = 1
+
+        started = time.monotonic()
+        self._load_tables()
+        self._report(time.monotonic() - started)
+
+        if self.mode == 'upsert' and self.prune:
+            self._prune()
+
+        if self.mode == 'bulk':
+            # Rows were written with explicit ids, so move the sequences past them
+            reset_sequences(ALL_MODELS)
+        elif self.mode == 'upsert':
+            reset_sequences([model for model, count in self.inserted.items() if count])
+
+        # Spend rows for months without a partition went to the DEFAULT one (PostgreSQL only)
+        split_default_partition()
+
+        if self.mode == 'upsert' and not self.prune:
+            self._refresh_derived()
             return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading categories: {e}"))
+        # Wiped (or pruned, which reads every table anyway): rebuild the derived tables whole
+        started = time.monotonic()
+        rollup_rows = rebuild_spend_rollups()
+        closure_rows = rebuild_category_closure()
+        scorecard_rows = rebuild_supplier_scorecards()
+        self.stdout.write(
+            f"Rebuilt {rollup_rows} daily spend rollup rows, {closure_rows} category tree rows and "
+            f"{scorecard_rows} supplier scorecard rows in {time.monotonic() - started:.2f}s."
+        )
+
+    def _refresh_derived(self):
+        """Brings the rollups, scorecards and closure up to date for the rows an upsert changed."""
+        started = time.monotonic()
+        days = self.touched.get(SpendEntry, set())
+        suppliers = self.touched.get(Invoice, set()) | self.touched.get(PurchaseOrder, set())
+        refresh_spend_rollups(days)
+        refresh_supplier_scorecards(suppliers)
+        closure = Category in self.touched
+        if closure:
+            rebuild_category_closure()
+        self.stdout.write(
+            f"Refreshed the spend rollups of {len(days)} days and the scorecards of {len(suppliers)} suppliers"
+            f"{', rebuilt the category tree' if closure else ''} in {time.monotonic() - started:.2f}s."
+        )
+
+    def _load_tables(self):
+        """
+        Loads every table, starting each one as soon as the tables it references are done.
+        With the default CSVs that means suppliers and categories first, then purchase orders
+        alongside the spend, pricing, contract, discount and alternate-supplier tables, then
+        invoices once purchase orders are in.
+        """
+        graph = dependency_graph(TABLE_SPECS)
+        specs = {spec.model: spec for spec in TABLE_SPECS}
+        plan = ' -> '.join(
+            ', '.join(specs[model].label for model in level) for level in dependency_levels(graph)
+        )
+        self.stdout.write(f"Load plan ({self.workers} worker{'s' if self.workers != 1 else ''}): {plan}")
+
+        if self.workers <= 1:
+            for spec in TABLE_SPECS:
+                self._load_table(spec)
             return
 
-
-        # --- Load Purchase Orders ---
-        self.stdout.write(self.style.SUCCESS("Loading Purchase Orders from purchaseorder.csv..."))
-        purchase_orders_by_id = {}
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            def submit_ready():
+                for model, deps in graph.items():
+                    if model not in done and model not in running.values() and deps <= done:
+                        running[pool.submit(self._load_table_in_worker, specs[model])] = model
+
+            submit_ready()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    model = running.pop(future)
+                    future.result()  # Re-raises LoadError from the worker
+                    done.add(model)
+                submit_ready()
+
+    def _load_table_in_worker(self, spec):
         try:
-            with open(os.path.join(data_dir, 'purchaseorder.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    supplier_obj = suppliers_by_id.get(int(row['supplier']))
-                    category_obj = categories_by_id.get(int(row['category'])) if row['category'] else None
-
-                    if not supplier_obj:
-                        self.stdout.write(self.style.ERROR(f"Skipping PO {row['po_number']}: Supplier ID {row['supplier']} not found."))
-                        continue
-
-                    po = PurchaseOrder.objects.create(
-                        id=int(row['id']),
-                        po_number=row['po_number'],
-                        supplier=supplier_obj,
-                        category=category_obj,
-                        amount=Decimal(row['amount']),
-                        issue_date=datetime.strptime(row['issue_date'], '%Y-%m-%d').date(),
-                        status=row['status']
-                    )
-                    purchase_orders_by_id[po.id] = po
-            self.stdout.write(self.style.SUCCESS(f"Loaded {len(purchase_orders_by_id)} purchase orders."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: purchaseorder.csv not found at {data_dir}"))
-            return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading purchase orders: {e}"))
-            return
-
-
-        # --- Load Invoices ---
-        self.stdout.write(self.style.SUCCESS("Loading Invoices from invoice.csv..."))
-        try:
-            with open(os.path.join(data_dir, 'invoice.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    supplier_obj = suppliers_by_id.get(int(row['supplier']))
-                    po_obj = purchase_orders_by_id.get(int(row['purchase_order'])) if row['purchase_order'] else None
-
-                    if not supplier_obj:
-                        self.stdout.write(self.style.ERROR(f"Skipping Invoice {row['invoice_number']}: Supplier ID {row['supplier']} not found."))
-                        continue
-
-                    paid_date = datetime.strptime(row['paid_date'], '%Y-%m-%d').date() if row['paid_date'] else None
-
-                    Invoice.objects.create(
-                        id=int(row['id']),
-                        invoice_number=row['invoice_number'],
-                        supplier=supplier_obj,
-                        purchase_order=po_obj,
-                        invoice_date=datetime.strptime(row['invoice_date'], '%Y-%m-%d').date(),
-                        due_date=datetime.strptime(row['due_date'], '%Y-%m-%d').date(),
-                        paid_date=paid_date,
-                        amount=Decimal(row['amount']),
-                        status=row['status']
-                    )
-            self.stdout.write(self.style.SUCCESS("Invoices loaded successfully."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: invoice.csv not found at {data_dir}"))
-            return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading invoices: {e}"))
-            return
-
-
-        # --- Load Spend Entries ---
-        self.stdout.write(self.style.SUCCESS("Loading Spend Entries from spendentry.csv..."))
-        try:
-            with open(os.path.join(data_dir, 'spendentry.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    category_obj = categories_by_id.get(int(row['category'])) if row['category'] else None
-                    supplier_obj = suppliers_by_id.get(int(row['supplier'])) if row['supplier'] else None
-
-                    SpendEntry.objects.create(
-                        id=int(row['id']),
-                        category=category_obj,
-                        supplier=supplier_obj,
-                        date=datetime.strptime(row['date'], '%Y-%m-%d').date(),
-                        amount=Decimal(row['amount']),
-                        cost_center=row['cost_center'],
-                        description=row['description'] if row['description'] else None
-                    )
-            self.stdout.write(self.style.SUCCESS("Spend entries loaded successfully."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: spendentry.csv not found at {data_dir}"))
-            return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading spend entries: {e}"))
-            return
-
-
-        # --- Load Supplier Product Pricing ---
-        self.stdout.write(self.style.SUCCESS("Loading Supplier Product Pricing from supplierproductpricing.csv..."))
-        try:
-            with open(os.path.join(data_dir, 'supplierproductpricing.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    supplier_obj = suppliers_by_id.get(int(row['supplier']))
-
-                    if not supplier_obj:
-                        self.stdout.write(self.style.ERROR(f"Skipping Product Pricing for {row['product_name']}: Supplier ID {row['supplier']} not found."))
-                        continue
-
-                    SupplierProductPricing.objects.create(
-                        id=int(row['id']),
-                        supplier=supplier_obj,
-                        product_name=row['product_name'],
-                        price=Decimal(row['price']),
-                        currency=row['currency'],
-                        unit_of_measure=row['unit_of_measure']
-                    )
-            self.stdout.write(self.style.SUCCESS("Supplier product pricing loaded successfully."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: supplierproductpricing.csv not found at {data_dir}"))
-            return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading supplier product pricing: {e}"))
-            return
-
-
-        # --- Load Supplier Contracts ---
-        self.stdout.write(self.style.SUCCESS("Loading Supplier Contracts from suppliercontract.csv..."))
-        try:
-            with open(os.path.join(data_dir, 'suppliercontract.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    supplier_obj = suppliers_by_id.get(int(row['supplier']))
-
-                    if not supplier_obj:
-                        self.stdout.write(self.style.ERROR(f"Skipping Contract {row['contract_name']}: Supplier ID {row['supplier']} not found."))
-                        continue
-
-                    SupplierContract.objects.create(
-                        id=int(row['id']),
-                        supplier=supplier_obj,
-                        contract_name=row['contract_name'],
-                        start_date=datetime.strptime(row['start_date'], '%Y-%m-%d').date(),
-                        end_date=datetime.strptime(row['end_date'], '%Y-%m-%d').date(),
-                        terms=row['terms']
-                    )
-            self.stdout.write(self.style.SUCCESS("Supplier contracts loaded successfully."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: suppliercontract.csv not found at {data_dir}"))
-            return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading supplier contracts: {e}"))
-            return
-
-
-        # --- Load Supplier Discounts ---
-        self.stdout.write(self.style.SUCCESS("Loading Supplier Discounts from supplierdiscount.csv..."))
-        try:
-            with open(os.path.join(data_dir, 'supplierdiscount.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    supplier_obj = suppliers_by_id.get(int(row['supplier']))
+            with rollups_suspended():  # Suspension is per thread
+                self._load_table(spec)
+        finally:
+            # Each worker thread opened its own connection; don't leave it dangling
+            connections.close_all()
+
+    def _report(self, wall_time):
+        self.stdout.write("Per-table load times:")
+        for spec in TABLE_SPECS:
+            if spec.model not in self.stats:
+                continue
+            rows, seconds = self.stats[spec.model]
+            rate = rows / seconds if seconds > 0 else float(rows)
+            self.stdout.write(f"  {spec.label:<28} {rows:>10} rows {seconds:>8.2f}s {rate:>12,.0f} rows/sec")
+        total_rows = sum(rows for rows, _ in self.stats.values())
+        self.stdout.write(f"  {'Total (wall clock)':<28} {total_rows:>10} rows {wall_time:>8.2f}s")
+
+    def _wipe(self):
+        self.stdout.write(self.style.WARNING("Wiping existing data..."))
+        # Delete in reverse order of dependencies to avoid FK issues
+        children_first = [SpendDailyRollup, CategoryClosure, SupplierScorecard] + [spec.model for spec in reversed(TABLE_SPECS)]
+        if self.mode == 'bulk':
+            # One DELETE per table instead of the collector loading every row first
+            with transaction.atomic():
+                raw_wipe(children_first)
+                record_table_reset(*children_first)
+        else:
+            for model in children_first:
+                model.objects.all().delete()
+            record_table_reset(*children_first)
+        self.stdout.write(self.style.SUCCESS("Existing data wiped successfully."))
 
-                    if not supplier_obj:
-                        self.stdout.write(self.style.ERROR(f"Skipping Discount for {row['product_name']}: Supplier ID {row['supplier']} not found."))
+    def _match_key(self, spec):
+        """Field rows of this table are matched on in upsert mode."""
+        if self.match == 'natural' and spec.natural_key:
+            return spec.natural_key
+        return 'id'
+
+    def _existing_targets(self, target, ids):
+        """
+        The subset of `ids` that can be used as FK targets: rows loaded in this run and,
+        in upsert mode, rows already in the database (looked up for this batch only).
+        """
+        known = self.loaded_ids.get(target, set())
+        found = ids & known
+        if self.mode == 'upsert':
+            unknown = ids - found
+            if unknown:
+                found |= set(target._base_manager.filter(pk__in=unknown).values_list('pk', flat=True))
+        return found
+
+    def _read_rows(self, spec):
+        """Yields parsed rows whose FK targets exist, reporting the ones that are skipped."""
+        path = os.path.join(self.data_dir, spec.filename)
+        key = self._match_key(spec)
+        seen_keys = self.seen_keys.setdefault(spec.model, set())
+        fks = {**spec.required_fks, **spec.optional_fks}
+        skipped = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for raw_batch in batched(csv.DictReader(f), self.batch_size):
+                parsed = []
+                for row in raw_batch:
+                    values = spec.parse(row)
+                    if self.prune:
+                        seen_keys.add(values[key])
+                    for attname, target in fks.items():
+                        if target in self.id_maps and values[attname] is not None:
+                            values[attname] = self.id_maps[target].get(values[attname], values[attname])
+                    parsed.append((row, values))
+
+                # Check every FK of the batch at once
+                valid_targets = {}
+                for attname, target in fks.items():
+                    ids = {values[attname] for _, values in parsed if values[attname] is not None}
+                    valid_targets[attname] = self._existing_targets(target, ids)
+
+                for row, values in parsed:
+                    missing = [
+                        (attname, values[attname]) for attname in spec.required_fks
+                        if values[attname] not in valid_targets[attname]
+                    ]
+                    if missing:
+                        skipped += 1
+                        if skipped <= MAX_REPORTED_SKIPS:
+                            attname, value = missing[0]
+                            self.stdout.write(self.style.ERROR(
+                                f"Skipping {spec.model.__name__} {row[spec.describe]}: "
+                                f"{attname.replace('_id', '').replace('_', ' ').title()} ID {value} not found."
+                            ))
                         continue
-
-                    SupplierDiscount.objects.create(
-                        id=int(row['id']),
-                        supplier=supplier_obj,
-                        product_name=row['product_name'],
-                        discount_percent=Decimal(row['discount_percent']),
-                        valid_from=datetime.strptime(row['valid_from'], '%Y-%m-%d').date(),
-                        valid_to=datetime.strptime(row['valid_to'], '%Y-%m-%d').date()
+                    for attname in spec.optional_fks:
+                        if values[attname] is not None and values[attname] not in valid_targets[attname]:
+                            values[attname] = None
+                    yield values
+        if skipped > MAX_REPORTED_SKIPS:
+            self.stdout.write(self.style.ERROR(f"... {skipped} {spec.label.lower()} rows skipped in total."))
+
+    def _known_ids(self, spec):
+        """
+        Ids available as FK targets while loading this table. Self-references
+        (Category.parent) may point at any row of the same CSV.
+        """
+        if not spec.self_fk:
+            return set()
+        with open(os.path.join(self.data_dir, spec.filename), 'r', encoding='utf-8') as f:
+            return {int(row['id']) for row in csv.DictReader(f)}
+
+    def _upsert_rows(self, spec, rows):
+        """
+        Inserts new rows and updates changed ones with INSERT ... ON CONFLICT DO UPDATE,
+        comparing each batch with the matching database rows first so unchanged rows
+        are not rewritten. Returns (inserted, updated, unchanged).
+        """
+        model = spec.model
+        key = self._match_key(spec)
+        natural = key != 'id'
+        inserted = updated = unchanged = 0
+        for batch in batched(rows, self.batch_size):
+            csv_ids = {values[key]: values['id'] for values in batch}
+            if natural:
+                # The database assigns ids for rows matched on their natural key
+                for values in batch:
+                    del values['id']
+            fields = list(batch[0].keys())
+            compare_fields = [name for name in fields if name not in (key, 'id')]
+            existing = {
+                current[key]: current
+                for current in model._base_manager.filter(**{f'{key}__in': list(csv_ids)}).values(*fields)
+            }
+            changed = []
+            for values in batch:
+                current = existing.get(values[key])
+                if current is None:
+                    inserted += 1
+                    changed.append(values)
+                elif any(current[name] != values[name] for name in compare_fields):
+                    updated += 1
+                    changed.append(values)
+                else:
+                    unchanged += 1
+            refresh_key = REFRESH_KEYS.get(model)
+            if refresh_key and changed:
+                # Each table is loaded by one thread, so its set is never shared
+                refresh_values = self.touched.setdefault(model, set())
+                for values in changed:
+                    refresh_values.add(values[refresh_key])
+                    if values[key] in existing:
+                        refresh_values.add(existing[values[key]][refresh_key])
+            if changed:
+                # auto_now change markers (updated_at, read by core/columnar.py) move on update too
+                touched = [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+                if model is SpendEntry and is_partitioned():
+                    # ON CONFLICT (id) needs a unique index on id alone, and the partitioned
+                    # table's key is (id, date): replace the changed rows instead
+                    model._base_manager.filter(id__in=[values['id'] for values in changed])._raw_delete(model.objects.db)
+                    model.objects.bulk_create([model(**values) for values in changed])
+                else:
+                    model.objects.bulk_create(
+                        [model(**values) for values in changed],
+                        update_conflicts=True,
+                        unique_fields=[key],
+                        update_fields=compare_fields + touched,
                     )
-            self.stdout.write(self.style.SUCCESS("Supplier discounts loaded successfully."))
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: supplierdiscount.csv not found at {data_dir}"))
-            return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading supplier discounts: {e}"))
-            return
-
-
-        # --- Load Alternate Suppliers ---
-        self.stdout.write(self.style.SUCCESS("Loading Alternate Suppliers from alternatesupplier.csv..."))
+            if natural:
+                id_map = self.id_maps.setdefault(model, {})
+                for natural_value, db_id in model._base_manager.filter(**{f'{key}__in': list(csv_ids)}).values_list(key, 'id'):
+                    id_map[csv_ids[natural_value]] = db_id
+                self.loaded_ids[model].update(id_map[csv_ids[natural_value]] for natural_value in csv_ids)
+            else:
+                self.loaded_ids[model].update(csv_ids)
+        return inserted, updated, unchanged
+
+    def _prune(self):
+        """Deletes rows missing from the CSVs, children first, through the ORM so cascades apply."""
+        self.stdout.write(self.style.WARNING("Pruning rows that are no longer in the CSV files..."))
+        for spec in reversed(TABLE_SPECS):
+            key = self._match_key(spec)
+            seen = self.seen_keys.get(spec.model, set())
+            stale = (
+                value for value in spec.model._base_manager.values_list(key, flat=True).iterator(chunk_size=self.batch_size)
+                if value not in seen
+            )
+            deleted = 0
+            for batch in batched(stale, self.batch_size):
+                with transaction.atomic():
+                    spec.model.objects.filter(**{f'{key}__in': batch}).delete()
+                deleted += len(batch)
+            if deleted:
+                self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} {spec.label.lower()}."))
+
+    def _load_table(self, spec):
+        self.stdout.write(self.style.SUCCESS(f"Loading {spec.label} from {spec.filename}..."))
+        started = time.monotonic()
         try:
-            with open(os.path.join(data_dir, 'alternatesupplier.csv'), 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    primary_supplier_obj = suppliers_by_id.get(int(row['primary_supplier']))
-                    alternate_supplier_obj = None
-                    if row['alternate_supplier']: # Check if alternate_supplier exists in CSV
-                        alternate_supplier_obj = suppliers_by_id.get(int(row['alternate_supplier']))
-
-                    if not primary_supplier_obj:
-                        self.stdout.write(self.style.ERROR(f"Skipping Alternate Supplier for {row['product_name']}: Primary Supplier ID {row['primary_supplier']} not found."))
-                        continue
-
-                    AlternateSupplier.objects.create(
-                        id=int(row['id']),
-                        product_name=row['product_name'],
-                        primary_supplier=primary_supplier_obj,
-                        alternate_supplier=alternate_supplier_obj, # This can be None
-                        lead_time_days=int(row['lead_time_days'])
-                    )
-            self.stdout.write(self.style.SUCCESS("Alternate suppliers loaded successfully."))
+            self.loaded_ids[spec.model] = self._known_ids(spec)
+            rows = self._read_rows(spec)
+            if spec.self_fk:
+                rows = _parents_first(list(rows), spec.self_fk)
+
+            loaded_ids = set()
+
+            def track(values_iter):
+                for values in values_iter:
+                    loaded_ids.add(values['id'])
+                    yield values
+
+            if self.mode == 'upsert':
+                with transaction.atomic():
+                    inserted, updated, unchanged = self._upsert_rows(spec, rows)
+                count = inserted + updated + unchanged
+                self.inserted[spec.model] = inserted
+                loaded_ids = self.loaded_ids[spec.model]
+            elif self.mode == 'bulk':
+                with transaction.atomic():
+                    count = bulk_insert(spec.model, track(rows), batch_size=self.batch_size, use_copy=self.use_copy)
+            else:
+                count = 0
+                for values in track(rows):
+                    spec.model.objects.create(**values)
+                    count += 1
         except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Error: alternatesupplier.csv not found at {data_dir}"))
-            return
+            raise LoadError(f"Error: {spec.filename} not found at {self.data_dir}")
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error loading alternate suppliers: {e}"))
-            return
-
-
-        self.stdout.write(self.style.SUCCESS("✅ All sample brake manufacturing data loaded successfully from CSVs!"))
\ No newline at end of file
+            raise LoadError(f"Error loading {spec.label.lower()}: {e}")
+
+        self.loaded_ids[spec.model] = loaded_ids
+        elapsed = time.monotonic() - started
+        self.stats[spec.model] = (count, elapsed)
+        rate = count / elapsed if elapsed > 0 else float(count)
+        if self.mode == 'upsert':
+            self.stdout.write(self.style.SUCCESS(
+                f"{spec.label}: {inserted} inserted, {updated} updated, {unchanged} unchanged "
+                f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Loaded {count} {spec.label.lower()} in {elapsed:.2f}s ({rate:,.0f} rows/sec)."))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import SpendDailyRollup
+from core.rollups import rebuild_spend_rollups, verify_spend_rollups
+from core.versioning import bump_model_versions
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily spend rollups from SpendEntry and check them against the raw rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help="Only compare the existing rollups with SpendEntry; don't rebuild them.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            started = time.monotonic()
+            rows = rebuild_spend_rollups()
+            bump_model_versions(SpendDailyRollup)
+            self.stdout.write(f"Rebuilt {rows} rollup rows in {time.monotonic() - started:.2f}s.")
+
+        mismatches = verify_spend_rollups()
+        if mismatches:
+            for key, expected, actual in mismatches:
+                self.stdout.write(self.style.ERROR(
+                    f"(date, category, supplier, cost center) {key}: "
+                    f"expected (sum, count, min, max) {expected}, rollups have {actual}"
+                ))
+            raise CommandError("Spend rollups do not match SpendEntry.")
+        self.stdout.write(self.style.SUCCESS("Spend rollups match SpendEntry."))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from core.models import SupplierScorecard
+from core.scorecards import rebuild_supplier_scorecards, refresh_supplier_scorecards
+
+
+class Command(BaseCommand):
+    help = "Recompute the supplier scorecards from the invoices and purchase orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--supplier', type=int, action='append', default=[],
+                            help="Only this supplier's scorecards (repeatable).")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        using = options['database']
+        if options['supplier']:
+            refresh_supplier_scorecards(options['supplier'], using=using)
+            row_count = SupplierScorecard.objects.using(using).filter(supplier_id__in=options['supplier']).count()
+        else:
+            row_count = rebuild_supplier_scorecards(using=using)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {row_count} supplier scorecard rows in {time.monotonic() - started:.2f}s."
+        ))
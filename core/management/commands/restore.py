@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.snapshots import restore_snapshot
+
+
+class Command(BaseCommand):
+    help = "Replace the contents of every core table with a snapshot written by `manage.py snapshot`."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Snapshot file to load")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING("Replacing existing data..."))
+        started = time.monotonic()
+        try:
+            row_counts = restore_snapshot(options['path'], using=options['database'])
+        except (ValueError, OSError) as e:
+            raise CommandError(f"Restore failed, nothing was changed: {e}")
+        for table, row_count in row_counts.items():
+            self.stdout.write(f"  {table:<36} {row_count:>10} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {sum(row_counts.values())} rows from {options['path']} in {time.monotonic() - started:.2f}s."
+        ))
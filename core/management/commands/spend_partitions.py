@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from core.partitions import ensure_spend_partitions, is_partitioned, split_default_partition, next_month
+
+
+class Command(BaseCommand):
+    help = "Create the monthly SpendEntry partitions for the coming months (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help="Months after the current one to create partitions for (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            self.stdout.write("core_spendentry is not partitioned on this database; nothing to do.")
+            return
+        # Anything that already landed in the DEFAULT partition gets its own month first
+        created = split_default_partition()
+        end = date.today()
+        for _ in range(options['months_ahead']):
+            end = next_month(end)
+        created += ensure_spend_partitions(date.today(), end)
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partition(s) created."))
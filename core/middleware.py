@@ -0,0 +1,21 @@
+# core/middleware.py
+"""Project middleware."""
+from django.middleware.gzip import GZipMiddleware
+
+# Formats that are compressed already: gzipping them again only costs CPU
+PRECOMPRESSED_CONTENT_TYPES = (
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/zip',
+    'application/gzip',
+    'application/vnd.apache.parquet',
+)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves already-compressed downloads alone."""
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type in PRECOMPRESSED_CONTENT_TYPES:
+            return response
+        return super().process_response(request, response)
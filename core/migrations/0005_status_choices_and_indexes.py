@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+# Canonical statuses at the time of this migration (core.models.InvoiceStatus / PurchaseOrderStatus)
+INVOICE_STATUSES = ['Pending', 'Paid', 'Overdue']
+PURCHASE_ORDER_STATUSES = ['Pending', 'Approved', 'Issued', 'Delivered', 'Cancelled']
+
+
+def _canonicalize(model, statuses):
+    """
+    One UPDATE per distinct stored value: case and surrounding spaces are normalized,
+    values that match no status become 'Pending' so the new check constraint holds.
+    """
+    canonical = {status.lower(): status for status in statuses}
+    for value in model.objects.values_list('status', flat=True).distinct():
+        status = canonical.get((value or '').strip().lower(), 'Pending')
+        if status != value:
+            model.objects.filter(status=value).update(status=status)
+
+
+def canonicalize_statuses(apps, schema_editor):
+    _canonicalize(apps.get_model('core', 'Invoice'), INVOICE_STATUSES)
+    _canonicalize(apps.get_model('core', 'PurchaseOrder'), PURCHASE_ORDER_STATUSES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_rename_discount_name_supplierdiscount_product_name_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalize_statuses, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='invoice',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Paid', 'Paid'), ('Overdue', 'Overdue')], default='Pending', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Approved', 'Approved'), ('Issued', 'Issued'), ('Delivered', 'Delivered'), ('Cancelled', 'Cancelled')], default='Pending', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'amount'], name='core_invoice_status_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status', 'amount'], name='core_po_status_amount_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.CheckConstraint(condition=models.Q(('status__in', ['Pending', 'Paid', 'Overdue'])), name='core_invoice_status_valid'),
+        ),
+        migrations.AddConstraint(
+            model_name='purchaseorder',
+            constraint=models.CheckConstraint(condition=models.Q(('status__in', ['Pending', 'Approved', 'Issued', 'Delivered', 'Cancelled'])), name='core_po_status_valid'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+from core.partitions import rebuild_spend_table
+
+
+def partition_spend_entries(apps, schema_editor):
+    # PostgreSQL only; a no-op elsewhere
+    rebuild_spend_table(schema_editor, apps.get_model('core', 'SpendEntry'), partitioned=True)
+
+
+def unpartition_spend_entries(apps, schema_editor):
+    rebuild_spend_table(schema_editor, apps.get_model('core', 'SpendEntry'), partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_status_choices_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='spendentry',
+            index=models.Index(fields=['date', 'category'], name='core_spend_date_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spendentry',
+            index=models.Index(fields=['date', 'supplier'], name='core_spend_date_supplier_idx'),
+        ),
+        migrations.RunPython(partition_spend_entries, unpartition_spend_entries),
+    ]
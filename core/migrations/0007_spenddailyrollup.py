@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    # Same statement as core.rollups.rebuild_spend_rollups(), against the tables as they are here
+    schema_editor.execute(
+        "INSERT INTO core_spenddailyrollup "
+        "(date, category_id, supplier_id, cost_center, total_amount, entry_count, min_amount, max_amount) "
+        "SELECT date, category_id, supplier_id, cost_center, SUM(amount), COUNT(*), MIN(amount), MAX(amount) "
+        "FROM core_spendentry GROUP BY date, category_id, supplier_id, cost_center"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_spendentry_date_indexes_and_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('cost_center', models.CharField(max_length=100)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('entry_count', models.IntegerField()),
+                ('min_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('max_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='spend_rollups', to='core.category')),
+                ('supplier', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='spend_rollups', to='core.supplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='core_spend_rollup_date_idx')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
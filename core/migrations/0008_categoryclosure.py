@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    # Same statements as core.closure.rebuild_category_closure(): self links, then one level at a time
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO core_categoryclosure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM core_category"
+        )
+        depth = 0
+        while cursor.rowcount:
+            cursor.execute(
+                "INSERT INTO core_categoryclosure (ancestor_id, descendant_id, depth) "
+                "SELECT path.ancestor_id, child.id, %s FROM core_categoryclosure path "
+                "JOIN core_category child ON child.parent_id = path.descendant_id WHERE path.depth = %s",
+                [depth + 1, depth],
+            )
+            depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_spenddailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='core.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='core.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='core_closure_descendant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='core_category_closure_unique')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_updated_at_change_markers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100)),
+                ('format', models.CharField(default='xlsx', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('dedup_key', models.CharField(max_length=40)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed'), ('Expired', 'Expired')], default='Pending', max_length=20)),
+                ('rows_total', models.IntegerField(blank=True, null=True)),
+                ('rows_processed', models.IntegerField(default=0)),
+                ('file_path', models.CharField(blank=True, max_length=500)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['Pending', 'Running'])), fields=('dedup_key',), name='core_exportjob_one_active_per_key')],
+            },
+        ),
+    ]
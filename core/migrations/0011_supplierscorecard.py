@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierScorecard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('invoice_count', models.IntegerField()),
+                ('po_count', models.IntegerField()),
+                ('spend_amount', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('on_time_rate', models.FloatField(null=True)),
+                ('avg_days_to_pay', models.FloatField(null=True)),
+                ('overdue_ratio', models.FloatField(null=True)),
+                ('cancellation_rate', models.FloatField(null=True)),
+                ('score', models.FloatField(null=True)),
+                ('computed_at', models.DateTimeField()),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scorecards', to='core.supplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'score'], name='core_scorecard_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'period'), name='core_scorecard_supplier_period_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_supplierscorecard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RowDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=100)),
+                ('row_id', models.BigIntegerField(null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['table_name', 'id'], name='core_rowdeletion_table_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,40 @@
 # core/models.py
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
+
+
+class PurchaseOrderStatus(models.TextChoices):
+    PENDING = 'Pending'
+    APPROVED = 'Approved'
+    ISSUED = 'Issued'
+    DELIVERED = 'Delivered'
+    CANCELLED = 'Cancelled'
+
+
+class InvoiceStatus(models.TextChoices):
+    PENDING = 'Pending'
+    PAID = 'Paid'
+    OVERDUE = 'Overdue'
+
+
+class ExportJobStatus(models.TextChoices):
+    PENDING = 'Pending'
+    RUNNING = 'Running'
+    DONE = 'Done'
+    FAILED = 'Failed'
+    EXPIRED = 'Expired'
+
+
+def normalize_status(choices, value):
+    """The canonical value of `choices` matching `value` (ignoring case and spaces), or None."""
+    value = (value or '').strip().lower()
+    for choice in choices.values:
+        if choice.lower() == value:
+            return choice
+    return None
+
 
 class Supplier(models.Model):
     # AutoField 'id' is implicit as Django's primary key by default
@@ -26,10 +61,32 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
 
+    def clean(self):
+        # The closure table can't represent a cycle, so reject them in forms (and the admin)
+        if self.pk and self.parent_id and CategoryClosure.objects.filter(ancestor_id=self.pk, descendant_id=self.parent_id).exists():
+            raise ValidationError({'parent': "A category can't be placed under itself or one of its subcategories."})
+
     def __str__(self):
         return self.name
 
 
+class CategoryClosure(models.Model):
+    # One row per (ancestor, descendant) pair of the category tree, including each category
+    # with itself at depth 0. Maintained by core/closure.py; lets a subtree be read with one join.
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='core_category_closure_unique'),
+        ]
+        indexes = [models.Index(fields=['descendant', 'ancestor'], name='core_closure_descendant_idx')]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
 class PurchaseOrder(models.Model):
     # AutoField 'id' is implicit
     po_number = models.CharField(max_length=100, unique=True)
@@ -37,7 +94,14 @@ class PurchaseOrder(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     issue_date = models.DateField()
-    status = models.CharField(max_length=50)
+    status = models.CharField(max_length=50, choices=PurchaseOrderStatus.choices, default=PurchaseOrderStatus.PENDING)
+
+    class Meta:
+        # (status, amount) answers the per-status counts and sums from the index alone
+        indexes = [models.Index(fields=['status', 'amount'], name='core_po_status_amount_idx')]
+        constraints = [
+            models.CheckConstraint(condition=Q(status__in=PurchaseOrderStatus.values), name='core_po_status_valid'),
+        ]
 
     def __str__(self):
         return self.po_number
@@ -52,7 +116,14 @@ class Invoice(models.Model):
     due_date = models.DateField()
     paid_date = models.DateField(null=True, blank=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
-    status = models.CharField(max_length=50)
+    status = models.CharField(max_length=50, choices=InvoiceStatus.choices, default=InvoiceStatus.PENDING)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True) # Change marker for core/columnar.py
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'amount'], name='core_invoice_status_amount_idx')]
+        constraints = [
+            models.CheckConstraint(condition=Q(status__in=InvoiceStatus.values), name='core_invoice_status_valid'),
+        ]
 
     def __str__(self):
         return self.invoice_number
@@ -66,12 +137,66 @@ class SpendEntry(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     cost_center = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True) # Change marker for core/columnar.py
+
+    class Meta:
+        # Date-bounded analytics group by category or supplier. On PostgreSQL the table
+        # is also partitioned by month on `date` (see core/partitions.py).
+        indexes = [
+            models.Index(fields=['date', 'category'], name='core_spend_date_category_idx'),
+            models.Index(fields=['date', 'supplier'], name='core_spend_date_supplier_idx'),
+        ]
 
     def __str__(self):
         # Added __str__ for SpendEntry for better admin readability
         return f"Spend on {self.category.name if self.category else 'N/A'} by {self.supplier.name if self.supplier else 'N/A'} on {self.date}"
 
 
+class SpendDailyRollup(models.Model):
+    # Spend per day, category, supplier and cost center, maintained from SpendEntry by core/rollups.py.
+    # Deleting a category or supplier nulls the key here just like on SpendEntry.
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='spend_rollups')
+    supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, related_name='spend_rollups')
+    cost_center = models.CharField(max_length=100)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2)
+    entry_count = models.IntegerField()
+    min_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    max_amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        indexes = [models.Index(fields=['date'], name='core_spend_rollup_date_idx')]
+
+    def __str__(self):
+        return f"Spend rollup for {self.date} ({self.entry_count} entries)"
+
+
+class SupplierScorecard(models.Model):
+    # Payment and ordering performance per supplier and month with activity, computed from
+    # Invoice and PurchaseOrder by core/scorecards.py. Counts and spend cover the month; the
+    # rates cover the supplier's last SCORECARD_WINDOW_MONTHS active months up to it.
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name='scorecards')
+    period = models.DateField() # First day of the month
+    invoice_count = models.IntegerField()
+    po_count = models.IntegerField()
+    spend_amount = models.DecimalField(max_digits=16, decimal_places=2) # Non-cancelled PO amounts issued
+    on_time_rate = models.FloatField(null=True) # Share of paid invoices paid by the due date
+    avg_days_to_pay = models.FloatField(null=True) # Invoice date to paid date, paid invoices only
+    overdue_ratio = models.FloatField(null=True) # Share of invoices paid late or marked overdue
+    cancellation_rate = models.FloatField(null=True) # Share of POs cancelled
+    score = models.FloatField(null=True) # 0-10, weighted from the rates (SCORE_WEIGHTS)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['supplier', 'period'], name='core_scorecard_supplier_period_unique'),
+        ]
+        indexes = [models.Index(fields=['period', 'score'], name='core_scorecard_period_idx')]
+
+    def __str__(self):
+        return f"Scorecard for supplier {self.supplier_id}, {self.period:%Y-%m}"
+
+
 class SupplierProductPricing(models.Model):
     # AutoField 'id' is implicit
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE)
@@ -116,4 +241,48 @@ class AlternateSupplier(models.Model):
     lead_time_days = models.IntegerField()
 
     def __str__(self):
-        return f"Alt Supplier for {self.product_name}: {self.alternate_supplier.name if self.alternate_supplier else 'N/A'}"
\ No newline at end of file
+        return f"Alt Supplier for {self.product_name}: {self.alternate_supplier.name if self.alternate_supplier else 'N/A'}"
+
+class ExportJob(models.Model):
+    # A background export (core/export_jobs.py): what to export, progress, and the finished file
+    model_name = models.CharField(max_length=100) # Key of MODEL_MAP in core/views.py
+    format = models.CharField(max_length=20, default='xlsx')
+    params = models.JSONField(default=dict, blank=True) # e.g. the date range
+    dedup_key = models.CharField(max_length=40) # Hash of model_name, format and params
+    status = models.CharField(max_length=20, choices=ExportJobStatus.choices, default=ExportJobStatus.PENDING)
+    rows_total = models.IntegerField(null=True, blank=True)
+    rows_processed = models.IntegerField(default=0)
+    file_path = models.CharField(max_length=500, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            # At most one queued or running job per identical request: the rest reuse it
+            models.UniqueConstraint(
+                fields=['dedup_key'], condition=Q(status__in=['Pending', 'Running']),
+                name='core_exportjob_one_active_per_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Export of {self.model_name} as {self.format} ({self.status})"
+
+
+class RowDeletion(models.Model):
+    # Tombstone for a deleted SpendEntry or Invoice row, read by core/columnar.py to drop it
+    # from its in-memory copy. A NULL row_id means every row of the table was replaced.
+    table_name = models.CharField(max_length=100) # db_table of the model
+    row_id = models.BigIntegerField(null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['table_name', 'id'], name='core_rowdeletion_table_idx')]
+
+    def __str__(self):
+        return f"Deletion of {self.table_name} row {self.row_id}"
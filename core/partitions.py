@@ -0,0 +1,181 @@
+# core/partitions.py
+"""
+Monthly range partitioning of core_spendentry on PostgreSQL.
+
+Migration 0006 rebuilds the table as PARTITION BY RANGE ("date") with one partition per
+month plus a DEFAULT partition, so queries bounded on date (the date-range filter on the
+summary and list pages) only scan the months they need. Django is not aware of the
+partitioning: the model keeps `id` as its primary key, while the table's primary key is
+(id, date) because PostgreSQL requires the partition key in every unique constraint.
+`id` still comes from a single sequence, so it stays unique.
+
+Rows for a month without a partition land in the DEFAULT partition; load_brake_data
+calls split_default_partition() afterwards and `manage.py spend_partitions` creates the
+upcoming months ahead of time. On other databases every function here is a no-op.
+"""
+from datetime import date
+
+from django.core.management.color import no_style
+from django.db import connections, DEFAULT_DB_ALIAS
+
+SPEND_TABLE = 'core_spendentry'
+PARTITION_COLUMN = 'date'
+DEFAULT_PARTITION = f'{SPEND_TABLE}_default'
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _months(start, end):
+    """First day of every month from `start` to `end`, inclusive."""
+    month = _month_start(start)
+    while month <= end:
+        yield month
+        month = next_month(month)
+
+
+def _partition_name(month):
+    return f'{SPEND_TABLE}_p{month.year}_{month.month:02d}'
+
+
+def is_partitioned(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [SPEND_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def _existing_partitions(cursor):
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+        [SPEND_TABLE],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_spend_partitions(start, end, using=DEFAULT_DB_ALIAS):
+    """
+    Creates the monthly partitions covering `start`..`end` that don't exist yet.
+    Rows already sitting in the DEFAULT partition for those months are moved into them.
+    Returns the names of the partitions created.
+    """
+    if not is_partitioned(using):
+        return []
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    created = []
+    with connection.cursor() as cursor:
+        existing = _existing_partitions(cursor)
+        for month in _months(start, end):
+            name = _partition_name(month)
+            if name in existing:
+                continue
+            bounds = [month.isoformat(), next_month(month).isoformat()]
+            # Build the partition on its own, move its rows out of DEFAULT, then attach it:
+            # attaching fails while DEFAULT still holds rows for the new range
+            cursor.execute(
+                f"CREATE TABLE {quote(name)} (LIKE {quote(SPEND_TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION)} "
+                f"WHERE {quote(PARTITION_COLUMN)} >= %s AND {quote(PARTITION_COLUMN)} < %s RETURNING *) "
+                f"INSERT INTO {quote(name)} SELECT * FROM moved",
+                bounds,
+            )
+            cursor.execute(
+                f"ALTER TABLE {quote(SPEND_TABLE)} ATTACH PARTITION {quote(name)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+            created.append(name)
+    return created
+
+
+def split_default_partition(using=DEFAULT_DB_ALIAS):
+    """Gives every month found in the DEFAULT partition a partition of its own."""
+    if not is_partitioned(using):
+        return []
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT MIN({quote(PARTITION_COLUMN)}), MAX({quote(PARTITION_COLUMN)}) FROM {quote(DEFAULT_PARTITION)}"
+        )
+        first, last = cursor.fetchone()
+    if first is None:
+        return []
+    return ensure_spend_partitions(first, last, using)
+
+
+def _recreate_constraints(cursor, connection, constraints, partitioned):
+    """Re-adds the primary key, foreign keys and indexes read from the old table."""
+    quote = connection.ops.quote_name
+    table = quote(SPEND_TABLE)
+    for name, info in constraints.items():
+        columns = list(info['columns'])
+        if partitioned and (info['primary_key'] or info['unique']) and PARTITION_COLUMN not in columns:
+            columns.append(PARTITION_COLUMN)
+        column_sql = ', '.join(quote(column) for column in columns)
+        if info['primary_key']:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {quote(name)} PRIMARY KEY ({column_sql})")
+        elif info['foreign_key']:
+            target_table, target_column = info['foreign_key']
+            cursor.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {quote(name)} FOREIGN KEY ({column_sql}) "
+                f"REFERENCES {quote(target_table)} ({quote(target_column)}) DEFERRABLE INITIALLY DEFERRED"
+            )
+        elif info['unique']:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {quote(name)} UNIQUE ({column_sql})")
+        elif info['index']:
+            cursor.execute(f"CREATE INDEX {quote(name)} ON {table} ({column_sql})")
+        # CHECK constraints are copied by LIKE ... INCLUDING CONSTRAINTS
+
+
+def rebuild_spend_table(schema_editor, spend_model, partitioned):
+    """
+    Rebuilds core_spendentry as a partitioned (or, for the reverse migration, plain) table,
+    copying every row and recreating the keys and indexes under their original names.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    table = quote(SPEND_TABLE)
+    old_table = quote(f'{SPEND_TABLE}_old')
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, SPEND_TABLE)
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old_table}")
+        like = f"LIKE {old_table} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS"
+        if partitioned:
+            cursor.execute(f"CREATE TABLE {table} ({like}) PARTITION BY RANGE ({quote(PARTITION_COLUMN)})")
+            cursor.execute(f"CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {table} DEFAULT")
+            cursor.execute(f"SELECT MIN({quote(PARTITION_COLUMN)}), MAX({quote(PARTITION_COLUMN)}) FROM {old_table}")
+            first, last = cursor.fetchone()
+            for month in (_months(first, last) if first else []):
+                cursor.execute(
+                    f"CREATE TABLE {quote(_partition_name(month))} PARTITION OF {table} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [month.isoformat(), next_month(month).isoformat()],
+                )
+        else:
+            cursor.execute(f"CREATE TABLE {table} ({like})")
+        cursor.execute(f"INSERT INTO {table} OVERRIDING SYSTEM VALUE SELECT * FROM {old_table}")
+        # Dropping the old table frees the index and constraint names for the new one
+        cursor.execute(f"DROP TABLE {old_table}")
+        _recreate_constraints(cursor, connection, constraints, partitioned)
+        # The copied identity column starts a new sequence; move it past the copied ids
+        for sql in connection.ops.sequence_reset_sql(no_style(), [spend_model]):
+            cursor.execute(sql)
@@ -0,0 +1,142 @@
+# core/rollups.py
+"""
+Daily spend rollups: one SpendDailyRollup row per (date, category, supplier, cost_center)
+holding the sum, count, min and max of the matching SpendEntry amounts.
+
+The dashboard's spend figures read these instead of the raw entries. They are kept
+current by:
+  - the SpendEntry signals in core/signals.py, which recompute the affected days
+    inside the same transaction as the write (refresh_spend_rollups);
+  - load_brake_data, which suspends the signals while loading and then rebuilds
+    everything in one INSERT ... SELECT (rebuild_spend_rollups);
+  - `manage.py rebuild_spend_rollups`, which rebuilds and verifies them.
+Code that changes SpendEntry rows without signals (queryset.update(), bulk_create,
+raw SQL) must call refresh_spend_rollups() for the days it touched.
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Sum, Count, Min, Max
+
+from .models import SpendEntry, SpendDailyRollup
+
+ROLLUP_KEY = ('date', 'category_id', 'supplier_id', 'cost_center')
+# First key of the PostgreSQL advisory locks taken per refreshed day (the second is the day)
+ROLLUP_LOCK_ID = 710_001
+REFRESH_BATCH_SIZE = 500 # Days per refresh statement (one parameter each)
+
+_suspended = threading.local()
+
+
+@contextmanager
+def rollups_suspended():
+    """
+    Skips the per-write refresh of the rollups and the supplier scorecards (core/scorecards.py)
+    in this thread, e.g. while loading whole tables.
+    """
+    previous = getattr(_suspended, 'active', False)
+    _suspended.active = True
+    try:
+        yield
+    finally:
+        _suspended.active = previous
+
+
+def rollups_are_suspended():
+    return getattr(_suspended, 'active', False)
+
+
+def _insert_select_sql(connection, where=''):
+    """INSERT ... SELECT that regroups SpendEntry rows into the rollup table."""
+    quote = connection.ops.quote_name
+    source = SpendEntry._meta
+    target = SpendDailyRollup._meta
+    key_columns = ', '.join(quote(source.get_field(name).column) for name in ROLLUP_KEY)
+    target_key_columns = ', '.join(quote(target.get_field(name).column) for name in ROLLUP_KEY)
+    amount = quote(source.get_field('amount').column)
+    return (
+        f"INSERT INTO {quote(target.db_table)} "
+        f"({target_key_columns}, {quote('total_amount')}, {quote('entry_count')}, {quote('min_amount')}, {quote('max_amount')}) "
+        f"SELECT {key_columns}, SUM({amount}), COUNT(*), MIN({amount}), MAX({amount}) "
+        f"FROM {quote(source.db_table)} {where} GROUP BY {key_columns}"
+    )
+
+
+def _lock_days(connection, days):
+    """
+    Serializes refreshes of the same day on PostgreSQL (SQLite only has one writer), so two
+    transactions can't both delete the old rows and insert their own copy of the day.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for day in sorted(days):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ROLLUP_LOCK_ID, day.toordinal()])
+
+
+def refresh_spend_rollups(days, using=DEFAULT_DB_ALIAS):
+    """Recomputes the rollup rows of the given days from SpendEntry, REFRESH_BATCH_SIZE days per statement."""
+    days = sorted({day for day in days if day is not None})
+    if not days:
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    date_column = quote(SpendEntry._meta.get_field('date').column)
+    with transaction.atomic(using=using):
+        for start in range(0, len(days), REFRESH_BATCH_SIZE):
+            batch = days[start:start + REFRESH_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            params = [connection.ops.adapt_datefield_value(day) for day in batch]
+            _lock_days(connection, batch)
+            SpendDailyRollup.objects.using(using).filter(date__in=batch)._raw_delete(using)
+            with connection.cursor() as cursor:
+                cursor.execute(_insert_select_sql(connection, f"WHERE {date_column} IN ({placeholders})"), params)
+
+
+def rebuild_spend_rollups(using=DEFAULT_DB_ALIAS):
+    """Replaces every rollup row with a fresh aggregate of SpendEntry. Returns the row count."""
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        SpendDailyRollup.objects.using(using).all()._raw_delete(using)
+        with connection.cursor() as cursor:
+            cursor.execute(_insert_select_sql(connection))
+    return SpendDailyRollup.objects.using(using).count()
+
+
+def _cents(value):
+    # SQLite sums decimals as floats, so compare amounts at their stored precision
+    return Decimal(value).quantize(Decimal('0.01')) if value is not None else None
+
+
+def _group_values(row):
+    return (_cents(row['total']), row['count'], _cents(row['low']), _cents(row['high']))
+
+
+def verify_spend_rollups(using=DEFAULT_DB_ALIAS, limit=20):
+    """
+    Compares the rollups with a fresh aggregate of SpendEntry.
+    Returns up to `limit` (key, expected, actual) tuples for the groups that differ.
+    """
+    expected = {
+        tuple(row[name] for name in ROLLUP_KEY): _group_values(row)
+        for row in SpendEntry.objects.using(using).values(*ROLLUP_KEY).order_by().annotate(
+            total=Sum('amount'), count=Count('id'), low=Min('amount'), high=Max('amount'),
+        )
+    }
+    # Deleting a category or supplier nulls its key on both tables, so groups can be split
+    # over several rollup rows; regroup before comparing
+    actual = {
+        tuple(row[name] for name in ROLLUP_KEY): _group_values(row)
+        for row in SpendDailyRollup.objects.using(using).values(*ROLLUP_KEY).order_by().annotate(
+            total=Sum('total_amount'), count=Sum('entry_count'), low=Min('min_amount'), high=Max('max_amount'),
+        )
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        if expected.get(key) != actual.get(key):
+            mismatches.append((key, expected.get(key), actual.get(key)))
+            if len(mismatches) >= limit:
+                break
+    return mismatches
@@ -0,0 +1,155 @@
+# core/routers.py
+"""
+Read-replica routing for the analytics and export traffic.
+
+Reads go to the primary ('default') unless the running view is marked with
+@use_replica, in which case they go to one of the READ_REPLICAS aliases. Writes always
+go to the primary, and so does everything that must see its own writes:
+  - views marked @use_primary (edits, deletes) and any non-GET/HEAD request
+    (ReplicaRoutingMiddleware);
+  - reads inside a transaction on the primary;
+  - for REPLICA_PIN_SECONDS after a request wrote, every request from the same client
+    (a cookie set by the middleware), so a user never sees the page from before their
+    own change while the replica catches up.
+A replica that fails to connect is skipped for REPLICA_RETRY_SECONDS. Results computed
+on a replica shortly after a write are cached only briefly (core/versioning.py), since
+the replica may not have the write yet.
+
+The state lives in contextvars, so it follows async views into sync_to_async threads.
+
+To try it locally without PostgreSQL, set DATABASE_SQLITE=1: settings.py then uses
+primary.sqlite3 and replica.sqlite3 (a test mirror of the primary, so the test suite
+runs on one database). `migrate`, then copy primary.sqlite3 to replica.sqlite3 to
+"replicate".
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+REPLICA_PIN_COOKIE = 'pin_primary'
+REPLICA_PIN_SECONDS = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+REPLICA_RETRY_SECONDS = getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+# How far behind the primary a replica may be; see cached_aggregate() in core/versioning.py
+REPLICA_MAX_LAG_SECONDS = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30)
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+_wrote = contextvars.ContextVar('wrote_to_primary', default=None)
+
+logger = logging.getLogger(__name__)
+
+_down_until = {} # alias -> time.monotonic() until which the replica is skipped
+
+
+def read_replicas():
+    return [alias for alias in getattr(settings, 'READ_REPLICAS', []) if alias in settings.DATABASES]
+
+
+def _healthy(alias):
+    if time.monotonic() < _down_until.get(alias, 0):
+        return False
+    try:
+        connections[alias].ensure_connection() # No-op while the (persistent) connection is open
+    except DatabaseError:
+        _down_until[alias] = time.monotonic() + REPLICA_RETRY_SECONDS
+        logger.warning("Replica %s unavailable; using the primary for %ss", alias, REPLICA_RETRY_SECONDS, exc_info=True)
+        return False
+    return True
+
+
+def replica_for_read():
+    """The replica alias reads would go to right now, or None for the primary."""
+    if not _use_replica.get() or _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return None
+    replicas = [alias for alias in read_replicas() if _healthy(alias)]
+    return random.choice(replicas) if replicas else None
+
+
+class ReplicaRouter:
+    """Sends marked reads to a replica; everything else, and every write, to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return replica_for_read() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote[0] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True # Replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in read_replicas() # Replicas get their schema through replication
+
+
+@contextmanager
+def replica_reads():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def pinned_to_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def _routing_decorator(context):
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(*args, **kwargs):
+                with context():
+                    return await view(*args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                with context():
+                    return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# View decorators: analytics and exports read from a replica; read-after-write views don't
+use_replica = _routing_decorator(replica_reads)
+use_primary = _routing_decorator(pinned_to_primary)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Pins unsafe requests, and for a short while every request from a client that just
+    wrote, to the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin = request.method not in ('GET', 'HEAD') or REPLICA_PIN_COOKIE in request.COOKIES
+        wrote = [False]
+        wrote_token = _wrote.set(wrote)
+        pin_token = _pinned.set(True) if pin else None
+        try:
+            response = self.get_response(request)
+        finally:
+            _wrote.reset(wrote_token)
+            if pin_token is not None:
+                _pinned.reset(pin_token)
+        if wrote[0] and read_replicas():
+            response.set_cookie(REPLICA_PIN_COOKIE, '1', max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,297 @@
+# core/scorecards.py
+"""
+Supplier scorecards: on-time payment rate, average days to pay, overdue ratio, PO
+cancellation rate and spend, per supplier and month (SupplierScorecard).
+
+Every refresh is one DELETE and one INSERT ... SELECT, whatever the number of suppliers:
+  1. invoices and purchase orders are grouped per (supplier, month) into counts and sums;
+  2. window functions (SUM(...) OVER the supplier's rows ordered by month) turn those into
+     rates over the last SCORECARD_WINDOW_MONTHS months with activity, so a quiet month
+     doesn't swing the score;
+  3. the score is the weighted mean of the rates available (SCORE_WEIGHTS), on a 0-10 scale.
+A supplier's rows depend only on its own invoices and orders, so refreshing some
+suppliers leaves the others' rows valid. The Invoice and PurchaseOrder signals in
+core/signals.py queue the suppliers they touch (mark_suppliers_changed) and the refresh
+runs for all of them once the transaction commits. Writes that skip signals must call
+refresh_supplier_scorecards() themselves; load_brake_data rebuilds everything.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, Window
+from django.db.models.functions import Rank, RowNumber
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Invoice, InvoiceStatus, PurchaseOrder, PurchaseOrderStatus, Supplier, SupplierScorecard
+from .versioning import bump_model_versions, cached_aggregate
+
+SCORECARD_WINDOW_MONTHS = 3
+# Rate -> (weight, whether a higher rate is better)
+SCORE_WEIGHTS = {
+    'on_time_rate': (0.4, True),
+    'overdue_ratio': (0.3, False),
+    'cancellation_rate': (0.3, False),
+}
+REFRESH_BATCH_SIZE = 500 # Suppliers per statement (each id is a parameter, twice)
+# First key of the PostgreSQL advisory locks taken per refreshed supplier
+SCORECARD_LOCK_ID = 710_002
+
+SCORECARD_PAGE_SIZE = 100 # Rows per page of the scorecard endpoint, by default
+MAX_SCORECARD_PAGE_SIZE = 1000
+
+# Models the scorecard endpoint reads (the supplier names come from Supplier)
+SCORECARD_DEPENDENCIES = (SupplierScorecard, Supplier)
+
+def _month_sql(connection, column):
+    if connection.vendor == 'sqlite':
+        return f"date({column}, 'start of month')"
+    return f"CAST(DATE_TRUNC('month', {column}) AS date)"
+
+
+def _days_between_sql(connection, later, earlier):
+    if connection.vendor == 'sqlite':
+        return f"(julianday({later}) - julianday({earlier}))"
+    return f"({later} - {earlier})" # date - date is a number of days on PostgreSQL
+
+
+def _score_sql():
+    """Weighted mean of the non-NULL rates, times 10; NULL when none is known."""
+    parts, weights = [], []
+    for rate, (weight, higher_is_better) in SCORE_WEIGHTS.items():
+        value = rate if higher_is_better else f"(1 - {rate})"
+        parts.append(f"{weight} * COALESCE({value}, 0)")
+        weights.append(f"CASE WHEN {rate} IS NULL THEN 0 ELSE {weight} END")
+    return f"10 * ({' + '.join(parts)}) / NULLIF({' + '.join(weights)}, 0)"
+
+
+def _refresh_sql(connection, supplier_count=None):
+    """
+    The INSERT ... SELECT computing the scorecard rows, of every supplier or (with
+    `supplier_count`) of the suppliers whose ids are passed as parameters. See _params().
+    """
+    quote = connection.ops.quote_name
+    invoice = quote(Invoice._meta.db_table)
+    order = quote(PurchaseOrder._meta.db_table)
+    where = ''
+    if supplier_count is not None:
+        where = f"WHERE supplier_id IN ({', '.join(['%s'] * supplier_count)})"
+    window = (
+        f"PARTITION BY supplier_id ORDER BY period "
+        f"ROWS BETWEEN {SCORECARD_WINDOW_MONTHS - 1} PRECEDING AND CURRENT ROW"
+    )
+
+    def rate(numerator, denominator):
+        return f"1.0 * SUM({numerator}) OVER ({window}) / NULLIF(SUM({denominator}) OVER ({window}), 0)"
+
+    return f"""
+        WITH invoice_months AS (
+            SELECT supplier_id, {_month_sql(connection, 'invoice_date')} AS period,
+                   COUNT(*) AS invoice_count,
+                   COUNT(paid_date) AS paid_count,
+                   SUM(CASE WHEN paid_date <= due_date THEN 1 ELSE 0 END) AS on_time_count,
+                   SUM(CASE WHEN paid_date > due_date OR (paid_date IS NULL AND status = %s) THEN 1 ELSE 0 END) AS overdue_count,
+                   SUM({_days_between_sql(connection, 'paid_date', 'invoice_date')}) AS days_to_pay
+            FROM {invoice} {where}
+            GROUP BY supplier_id, {_month_sql(connection, 'invoice_date')}
+        ),
+        order_months AS (
+            SELECT supplier_id, {_month_sql(connection, 'issue_date')} AS period,
+                   COUNT(*) AS po_count,
+                   SUM(CASE WHEN status = %s THEN 1 ELSE 0 END) AS cancelled_count,
+                   SUM(CASE WHEN status = %s THEN 0 ELSE amount END) AS spend_amount
+            FROM {order} {where}
+            GROUP BY supplier_id, {_month_sql(connection, 'issue_date')}
+        ),
+        months AS (
+            SELECT keys.supplier_id, keys.period,
+                   COALESCE(i.invoice_count, 0) AS invoice_count, COALESCE(i.paid_count, 0) AS paid_count,
+                   COALESCE(i.on_time_count, 0) AS on_time_count, COALESCE(i.overdue_count, 0) AS overdue_count,
+                   i.days_to_pay,
+                   COALESCE(o.po_count, 0) AS po_count, COALESCE(o.cancelled_count, 0) AS cancelled_count,
+                   COALESCE(o.spend_amount, 0) AS spend_amount
+            FROM (SELECT supplier_id, period FROM invoice_months
+                  UNION SELECT supplier_id, period FROM order_months) keys
+            LEFT JOIN invoice_months i ON i.supplier_id = keys.supplier_id AND i.period = keys.period
+            LEFT JOIN order_months o ON o.supplier_id = keys.supplier_id AND o.period = keys.period
+        ),
+        rates AS (
+            SELECT supplier_id, period, invoice_count, po_count, spend_amount,
+                   {rate('on_time_count', 'paid_count')} AS on_time_rate,
+                   {rate('days_to_pay', 'paid_count')} AS avg_days_to_pay,
+                   {rate('overdue_count', 'invoice_count')} AS overdue_ratio,
+                   {rate('cancelled_count', 'po_count')} AS cancellation_rate
+            FROM months
+        )
+        INSERT INTO {quote(SupplierScorecard._meta.db_table)}
+            (supplier_id, period, invoice_count, po_count, spend_amount,
+             on_time_rate, avg_days_to_pay, overdue_ratio, cancellation_rate, score, computed_at)
+        SELECT supplier_id, period, invoice_count, po_count, spend_amount,
+               on_time_rate, avg_days_to_pay, overdue_ratio, cancellation_rate, {_score_sql()}, %s
+        FROM rates
+    """
+
+
+def _params(connection, supplier_ids=()):
+    computed_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    ids = list(supplier_ids)
+    # In statement order: invoice_months (status, ids), order_months (status, status, ids), computed_at
+    return [InvoiceStatus.OVERDUE, *ids, PurchaseOrderStatus.CANCELLED, PurchaseOrderStatus.CANCELLED, *ids, computed_at]
+
+
+def _lock_suppliers(connection, supplier_ids):
+    """Serializes refreshes of the same supplier on PostgreSQL (see _lock_days() in core/rollups.py)."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for supplier_id in sorted(supplier_ids):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [SCORECARD_LOCK_ID, supplier_id])
+
+
+def refresh_supplier_scorecards(supplier_ids, using=DEFAULT_DB_ALIAS):
+    """Recomputes the scorecard rows of the given suppliers."""
+    supplier_ids = sorted({supplier_id for supplier_id in supplier_ids if supplier_id is not None})
+    if not supplier_ids:
+        return
+    connection = connections[using]
+    for start in range(0, len(supplier_ids), REFRESH_BATCH_SIZE):
+        batch = supplier_ids[start:start + REFRESH_BATCH_SIZE]
+        with transaction.atomic(using=using):
+            _lock_suppliers(connection, batch)
+            SupplierScorecard.objects.using(using).filter(supplier_id__in=batch)._raw_delete(using)
+            with connection.cursor() as cursor:
+                cursor.execute(_refresh_sql(connection, len(batch)), _params(connection, batch))
+    bump_model_versions(SupplierScorecard)
+
+
+def rebuild_supplier_scorecards(using=DEFAULT_DB_ALIAS):
+    """Replaces every scorecard row. Returns the row count."""
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        SupplierScorecard.objects.using(using).all()._raw_delete(using)
+        with connection.cursor() as cursor:
+            cursor.execute(_refresh_sql(connection), _params(connection))
+    bump_model_versions(SupplierScorecard)
+    return SupplierScorecard.objects.using(using).count()
+
+
+class _PendingRefresh:
+    """The suppliers one transaction changed; called on commit to refresh them together."""
+
+    def __init__(self, using):
+        self.using = using
+        self.supplier_ids = set()
+
+    def __call__(self):
+        connection = connections[self.using]
+        if getattr(connection, '_scorecard_refresh', None) is self:
+            connection._scorecard_refresh = None
+        refresh_supplier_scorecards(self.supplier_ids, self.using)
+
+
+def mark_suppliers_changed(supplier_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Queues a refresh of these suppliers' scorecards for when the current transaction
+    commits (right away in autocommit mode). All the suppliers touched by one transaction
+    are refreshed together, by one on_commit callback. A rollback discards the callback
+    along with the set it holds, so nothing carries over to the next transaction.
+    """
+    supplier_ids = {supplier_id for supplier_id in supplier_ids if supplier_id is not None}
+    if not supplier_ids:
+        return
+    connection = connections[using]
+    pending = getattr(connection, '_scorecard_refresh', None)
+    if pending is not None and any(callback is pending for _, callback, _ in connection.run_on_commit):
+        pending.supplier_ids.update(supplier_ids)
+        return
+    pending = connection._scorecard_refresh = _PendingRefresh(using)
+    pending.supplier_ids.update(supplier_ids)
+    transaction.on_commit(pending, using=using, robust=True)
+
+
+def parse_period(raw):
+    """The month `raw` (YYYY-MM or any YYYY-MM-DD in it) as its first day; None if blank."""
+    raw = raw.strip()
+    if not raw:
+        return None
+    value = parse_date(raw if len(raw) > 7 else f'{raw}-01')
+    if value is None:
+        raise ValueError("period must be a month in YYYY-MM format.")
+    return value.replace(day=1)
+
+
+def latest_scorecards(period=None):
+    """
+    Each supplier's scorecard for `period` (a month's first day), or its most recent one,
+    ranked by score across suppliers, best first. The rank is computed here rather than
+    stored, so refreshing one supplier never rewrites the others' rows.
+    """
+    queryset = SupplierScorecard.objects.all()
+    if period:
+        queryset = queryset.filter(period=period)
+    else:
+        # Pick the latest rows in a subquery: a window in the same query as the rank would
+        # be filtered only after the rank is computed over every period's rows
+        latest = SupplierScorecard.objects.annotate(
+            recency=Window(RowNumber(), partition_by=[F('supplier_id')], order_by=F('period').desc()),
+        ).filter(recency=1).values('pk')
+        queryset = queryset.filter(pk__in=latest)
+    return queryset.annotate(
+        rank=Window(Rank(), order_by=F('score').desc(nulls_last=True)),
+    ).order_by('rank', 'supplier_id')
+
+
+def scorecard_rows(period=None, supplier_id=None, limit=SCORECARD_PAGE_SIZE, offset=0):
+    """
+    One page of latest_scorecards() as JSON-ready dicts, with the supplier's name. The
+    ranked query is wrapped in a subquery so `supplier_id` and the page are applied in SQL
+    after ranking: a WHERE on the query itself would rank the supplier alone.
+    """
+    ranked = latest_scorecards(period).annotate(supplier_name=F('supplier__name'))
+    sql, params = ranked.query.sql_with_params()
+    where = ''
+    if supplier_id:
+        where = 'WHERE ranked.supplier_id = %s'
+        params = (*params, supplier_id)
+    cards = SupplierScorecard.objects.db_manager(ranked.db).raw(
+        f"SELECT * FROM ({sql}) ranked {where} ORDER BY ranked.rank, ranked.supplier_id LIMIT %s OFFSET %s",
+        (*params, limit, offset),
+    )
+    return [{
+        'rank': card.rank,
+        'supplier_id': card.supplier_id,
+        'supplier': card.supplier_name,
+        'period': card.period.isoformat(),
+        'score': _rounded(card.score),
+        'on_time_rate': _rounded(card.on_time_rate, 4),
+        'avg_days_to_pay': _rounded(card.avg_days_to_pay),
+        'overdue_ratio': _rounded(card.overdue_ratio, 4),
+        'cancellation_rate': _rounded(card.cancellation_rate, 4),
+        'invoice_count': card.invoice_count,
+        'po_count': card.po_count,
+        'spend_amount': str(card.spend_amount),
+    } for card in cards]
+
+
+def scorecard_count(period=None):
+    """Number of suppliers latest_scorecards() returns a row for."""
+    queryset = SupplierScorecard.objects.all()
+    if period:
+        queryset = queryset.filter(period=period)
+    return queryset.values('supplier_id').distinct().count()
+
+
+def _rounded(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+def scorecard_page(period=None, supplier_id=None, limit=SCORECARD_PAGE_SIZE, offset=0):
+    """{'total': rows across all pages, 'scorecards': scorecard_rows()}."""
+    rows = scorecard_rows(period, supplier_id, limit, offset)
+    return {'total': len(rows) if supplier_id else scorecard_count(period), 'scorecards': rows}
+
+
+def cached_scorecard_page(period=None, supplier_id=None, limit=SCORECARD_PAGE_SIZE, offset=0):
+    """scorecard_page(), served from the versioned cache until a scorecard changes."""
+    return cached_aggregate(
+        'supplier-scorecards', SCORECARD_DEPENDENCIES,
+        lambda: scorecard_page(period, supplier_id, limit, offset), params=(period, supplier_id, limit, offset),
+    )
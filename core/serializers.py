@@ -0,0 +1,85 @@
+# core/serializers.py
+"""
+Column-oriented serialization of model rows for JSON payloads.
+
+A RowSerializer is compiled once per (model, fields): every field gets the converter
+its type needs (Decimal -> str, date/datetime -> ISO string, float -> rounded), and
+fields that are already JSON friendly (ints, strings, booleans, FK ids) get none. Rows
+are read with values_list() and turned straight into one list per column, so no
+per-row dicts are built and the payload doesn't repeat every field name on every row:
+
+    {"fields": ["id", "amount", ...], "columns": [[1, 2, ...], ["10.50", "7.25", ...], ...]}
+"""
+from functools import lru_cache
+
+from django.db.models import DateField, DateTimeField, DecimalField, FloatField
+
+ITERATOR_CHUNK_SIZE = 2000
+
+
+def _decimal(value):
+    return None if value is None else str(value)
+
+
+def _iso(value):
+    return None if value is None else value.isoformat()
+
+
+def _float(value):
+    return None if value is None else round(value, 2)
+
+
+def _converter_for(field):
+    """The function that makes values of `field` JSON friendly, or None if they already are."""
+    if isinstance(field, DecimalField):
+        return _decimal
+    if isinstance(field, (DateField, DateTimeField)): # DateTimeField is a DateField subclass
+        return _iso
+    if isinstance(field, FloatField):
+        return _float
+    return None
+
+
+class RowSerializer:
+    """Converts values_list() rows of `fields` into column-oriented JSON data."""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = list(fields)
+        self.converters = [_converter_for(model._meta.get_field(name)) for name in self.fields]
+
+    def columns(self, rows):
+        """One list per field for an iterable of values_list() tuples, converted for JSON."""
+        columns = [list(column) for column in zip(*rows)] or [[] for _ in self.fields]
+        for index, convert in enumerate(self.converters):
+            if convert is not None:
+                columns[index] = [convert(value) for value in columns[index]]
+        return columns
+
+    def stream_columns(self, queryset, chunk_size=ITERATOR_CHUNK_SIZE):
+        """columns() for a queryset, reading it with a server-side cursor in chunks."""
+        columns = [[] for _ in self.fields]
+        chunk = []
+        for row in queryset.values_list(*self.fields).iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                for column, values in zip(columns, self.columns(chunk)):
+                    column.extend(values)
+                chunk = []
+        for column, values in zip(columns, self.columns(chunk)):
+            column.extend(values)
+        return columns
+
+    def payload(self, queryset):
+        """{'fields': [...], 'columns': [[...], ...]} for every row of `queryset`."""
+        return {'fields': self.fields, 'columns': self.stream_columns(queryset)}
+
+
+@lru_cache(maxsize=None)
+def _compiled_serializer(model, fields):
+    return RowSerializer(model, fields)
+
+
+def get_serializer(model, fields):
+    """The compiled RowSerializer for `model` and `fields`, built on first use."""
+    return _compiled_serializer(model, tuple(fields))
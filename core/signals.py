@@ -0,0 +1,150 @@
+# core/signals.py
+"""
+Signal handlers that keep the per-model versions in core/versioning.py, the
+daily spend rollups in core/rollups.py, the category closure table in
+core/closure.py and the supplier scorecards in core/scorecards.py current, and
+write the deletion tombstones core/columnar.py refreshes from.
+Connected from CoreConfig.ready().
+"""
+from django.db.models import ForeignKey
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .closure import insert_category, move_category, detach_category, is_descendant
+from .columnar import record_deletions
+from .models import Category, CategoryClosure, Invoice, PurchaseOrder, SpendEntry, SpendDailyRollup
+from .rollups import refresh_spend_rollups, rollups_are_suspended
+from .scorecards import mark_suppliers_changed
+from .versioning import bump_model_versions_on_commit
+
+
+def _is_core_model(sender):
+    return getattr(sender, '_meta', None) is not None and sender._meta.app_label == 'core'
+
+
+def _referencing_models(model):
+    """
+    Models with a foreign key to `model`. Deleting a row can SET_NULL their rows
+    through a plain UPDATE, which sends no signal of its own.
+    """
+    return {
+        field.related_model
+        for field in model._meta.get_fields()
+        if field.one_to_many and isinstance(field.remote_field, ForeignKey)
+    }
+
+
+@receiver(post_save)
+def bump_version_on_save(sender, **kwargs):
+    if _is_core_model(sender):
+        bump_model_versions_on_commit(sender)
+
+
+@receiver(post_delete)
+def bump_version_on_delete(sender, **kwargs):
+    if _is_core_model(sender):
+        bump_model_versions_on_commit(sender, *_referencing_models(sender))
+
+
+# --- Spend rollups: recompute the touched days in the same transaction as the write ---
+
+@receiver(pre_save, sender=SpendEntry)
+def remember_spend_date(sender, instance, raw=False, using=None, **kwargs):
+    # Moving an entry to another day changes the rollups of both days
+    instance._rollup_old_date = None
+    if raw or rollups_are_suspended() or instance.pk is None:
+        return
+    instance._rollup_old_date = sender._base_manager.using(using).filter(pk=instance.pk).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=SpendEntry)
+def refresh_rollups_on_save(sender, instance, raw=False, using=None, **kwargs):
+    if raw or rollups_are_suspended():
+        return
+    refresh_spend_rollups({instance.date, getattr(instance, '_rollup_old_date', None)}, using=using)
+    bump_model_versions_on_commit(SpendDailyRollup)
+
+
+@receiver(post_delete, sender=SpendEntry)
+def refresh_rollups_on_delete(sender, instance, using=None, **kwargs):
+    if rollups_are_suspended():
+        return
+    refresh_spend_rollups({instance.date}, using=using)
+    bump_model_versions_on_commit(SpendDailyRollup)
+
+
+# --- Supplier scorecards: refresh the touched suppliers once the transaction commits ---
+
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=PurchaseOrder)
+def remember_scorecard_supplier(sender, instance, raw=False, using=None, **kwargs):
+    # Moving a row to another supplier changes the scorecards of both
+    instance._scorecard_old_supplier_id = None
+    if raw or rollups_are_suspended() or instance.pk is None:
+        return
+    instance._scorecard_old_supplier_id = (
+        sender._base_manager.using(using).filter(pk=instance.pk).values_list('supplier_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=PurchaseOrder)
+def refresh_scorecards_on_save(sender, instance, raw=False, using=None, **kwargs):
+    if raw or rollups_are_suspended():
+        return
+    mark_suppliers_changed({instance.supplier_id, getattr(instance, '_scorecard_old_supplier_id', None)}, using=using)
+
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=PurchaseOrder)
+def refresh_scorecards_on_delete(sender, instance, using=None, **kwargs):
+    if rollups_are_suspended():
+        return
+    mark_suppliers_changed({instance.supplier_id}, using=using)
+
+
+# --- Columnar copies: a tombstone per deleted row, in the same transaction as the delete ---
+
+@receiver(post_delete, sender=SpendEntry)
+@receiver(post_delete, sender=Invoice)
+def record_deletion(sender, instance, using=None, **kwargs):
+    record_deletions(sender, [instance.pk], using=using)
+
+
+# --- Category closure table ---
+
+@receiver(pre_save, sender=Category)
+def check_category_parent(sender, instance, raw=False, using=None, **kwargs):
+    instance._closure_old_parent_id = None
+    if raw or instance.pk is None:
+        return
+    old = list(sender._base_manager.using(using).filter(pk=instance.pk).values_list('parent_id', flat=True))
+    if not old:
+        return
+    instance._closure_old_parent_id = old[0]
+    if instance.parent_id != instance._closure_old_parent_id and instance.parent_id is not None:
+        # Refuse cycles before anything is written
+        if is_descendant(instance.pk, instance.parent_id, using):
+            raise ValueError("A category can't be moved under itself or one of its subcategories.")
+
+
+@receiver(post_save, sender=Category)
+def update_closure_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    if created:
+        insert_category(instance.pk, instance.parent_id, using)
+    elif instance.parent_id != getattr(instance, '_closure_old_parent_id', instance.parent_id):
+        move_category(instance.pk, instance.parent_id, using)
+    else:
+        return
+    bump_model_versions_on_commit(CategoryClosure)
+
+
+@receiver(pre_delete, sender=Category)
+def detach_closure_on_delete(sender, instance, using=None, **kwargs):
+    # The children are about to be SET_NULL (becoming roots) by an UPDATE that sends no
+    # signal, so unlink the subtree from this category's ancestors now. The category's own
+    # rows go with it through CASCADE.
+    detach_category(instance.pk, using)
+    bump_model_versions_on_commit(CategoryClosure)
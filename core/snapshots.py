@@ -0,0 +1,218 @@
+# core/snapshots.py
+"""
+Whole-database snapshots of the core tables, for resetting demo and test environments
+in seconds instead of re-running load_brake_data.
+
+A snapshot is a zip file (deflate-compressed) holding one file per table in COPY's text
+format (tab-separated, \\N for NULL) and a manifest.json recording the tables, their
+columns and row counts, and the schema version: the latest core migration applied when
+the snapshot was taken. A snapshot only restores into a database at that same version.
+
+  - On PostgreSQL each table is streamed straight through COPY ... TO STDOUT into the zip
+    and back through COPY ... FROM STDIN, with no per-row work in Python.
+  - Elsewhere (SQLite) rows are read with values_list() and inserted with executemany().
+The text is the same either way, so a snapshot taken on one backend restores on the other.
+
+Restore empties every core table first with the backend's flush SQL: TRUNCATE ...
+RESTART IDENTITY CASCADE on PostgreSQL, DELETE plus a sqlite_sequence reset on SQLite.
+Everything happens in one transaction. The derived tables (spend rollups, category closure,
+supplier scorecards) are part of the snapshot, so nothing has to be rebuilt. Export jobs
+are not included: their files stay on the machine that wrote them. Neither are the
+deletion tombstones of core/columnar.py: a restore tells the columnar copies to reload.
+"""
+import io
+import json
+import zipfile
+from datetime import datetime
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+
+from .bulkload import (
+    DEFAULT_BATCH_SIZE, batched, copy_in, copy_out, copy_supported, copy_text, parse_copy_line, reset_sequences,
+)
+from .columnar import record_table_reset
+from .models import ExportJob, RowDeletion
+from .partitions import split_default_partition
+from .versioning import bump_model_versions_on_commit
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+# Field types whose COPY text is loaded as-is, and those loaded as int (see _text_converter())
+PASS_THROUGH_TYPES = {'CharField', 'TextField', 'EmailField', 'SlugField', 'URLField', 'DateField', 'DecimalField'}
+INTEGER_TYPES = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+}
+
+
+def snapshot_models():
+    return [model for model in apps.get_app_config('core').get_models() if model not in (ExportJob, RowDeletion)]
+
+
+def schema_version(using=DEFAULT_DB_ALIAS):
+    """Name of the latest core migration applied to the database."""
+    applied = [name for app, name in MigrationRecorder(connections[using]).applied_migrations() if app == 'core']
+    return max(applied) if applied else None
+
+
+def _columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def _dump_table(model, target, using):
+    """Writes the table to the binary file `target` in COPY text format. Returns the row count."""
+    connection = connections[using]
+    if copy_supported(using):
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(column) for column in _columns(model))
+        table = quote(model._meta.db_table)
+        pk = quote(model._meta.pk.column)
+        # COPY (SELECT ...) also works on the partitioned spend table, where COPY table TO does not
+        return copy_out(f"COPY (SELECT {columns} FROM {table} ORDER BY {pk}) TO STDOUT", target, using)
+
+    fields = model._meta.concrete_fields
+    rows = model._base_manager.using(using).order_by('pk').values_list(*[field.attname for field in fields])
+    text = io.TextIOWrapper(target, encoding='utf-8', newline='')
+    row_count = 0
+    for row in rows.iterator(chunk_size=DEFAULT_BATCH_SIZE):
+        text.write('\t'.join(copy_text(value) for value in row))
+        text.write('\n')
+        row_count += 1
+    text.flush()
+    text.detach() # Leave closing `target` to the caller
+    return row_count
+
+
+def write_snapshot(path, using=DEFAULT_DB_ALIAS):
+    """Writes a snapshot of every core table to `path`. Returns the manifest."""
+    connection = connections[using]
+    manifest = {
+        'format': SNAPSHOT_FORMAT_VERSION,
+        'schema_version': schema_version(using),
+        'created_at': timezone.now().isoformat(),
+        'vendor': connection.vendor,
+        'tables': [],
+    }
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        # One transaction, so every table is read as of the same moment
+        with transaction.atomic(using=using):
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            for model in snapshot_models():
+                filename = f'{model._meta.db_table}.tsv'
+                with archive.open(filename, 'w', force_zip64=True) as target:
+                    row_count = _dump_table(model, target, using)
+                manifest['tables'].append({
+                    'model': model._meta.label,
+                    'table': model._meta.db_table,
+                    'columns': _columns(model),
+                    'file': filename,
+                    'rows': row_count,
+                })
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    return manifest
+
+
+def read_manifest(archive, using=DEFAULT_DB_ALIAS):
+    """
+    The manifest of an open snapshot, checked against the database: same format, same
+    schema version, same columns. Raises ValueError otherwise.
+    """
+    try:
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+    except KeyError:
+        raise ValueError("Not a snapshot: manifest.json is missing.")
+    if manifest.get('format') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')!r}.")
+    current = schema_version(using)
+    if manifest['schema_version'] != current:
+        raise ValueError(
+            f"The snapshot was taken at schema version {manifest['schema_version']}, the database is at "
+            f"{current}; migrate the database to that version first."
+        )
+    models = {model._meta.label: model for model in snapshot_models()}
+    if {table['model'] for table in manifest['tables']} != set(models):
+        raise ValueError("The snapshot's tables don't match the core models.")
+    for table in manifest['tables']:
+        if set(table['columns']) != set(_columns(models[table['model']])):
+            raise ValueError(f"The columns of {table['table']} don't match the {table['model']} model.")
+    return manifest
+
+
+def _text_converter(field, connection):
+    """
+    Function turning a COPY-text value of `field` into what the database driver takes.
+    Text, dates and decimals are already in the form the database parses; the generic
+    to_python()/get_db_prep_save() route is several times slower and only used for the rest.
+    """
+    internal_type = field.target_field.get_internal_type() if field.is_relation else field.get_internal_type()
+    if internal_type in PASS_THROUGH_TYPES:
+        return lambda value: value
+    if internal_type in INTEGER_TYPES:
+        return lambda value: None if value is None else int(value)
+    if internal_type == 'BooleanField':
+        return lambda value: None if value is None else value == 't'
+    if internal_type == 'DateTimeField':
+        adapt = connection.ops.adapt_datetimefield_value
+        return lambda value: None if value is None else adapt(datetime.fromisoformat(value))
+    return lambda value: None if value is None else field.get_db_prep_save(field.to_python(value), connection)
+
+
+def _load_table(model, columns, source, using):
+    """Inserts the rows of the binary COPY-text file `source`. Returns the row count."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    column_list = ', '.join(quote(column) for column in columns)
+    table = quote(model._meta.db_table)
+    if copy_supported(using):
+        return copy_in(f"COPY {table} ({column_list}) FROM STDIN", source, using)
+
+    fields = {field.column: field for field in model._meta.concrete_fields}
+    converters = [_text_converter(fields[column], connection) for column in columns]
+    sql = f"INSERT INTO {table} ({column_list}) VALUES ({', '.join(['%s'] * len(columns))})"
+    row_count = 0
+    with connection.cursor() as cursor:
+        for lines in batched(io.TextIOWrapper(source, encoding='utf-8', newline=''), DEFAULT_BATCH_SIZE):
+            cursor.executemany(sql, [
+                [convert(value) for convert, value in zip(converters, parse_copy_line(line))] for line in lines
+            ])
+            row_count += len(lines)
+    return row_count
+
+
+def restore_snapshot(path, using=DEFAULT_DB_ALIAS):
+    """
+    Replaces the contents of every core table with the snapshot at `path`, in one
+    transaction. Returns {table: row count}. Raises ValueError if the snapshot doesn't
+    match the database (see read_manifest()).
+    """
+    connection = connections[using]
+    models = {model._meta.label: model for model in snapshot_models()}
+    row_counts = {}
+    with zipfile.ZipFile(path) as archive:
+        manifest = read_manifest(archive, using)
+        with transaction.atomic(using=using):
+            tables = [model._meta.db_table for model in models.values()]
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True):
+                    cursor.execute(sql)
+            for table in manifest['tables']:
+                with archive.open(table['file']) as source:
+                    row_counts[table['table']] = _load_table(models[table['model']], table['columns'], source, using)
+                if row_counts[table['table']] != table['rows']:
+                    raise ValueError(
+                        f"{table['file']} holds {row_counts[table['table']]} rows, the manifest says {table['rows']}."
+                    )
+            # The rows carry their ids: move the sequences past them
+            reset_sequences(models.values(), using)
+            # Spend rows for months without a partition went to the DEFAULT one (PostgreSQL only)
+            split_default_partition(using)
+            # The columnar copies reload rather than read the old tables' tombstones
+            record_table_reset(*models.values(), using=using)
+            bump_model_versions_on_commit(*models.values())
+    return row_counts
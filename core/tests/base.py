@@ -0,0 +1,49 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.models import Category, Invoice, PurchaseOrder, SpendEntry, Supplier
+
+# The configured file-based cache outlives the test database: a version seeded by an
+# earlier run could otherwise hand back aggregates of rows that no longer exist
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CoreTestCase(TestCase):
+    """TestCase with an empty private cache and a logged-in client."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('tester')
+        self.client.force_login(self.user)
+
+
+def make_supplier(name='Acme Brakes', **values):
+    values.setdefault('type', 'Direct')
+    return Supplier.objects.create(name=name, contact_email=f"{name.split()[0].lower()}@example.com", **values)
+
+
+def make_order(supplier, number, amount='100.00', issued=date(2024, 1, 10), **values):
+    return PurchaseOrder.objects.create(
+        po_number=number, supplier=supplier, amount=Decimal(amount), issue_date=issued, **values,
+    )
+
+
+def make_invoice(supplier, number, amount='100.00', invoiced=date(2024, 1, 15), due=date(2024, 2, 14), **values):
+    return Invoice.objects.create(
+        invoice_number=number, supplier=supplier, amount=Decimal(amount), invoice_date=invoiced, due_date=due, **values,
+    )
+
+
+def make_spend(amount='100.00', day=date(2024, 1, 10), category=None, supplier=None, cost_center='CC-1', **values):
+    return SpendEntry.objects.create(
+        amount=Decimal(amount), date=day, category=category, supplier=supplier, cost_center=cost_center, **values,
+    )
+
+
+def make_category(name, parent=None):
+    return Category.objects.create(name=name, parent=parent)
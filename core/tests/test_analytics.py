@@ -0,0 +1,72 @@
+from datetime import date
+from decimal import Decimal
+
+from django.urls import reverse
+
+from core.analytics import invoice_metrics, purchase_order_metrics, summary_metrics, supplier_metrics
+from core.models import InvoiceStatus, PurchaseOrderStatus
+
+from .base import CoreTestCase, make_invoice, make_order, make_spend, make_supplier
+
+
+class SummaryMetricsTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.acme = make_supplier('Acme Brakes')
+        make_supplier('Idle Parts', is_active=False, type='Indirect')
+        make_invoice(self.acme, 'INV-1', amount='100.00', status=InvoiceStatus.PENDING)
+        make_invoice(self.acme, 'INV-2', amount='50.25', status=InvoiceStatus.PENDING, invoiced=date(2024, 3, 1))
+        make_invoice(self.acme, 'INV-3', amount='10.00', status=InvoiceStatus.PAID)
+        make_invoice(self.acme, 'INV-4', amount='1.00', status=InvoiceStatus.OVERDUE)
+        make_order(self.acme, 'PO-1', amount='300.00', status=PurchaseOrderStatus.APPROVED)
+        make_order(self.acme, 'PO-2', amount='20.00')
+
+    def test_invoice_counts_and_sums_come_from_one_query(self):
+        with self.assertNumQueries(1):
+            metrics = invoice_metrics()
+        self.assertEqual(metrics['total_records'], 4)
+        self.assertEqual(metrics['total_pending'], 2)
+        self.assertEqual(metrics['sum_pending_amount'], Decimal('150.25'))
+        self.assertEqual(metrics['total_paid'], 1)
+        self.assertEqual(metrics['sum_paid_amount'], Decimal('10.00'))
+
+    def test_date_range_limits_the_metrics(self):
+        metrics = invoice_metrics(date_from=date(2024, 2, 1))
+        self.assertEqual(metrics['total_records'], 1)
+        self.assertEqual(metrics['sum_pending_amount'], Decimal('50.25'))
+        self.assertEqual(metrics['sum_paid_amount'], Decimal('0.00'))
+
+    def test_purchase_order_metrics(self):
+        with self.assertNumQueries(1):
+            metrics = purchase_order_metrics()
+        self.assertEqual(metrics['total_approved'], 1)
+        self.assertEqual(metrics['sum_approved_amount'], Decimal('300.00'))
+        self.assertEqual(metrics['sum_pending_amount'], Decimal('20.00'))
+
+    def test_supplier_metrics_fold_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            metrics = supplier_metrics()
+        self.assertEqual((metrics['total_records'], metrics['active_suppliers'], metrics['inactive_suppliers']), (2, 1, 1))
+        self.assertEqual(
+            sorted(metrics['suppliers_by_type'], key=lambda row: row['type']),
+            [{'type': 'Direct', 'count': 1}, {'type': 'Indirect', 'count': 1}],
+        )
+
+    def test_summary_includes_spend(self):
+        make_spend('40.00', supplier=self.acme)
+        make_spend('2.50', supplier=self.acme)
+        metrics = summary_metrics()
+        self.assertEqual(metrics['total_spend_entries_summary'], 2)
+        self.assertEqual(metrics['total_spend_amount_summary'], Decimal('42.50'))
+        self.assertEqual(metrics['spend_by_supplier_summary'], [{'supplier__name': 'Acme Brakes', 'total': Decimal('42.50')}])
+
+    def test_summary_page_renders_the_metrics(self):
+        response = self.client.get(reverse('summary_page'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_invoices_summary'], 4)
+        self.assertEqual(response.context['total_approved_pos_summary'], 1)
+
+    def test_invalid_date_range_is_reported_not_raised(self):
+        response = self.client.get(reverse('summary_page'), {'date_from': 'soon'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['date_range_error'])
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.async_summary import SUMMARY_GROUPS, MetricGroup, gather_summary_groups
+from core.models import Invoice, InvoiceStatus, Supplier
+
+from .base import TEST_CACHES, CoreTestCase, make_invoice, make_supplier
+
+
+def fake_groups(**computes):
+    """SUMMARY_GROUPS replaced by groups that don't touch the database."""
+    return mock.patch.dict(
+        SUMMARY_GROUPS, {name: MetricGroup(name.title(), compute, (Supplier,)) for name, compute in computes.items()}, clear=True,
+    )
+
+
+class GatherSummaryGroupsTests(CoreTestCase):
+    def test_groups_run_side_by_side(self):
+        # Every group waits for all of them to start: run one after another, this would time out
+        barrier = threading.Barrier(3, timeout=5)
+
+        def compute(date_from, date_to):
+            barrier.wait()
+            return {'ok': True}
+
+        with fake_groups(a=compute, b=compute, c=compute):
+            results, missing, errors = asyncio.run(gather_summary_groups(timeout=5))
+        self.assertEqual((results, missing, errors), ({'a': {'ok': True}, 'b': {'ok': True}, 'c': {'ok': True}}, [], {}))
+
+    def test_slow_and_failing_groups_are_reported(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def fail(date_from, date_to):
+            raise RuntimeError('boom')
+
+        with fake_groups(fast=lambda date_from, date_to: {'n': 1}, slow=lambda date_from, date_to: release.wait(5), broken=fail):
+            results, missing, errors = asyncio.run(gather_summary_groups(timeout=0.2))
+        self.assertEqual(results, {'fast': {'n': 1}})
+        self.assertEqual(missing, ['slow'])
+        self.assertEqual(errors, {'broken': 'boom'})
+
+    def test_results_are_cached_per_group(self):
+        calls = []
+
+        def compute(date_from, date_to):
+            calls.append(date_from)
+            return {'n': len(calls)}
+
+        with fake_groups(a=compute):
+            asyncio.run(gather_summary_groups())
+            results, _, _ = asyncio.run(gather_summary_groups())
+        self.assertEqual((results, len(calls)), ({'a': {'n': 1}}, 1))
+
+    def test_unknown_groups_and_bad_dates_are_400(self):
+        url = reverse('summary_json_async')
+        self.assertEqual(self.client.get(url, {'groups': 'invoices,payroll'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'date_to': 'tomorrow'}).status_code, 400)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncSummaryViewTests(TransactionTestCase):
+    # The groups run on pool threads with their own connections, so the rows must be committed
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('tester'))
+        supplier = make_supplier()
+        make_invoice(supplier, 'INV-1', amount='10.00', status=InvoiceStatus.PAID)
+        make_invoice(supplier, 'INV-2', amount='2.50')
+
+    def test_json_endpoint(self):
+        data = self.client.get(reverse('summary_json_async'), {'groups': 'invoices,suppliers'}).json()
+        self.assertFalse(data['partial'])
+        self.assertEqual(sorted(data['groups']), ['invoices', 'suppliers'])
+        self.assertEqual(data['groups']['invoices']['total_records'], Invoice.objects.count())
+        self.assertEqual(Decimal(data['groups']['invoices']['sum_paid_amount']), Decimal('10.00'))
+
+    def test_page_matches_the_sync_summary(self):
+        async_context = self.client.get(reverse('summary_page_async')).context
+        sync_context = self.client.get(reverse('summary_page')).context
+        for key in ('total_invoices_summary', 'total_paid_invoices_summary', 'total_suppliers_summary'):
+            self.assertEqual(async_context[key], sync_context[key], key)
+        self.assertEqual(async_context['summary_unavailable'], [])
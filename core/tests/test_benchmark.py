@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from core.generate_data import DEFAULT_COUNTS
+from core.management.commands.benchmark import Command, _percent_change, counts_for_size
+
+from .base import CoreTestCase, make_supplier
+
+
+def result(scenario, wall_time, queries, memory=1000, size=10000):
+    return {
+        'size': size, 'scenario': scenario, 'wall_time_s': wall_time, 'queries': queries,
+        'peak_memory_bytes': memory, 'response_bytes': 0,
+    }
+
+
+class BenchmarkCommandTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.command = Command(stdout=StringIO())
+        self.command.repeat = 2
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.baseline = os.path.join(root, 'baseline.json')
+
+    def write_baseline(self, results):
+        with open(self.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {}, 'results': results}, f)
+
+    def test_counts_scale_with_the_size(self):
+        counts = counts_for_size(sum(DEFAULT_COUNTS.values()) * 10)
+        self.assertEqual(counts['spend_entries'], DEFAULT_COUNTS['spend_entries'] * 10)
+        self.assertEqual(counts['categories'], DEFAULT_COUNTS['categories'])
+        self.assertTrue(all(count >= 1 for count in counts_for_size(1).values()))
+
+    def test_measure_records_time_queries_memory_and_bytes(self):
+        make_supplier()
+        measured = self.command._measure(10, 'supplier_list', lambda: self.client.get(reverse('supplier_list')))
+        self.assertEqual(measured['scenario'], 'supplier_list')
+        self.assertEqual(len(measured['wall_times_s']), 2)
+        self.assertGreater(measured['queries'], 0)
+        self.assertGreater(measured['peak_memory_bytes'], 0)
+        self.assertGreater(measured['response_bytes'], 0)
+
+    def test_error_responses_fail_the_run(self):
+        with self.assertRaisesMessage(CommandError, 'Unexpected status 404'):
+            self.command._measure(10, 'missing', lambda: self.client.get(reverse('model_rows_json', args=['nope'])))
+
+    def test_compare_flags_time_memory_and_query_regressions(self):
+        self.write_baseline([result('summary_page', 1.0, 5), result('export:supplier', 1.0, 3, memory=100)])
+        regressions = self.command._compare(self.baseline, [
+            result('summary_page', 1.1, 6),
+            result('export:supplier', 1.5, 3, memory=500),
+            result('supplier_list', 9.0, 99),  # Not in the baseline
+        ], threshold=20.0)
+        self.assertEqual(
+            [(r['scenario'], problems) for r, problems in regressions],
+            [('summary_page', ['queries']), ('export:supplier', ['time', 'memory'])],
+        )
+
+    def test_compare_reports_no_regressions(self):
+        self.write_baseline([result('summary_page', 1.0, 5)])
+        self.assertEqual(self.command._compare(self.baseline, [result('summary_page', 0.5, 5)], threshold=20.0), [])
+        self.assertIn('No regressions.', self.command.stdout.getvalue())
+
+    def test_unreadable_baseline(self):
+        with self.assertRaisesMessage(CommandError, 'Could not read'):
+            self.command._compare(self.baseline + '.missing', [], threshold=20.0)
+
+    def test_percent_change(self):
+        self.assertEqual(_percent_change(2.0, 3.0), 50.0)
+        self.assertEqual(_percent_change(0, 3.0), 0.0)
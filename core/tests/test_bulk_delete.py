@@ -0,0 +1,131 @@
+from datetime import date
+from unittest import mock
+
+from django.db.models import PROTECT
+from django.urls import reverse
+
+from core import bulk_delete
+from core.bulk_delete import BULK_DELETE_MAX_PKS, DeletePlan, selected_rows
+from core.closure import is_descendant
+from core.models import (
+    Category, CategoryClosure, Invoice, PurchaseOrder, SpendEntry, Supplier, SupplierScorecard,
+)
+from core.rollups import verify_spend_rollups
+
+from .base import CoreTestCase, make_category, make_invoice, make_order, make_spend, make_supplier
+
+
+class BulkDeleteTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.acme = make_supplier('Acme Brakes')
+        self.bolt = make_supplier('Bolt Castings')
+        self.materials = make_category('Materials')
+        self.metals = make_category('Metals', self.materials)
+        self.castings = make_category('Castings', self.metals)
+        with self.captureOnCommitCallbacks(execute=True):  # Scorecards refresh on commit
+            for supplier in (self.acme, self.bolt):
+                prefix = supplier.name[:4].upper()
+                order = make_order(supplier, f'PO-{prefix}', category=self.castings)
+                make_invoice(supplier, f'INV-{prefix}-1', purchase_order=order)
+                make_invoice(supplier, f'INV-{prefix}-2', invoiced=date(2024, 3, 1))
+                make_spend('10.00', supplier=supplier, category=self.metals)
+                make_spend('5.00', supplier=supplier, day=date(2024, 2, 1))
+
+    def plan(self, model, **params):
+        return DeletePlan(model, selected_rows(model, params))
+
+    def test_preview_counts_without_deleting(self):
+        preview = self.plan(Supplier, pks=[self.acme.pk]).preview()
+        self.assertEqual(preview['delete']['core.Supplier'], 1)
+        self.assertEqual(preview['delete']['core.PurchaseOrder'], 1)
+        self.assertEqual(preview['delete']['core.Invoice'], 2)
+        self.assertEqual(preview['set_null']['core.SpendEntry.supplier'], 2)
+        # Invoices deleted with the supplier aren't counted again as losing their order
+        self.assertEqual(preview['set_null']['core.Invoice.purchase_order'], 0)
+        self.assertEqual(preview['protected'], {})
+        self.assertEqual(Invoice.objects.count(), 4)
+
+    def test_supplier_delete_cascades_and_keeps_derived_tables_current(self):
+        bolt_scorecards = list(SupplierScorecard.objects.filter(supplier=self.bolt).values_list('period', 'invoice_count'))
+        self.assertTrue(bolt_scorecards)
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = self.plan(Supplier, pks=[self.acme.pk]).execute()
+        self.assertEqual((deleted['core.Supplier'], deleted['core.Invoice'], deleted['core.PurchaseOrder']), (1, 2, 1))
+        self.assertFalse(Invoice.objects.filter(supplier_id=self.acme.pk).exists())
+        self.assertEqual(SpendEntry.objects.filter(supplier__isnull=True).count(), 2)
+        self.assertEqual(verify_spend_rollups(), [])
+        self.assertFalse(SupplierScorecard.objects.filter(supplier_id=self.acme.pk).exists())
+        self.assertEqual(
+            list(SupplierScorecard.objects.filter(supplier=self.bolt).values_list('period', 'invoice_count')), bolt_scorecards,
+        )
+
+    def test_filtered_invoice_delete_refreshes_scorecards(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan(Invoice, filter={'supplier': str(self.acme.pk), 'date_from': '2024-02-01'}).execute()
+        self.assertEqual(list(Invoice.objects.filter(supplier=self.acme).values_list('invoice_number', flat=True)), ['INV-ACME-1'])
+        self.assertEqual(
+            sum(SupplierScorecard.objects.filter(supplier=self.acme).values_list('invoice_count', flat=True)), 1,
+        )
+
+    def test_category_delete_rebuilds_the_tree(self):
+        self.plan(Category, pks=[self.metals.pk]).execute()
+        self.castings.refresh_from_db()
+        self.assertIsNone(self.castings.parent_id)
+        self.assertFalse(is_descendant(self.materials.pk, self.castings.pk))
+        self.assertEqual(SpendEntry.objects.filter(category__isnull=True).count(), 4)
+        self.assertFalse(CategoryClosure.objects.filter(ancestor_id=self.metals.pk).exists())
+        self.assertEqual(verify_spend_rollups(), [])
+
+    def test_protected_rows_block_the_delete(self):
+        real = bulk_delete._reverse_foreign_keys
+
+        def protect_invoices(model):
+            return [
+                (child, field, PROTECT if child is Invoice and field.name == 'supplier' else on_delete)
+                for child, field, on_delete in real(model)
+            ]
+
+        with mock.patch.object(bulk_delete, '_reverse_foreign_keys', protect_invoices):
+            plan = self.plan(Supplier, pks=[self.acme.pk])
+            self.assertEqual(plan.preview()['protected'], {'core.Invoice.supplier': 2})
+            with self.assertRaisesMessage(ValueError, 'Rows are still referenced through Invoice.supplier.'):
+                plan.execute()
+        self.assertTrue(Supplier.objects.filter(pk=self.acme.pk).exists())
+        self.assertEqual(PurchaseOrder.objects.count(), 2)
+
+    def test_selection_errors(self):
+        for params, message in [
+            ({}, 'Select rows by pks or a filter.'),
+            ({'pks': ['x']}, 'pks must be integers.'),
+            ({'pks': list(range(BULK_DELETE_MAX_PKS + 1))}, f'At most {BULK_DELETE_MAX_PKS} ids'),
+            ({'filter': {'colour': 'red'}}, "Unknown field 'colour'"),
+            ({'filter': {'is_active': 'maybe'}}, "Invalid value for 'is_active'"),
+            ({'filter': {'date_from': '2024-01-01'}}, 'Supplier has no date to filter on.'),
+        ]:
+            with self.subTest(params=params), self.assertRaisesMessage(ValueError, message):
+                selected_rows(Supplier, params)
+
+
+class BulkDeleteViewTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = make_supplier()
+        self.invoices = [make_invoice(self.supplier, f'INV-{index}') for index in range(3)]
+        self.url = reverse('bulk_delete_records', args=['invoice-data'])
+        self.pks = f'{self.invoices[0].pk},{self.invoices[1].pk}'
+
+    def test_preview_then_confirm(self):
+        response = self.client.post(self.url, {'pks': self.pks})
+        self.assertEqual(response.json()['preview']['delete'], {'core.Invoice': 2})
+        self.assertEqual(Invoice.objects.count(), 3)
+        with self.assertLogs('core.views', 'WARNING') as logs:
+            response = self.client.post(self.url, {'pks': self.pks, 'confirm': '1'})
+        self.assertEqual(response.json()['counts'], {'core.Invoice': 2})
+        self.assertEqual(Invoice.objects.count(), 1)
+        self.assertIn('Bulk delete on invoice-data by tester', logs.output[0])
+
+    def test_errors(self):
+        self.assertEqual(self.client.post(self.url, {'confirm': '1'}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('bulk_delete_records', args=['nope']), {'pks': '1'}).status_code, 404)
+        self.assertEqual(Invoice.objects.count(), 3)
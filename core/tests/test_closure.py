@@ -0,0 +1,103 @@
+from datetime import date
+from decimal import Decimal
+
+from django.urls import reverse
+
+from core.analytics import category_spend_tree
+from core.closure import is_descendant, rebuild_category_closure
+from core.models import Category, CategoryClosure
+
+from .base import CoreTestCase, make_category, make_spend
+
+
+def closure_rows():
+    return set(CategoryClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+
+class CategoryClosureTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        # materials > metals > castings, and a separate services root
+        self.materials = make_category('Materials')
+        self.metals = make_category('Metals', self.materials)
+        self.castings = make_category('Castings', self.metals)
+        self.services = make_category('Services')
+
+    def assertMatchesRebuild(self):
+        maintained = closure_rows()
+        rebuild_category_closure()
+        self.assertEqual(maintained, closure_rows())
+
+    def test_inserts_link_every_ancestor(self):
+        self.assertEqual(
+            set(CategoryClosure.objects.filter(descendant=self.castings).values_list('ancestor_id', 'depth')),
+            {(self.castings.pk, 0), (self.metals.pk, 1), (self.materials.pk, 2)},
+        )
+        self.assertTrue(is_descendant(self.materials.pk, self.castings.pk))
+        self.assertFalse(is_descendant(self.castings.pk, self.materials.pk))
+        self.assertMatchesRebuild()
+
+    def test_moving_a_category_moves_its_subtree(self):
+        self.metals.parent = self.services
+        self.metals.save()
+        self.assertTrue(is_descendant(self.services.pk, self.castings.pk))
+        self.assertFalse(is_descendant(self.materials.pk, self.castings.pk))
+        self.assertMatchesRebuild()
+
+        self.metals.parent = None
+        self.metals.save()
+        self.assertFalse(is_descendant(self.services.pk, self.castings.pk))
+        self.assertMatchesRebuild()
+
+    def test_cycles_are_refused(self):
+        self.materials.parent = self.castings
+        with self.assertRaisesMessage(ValueError, "can't be moved under itself"):
+            self.materials.save()
+        self.materials.refresh_from_db()
+        self.assertIsNone(self.materials.parent_id)
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_category_makes_its_children_roots(self):
+        self.metals.delete()
+        self.castings.refresh_from_db()
+        self.assertIsNone(self.castings.parent_id)
+        self.assertFalse(is_descendant(self.materials.pk, self.castings.pk))
+        self.assertMatchesRebuild()
+
+    def test_rebuild_refuses_a_cycle(self):
+        Category.objects.filter(pk=self.materials.pk).update(parent=self.castings)
+        with self.assertRaisesMessage(ValueError, 'contain a cycle'):
+            rebuild_category_closure()
+
+
+class CategorySpendTreeTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.materials = make_category('Materials')
+        self.metals = make_category('Metals', self.materials)
+        self.castings = make_category('Castings', self.metals)
+        make_spend('5.00', category=self.materials)
+        make_spend('10.00', category=self.metals, day=date(2024, 1, 10))
+        make_spend('20.00', category=self.castings, day=date(2024, 2, 10))
+        make_spend('1.00')
+
+    def test_subtree_totals(self):
+        with self.assertNumQueries(3):
+            tree = category_spend_tree()
+        [materials] = tree['categories']
+        [metals] = materials['children']
+        [castings] = metals['children']
+        self.assertEqual((materials['total'], materials['own_total'], materials['entry_count']), (Decimal('35.00'), Decimal('5.00'), 3))
+        self.assertEqual((metals['total'], metals['own_total']), (Decimal('30.00'), Decimal('10.00')))
+        self.assertEqual((castings['total'], castings['own_entry_count']), (Decimal('20.00'), 1))
+        self.assertEqual(tree['uncategorized'], {'total': Decimal('1.00'), 'entry_count': 1})
+
+    def test_date_range(self):
+        [materials] = category_spend_tree(date_from=date(2024, 2, 1))['categories']
+        self.assertEqual((materials['total'], materials['own_total']), (Decimal('20.00'), Decimal('0.00')))
+
+    def test_json_endpoint(self):
+        response = self.client.get(reverse('category_spend_json'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['categories'][0]['name'], 'Materials')
+        self.assertEqual(self.client.get(reverse('category_spend_json'), {'date_to': 'x'}).status_code, 400)
@@ -0,0 +1,200 @@
+import time
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import columnar
+from core.bulk_delete import DeletePlan
+from core.columnar import COMMIT_LAG, TABLE_SPECS, TOMBSTONE_RETENTION, ColumnarTable, database_group_by, record_table_reset
+from core.exports import get_export_columns
+from core.models import Invoice, InvoiceStatus, RowDeletion, SpendEntry
+from core.versioning import bump_model_versions
+
+from .base import CoreTestCase, make_invoice, make_spend, make_supplier
+
+
+def by_key(groups):
+    return sorted(groups, key=lambda group: str(group['key']))
+
+
+@skipUnless(columnar.np is not None, 'NumPy is not installed')
+class ColumnarTableTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.acme = make_supplier('Acme Brakes')
+        self.bolt = make_supplier('Bolt Castings')
+        make_spend('10.25', day=date(2024, 1, 5), supplier=self.acme, cost_center='CC-1')
+        make_spend('20.50', day=date(2024, 1, 20), supplier=self.bolt, cost_center='CC-2')
+        make_spend('0.01', day=date(2024, 2, 1), supplier=self.acme, cost_center='CC-2')
+        make_spend('99.99', day=date(2024, 3, 1), cost_center='CC-1')
+        self.table = ColumnarTable(TABLE_SPECS['spend'])
+        self.table.refresh()
+
+    def assertMatchesDatabase(self, key, filters=None, **dates):
+        self.assertEqual(
+            by_key(self.table.group_by(key, filters, **dates)), by_key(database_group_by('spend', key, filters, **dates)),
+        )
+
+    def test_group_by_matches_the_database(self):
+        for key in TABLE_SPECS['spend'].group_keys:
+            with self.subTest(key=key):
+                self.assertMatchesDatabase(key)
+        self.assertMatchesDatabase('supplier_id', {'cost_center': 'CC-2'})
+        self.assertMatchesDatabase('cost_center', {'supplier_id': self.acme.pk}, date_from=date(2024, 1, 10))
+        self.assertEqual(self.table.group_by('cost_center', {'cost_center': 'CC-9'}), [])
+
+    def test_month_groups(self):
+        self.assertEqual(
+            [(group['key'], group['total'], group['count']) for group in by_key(self.table.group_by('month'))],
+            [('2024-01', 30.75, 2), ('2024-02', 0.01, 1), ('2024-03', 99.99, 1)],
+        )
+
+    def test_unchanged_version_skips_the_database(self):
+        with self.assertNumQueries(0):
+            self.table.refresh()
+
+    def test_refresh_picks_up_updates_inserts_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = SpendEntry.objects.get(amount='20.50')
+            entry.amount = '1.00'
+            entry.save()
+            make_spend('5.00', day=date(2024, 4, 1), supplier=self.bolt, cost_center='CC-3')
+            SpendEntry.objects.filter(amount='99.99').delete()
+        self.table.refresh()
+        self.assertEqual(len(self.table.columns['id']), 4)
+        self.assertMatchesDatabase('supplier_id')
+        self.assertMatchesDatabase('cost_center')
+
+    def test_refresh_after_a_delete_and_an_insert(self):
+        # Same row count before and after, and the deleted row was the newest
+        with self.captureOnCommitCallbacks(execute=True):
+            SpendEntry.objects.filter(amount='0.01').delete()
+            make_spend('7.00', day=date(2024, 2, 2), supplier=self.bolt, cost_center='CC-2')
+        self.table.refresh()
+        self.assertEqual(sorted(self.table.columns['id'].tolist()), sorted(SpendEntry.objects.values_list('id', flat=True)))
+        self.assertMatchesDatabase('supplier_id')
+
+    def test_refresh_reads_only_the_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = SpendEntry.objects.get(amount='20.50')
+            entry.cost_center = 'CC-9'
+            entry.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.table.refresh()
+        spend_reads = [query['sql'] for query in queries if 'FROM "core_spendentry"' in query['sql']]
+        self.assertTrue(spend_reads)
+        for sql in spend_reads: # Markers (MAX) and the changed rows, never the whole id list
+            self.assertTrue('MAX(' in sql or 'WHERE' in sql, sql)
+        self.assertMatchesDatabase('cost_center')
+
+    def test_deletes_come_from_tombstones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SpendEntry.objects.filter(amount='99.99').delete()
+        self.assertEqual(list(RowDeletion.objects.values_list('table_name', flat=True)), ['core_spendentry'])
+        self.table.refresh()
+        self.assertEqual(len(self.table.columns['id']), 3)
+        self.assertMatchesDatabase('supplier_id')
+
+    def test_set_based_deletes_write_tombstones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            DeletePlan(SpendEntry, SpendEntry.objects.filter(cost_center='CC-2')).execute()
+        self.assertEqual(RowDeletion.objects.count(), 2)
+        self.table.refresh()
+        self.assertEqual(self.table.group_by('cost_center'), [{'key': 'CC-1', 'total': 110.24, 'count': 2}])
+
+    def test_late_commit_within_the_lag_window(self):
+        # Saved before the last refresh, committed after it: its updated_at is older than the marker
+        latest = self.table.row_marker[1]
+        SpendEntry.objects.filter(amount='10.25').update(amount='11.00', updated_at=latest - COMMIT_LAG / 2)
+        bump_model_versions(SpendEntry)
+        self.table.refresh()
+        self.assertMatchesDatabase('supplier_id')
+
+    def test_reset_reloads(self):
+        record_table_reset(SpendEntry)
+        SpendEntry.objects.filter(amount='0.01').update(amount='3.00', updated_at=timezone.now() - timedelta(days=365))
+        bump_model_versions(SpendEntry)
+        with mock.patch.object(self.table, 'full_load', wraps=self.table.full_load) as full_load:
+            self.table.refresh()
+            self.assertEqual(full_load.call_count, 1)
+            self.assertMatchesDatabase('supplier_id')
+            # A reset already reflected doesn't reload again
+            bump_model_versions(SpendEntry)
+            self.table.refresh()
+            self.assertEqual(full_load.call_count, 1)
+
+    def test_old_tombstones_are_pruned_and_stale_stores_reload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SpendEntry.objects.filter(amount='99.99').delete()
+        RowDeletion.objects.update(deleted_at=timezone.now() - TOMBSTONE_RETENTION - timedelta(hours=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            SpendEntry.objects.filter(amount='0.01').delete()
+        self.table.refresh()
+        self.assertEqual(RowDeletion.objects.count(), 1)
+        self.assertMatchesDatabase('supplier_id')
+
+        bump_model_versions(SpendEntry)
+        self.table.last_refresh = time.time() - TOMBSTONE_RETENTION.total_seconds() - 1
+        with mock.patch.object(self.table, 'full_load') as full_load:
+            self.table.refresh()
+        full_load.assert_called_once_with()
+
+    def test_memory_usage(self):
+        usage = self.table.memory_usage()
+        self.assertEqual(usage['amount'], 4 * 8)
+        self.assertEqual(usage['total'], sum(value for name, value in usage.items() if name != 'total'))
+
+
+@skipUnless(columnar.np is not None, 'NumPy is not installed')
+class ColumnarInvoiceTests(CoreTestCase):
+    def test_status_filter(self):
+        supplier = make_supplier()
+        make_invoice(supplier, 'INV-1', amount='10.00', status=InvoiceStatus.PAID)
+        make_invoice(supplier, 'INV-2', amount='5.00', status=InvoiceStatus.PAID, invoiced=date(2024, 2, 1))
+        make_invoice(supplier, 'INV-3', amount='1.00')
+        table = ColumnarTable(TABLE_SPECS['invoices'])
+        table.refresh()
+        self.assertEqual(table.group_by('month', {'status': 'Paid'}), database_group_by('invoices', 'month', {'status': 'Paid'}))
+        self.assertEqual([group['total'] for group in table.group_by('status')], [15.0, 1.0])
+
+
+class ColumnarEndpointTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        columnar._tables.clear()
+        self.addCleanup(columnar._tables.clear)
+        supplier = make_supplier()
+        make_spend('10.00', supplier=supplier)
+        make_spend('2.00', supplier=supplier, cost_center='CC-2')
+        self.url = reverse('columnar_group_by_json', args=['spend'])
+
+    def test_database_when_disabled(self):
+        data = self.client.get(self.url, {'group_by': 'cost_center'}).json()
+        self.assertEqual(data['source'], 'database')
+        self.assertEqual(by_key(data['groups']), [
+            {'key': 'CC-1', 'total': 10.0, 'count': 1}, {'key': 'CC-2', 'total': 2.0, 'count': 1},
+        ])
+
+    @skipUnless(columnar.np is not None, 'NumPy is not installed')
+    @override_settings(COLUMNAR_ANALYTICS=True)
+    def test_columnar_when_enabled(self):
+        data = self.client.get(self.url, {'group_by': 'cost_center', 'cost_center': 'CC-2'}).json()
+        self.assertEqual(data['source'], 'columnar')
+        self.assertEqual(data['groups'], [{'key': 'CC-2', 'total': 2.0, 'count': 1}])
+        self.assertIn('total', data['memory_bytes'])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(self.url, {'group_by': 'description'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'supplier_id': 'acme'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('columnar_group_by_json', args=['orders'])).status_code, 404)
+
+
+class ChangeMarkerTests(CoreTestCase):
+    def test_exports_leave_out_the_change_markers(self):
+        for model in (SpendEntry, Invoice):
+            self.assertNotIn('updated_at', [column.field.name for column in get_export_columns(model)])
@@ -0,0 +1,84 @@
+import gzip
+import json
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from .base import CoreTestCase, make_invoice, make_supplier
+
+
+class ConditionalGetTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = make_supplier()
+        self.url = reverse('summary_page')
+
+    def test_matching_etag_gets_304(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'])
+        self.assertTrue(first['Last-Modified'])
+        repeat = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.content, b'')
+
+    def test_304_skips_the_view(self):
+        etag = self.client.get(self.url)['ETag']
+        # Only the session and the user are read; none of the summary queries run
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_a_committed_write_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_invoice(self.supplier, 'INV-1')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_the_user_and_the_query(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertNotEqual(self.client.get(self.url, {'date_from': '2024-01-01'})['ETag'], etag)
+        self.client.force_login(User.objects.create_user('other'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unrelated_writes_keep_the_export_etag(self):
+        url = reverse('model_rows_json', args=['category-data'])
+        etag = self.client.get(url, {'draw': 1})['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_invoice(self.supplier, 'INV-1')
+        self.assertEqual(self.client.get(url, {'draw': 1}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_errors_get_no_validators(self):
+        response = self.client.get(reverse('model_rows_json', args=['invoice-data']), {'date_from': 'soon'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.client.get(reverse('export_model_excel', args=['supplier-data']), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_unknown_models_get_no_validators(self):
+        response = self.client.get(reverse('model_rows_json', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class CompressionTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(30):
+            make_supplier(f'Supplier {index:02d}')
+
+    def test_json_is_gzipped(self):
+        response = self.client.get(
+            reverse('model_rows_json', args=['supplier-data']), {'draw': 1, 'length': 30}, HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['recordsTotal'], 30)
+
+    def test_workbooks_are_left_alone(self):
+        response = self.client.get(reverse('export_model_excel', args=['supplier-data']), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        b''.join(response.streaming_content)
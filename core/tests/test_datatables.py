@@ -0,0 +1,116 @@
+import json
+
+from django.urls import reverse
+
+from core.datatables import MAX_PAGE_LENGTH
+from core.views import MODEL_LIST_FIELDS
+
+from .base import CoreTestCase, make_supplier
+
+SUPPLIER_FIELDS = MODEL_LIST_FIELDS['supplier-data']
+
+
+class DataTablesEndpointTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.suppliers = [make_supplier(f"Supplier {index:02d}", score=index % 7) for index in range(25)]
+        self.url = reverse('model_rows_json', args=['supplier-data'])
+
+    def rows(self, **params):
+        response = self.client.get(self.url, {'draw': 3, 'layout': 'rows', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_returns_one_page_with_the_totals(self):
+        data = self.rows(start=10, length=10)
+        self.assertEqual(data['draw'], 3)
+        self.assertEqual(data['recordsTotal'], 25)
+        self.assertEqual(data['recordsFiltered'], 25)
+        self.assertEqual([row['id'] for row in data['data']], [supplier.pk for supplier in self.suppliers[10:20]])
+
+    def test_all_and_oversized_pages_are_capped(self):
+        self.assertEqual(len(self.rows(start=0, length=-1)['data']), min(25, MAX_PAGE_LENGTH))
+        self.assertEqual(len(self.rows(length=10 ** 6)['data']), min(25, MAX_PAGE_LENGTH))
+
+    def test_sorts_descending_on_the_requested_column(self):
+        data = self.rows(length=5, **{'order[0][column]': SUPPLIER_FIELDS.index('name'), 'order[0][dir]': 'desc'})
+        self.assertEqual([row['name'] for row in data['data']], [f"Supplier {index:02d}" for index in range(24, 19, -1)])
+
+    def test_global_search_and_column_filters(self):
+        data = self.rows(**{'search[value]': 'supplier 1'})
+        self.assertEqual(data['recordsFiltered'], 10)
+        self.assertEqual(data['recordsTotal'], 25)
+
+        column = SUPPLIER_FIELDS.index('lead_time_days')
+        self.assertEqual(self.rows(**{f'columns[{column}][search][value]': 'abc'})['recordsFiltered'], 0)
+        column = SUPPLIER_FIELDS.index('name')
+        self.assertEqual(self.rows(**{f'columns[{column}][search][value]': 'Supplier 2'})['recordsFiltered'], 5)
+
+    def test_default_layout_is_column_oriented(self):
+        data = self.client.get(self.url, {'length': 3}).json()
+        self.assertEqual(data['fields'][:len(SUPPLIER_FIELDS)], SUPPLIER_FIELDS)
+        ids = data['columns'][data['fields'].index('id')]
+        self.assertEqual(ids, [supplier.pk for supplier in self.suppliers[:3]])
+
+    def test_unknown_model_is_404(self):
+        response = self.client.get(reverse('model_rows_json', args=['nothing-data']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_page_leaves_rows_to_the_endpoint(self):
+        response = self.client.get(reverse('supplier_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.url)
+        self.assertNotContains(response, 'Supplier 24')
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class KeysetPagingTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        # Scores that round to the same displayed value, and ties broken on id
+        self.suppliers = [make_supplier(f"Supplier {index:02d}", score=1 + (index % 5) / 3000) for index in range(22)]
+        self.url = reverse('model_rows_json', args=['supplier-data'])
+        self.score_column = SUPPLIER_FIELDS.index('score')
+
+    def walk(self, length, order_dir):
+        """Follows the `after` cursors from the first page to the last; returns the ids seen."""
+        params = {'draw': 1, 'layout': 'rows', 'length': length, 'order[0][column]': self.score_column, 'order[0][dir]': order_dir}
+        seen = []
+        start = 0
+        after = None
+        while True:
+            page_params = {**params, 'start': start}
+            if after is not None:
+                page_params['after'] = json.dumps(after)
+            data = self.client.get(self.url, page_params).json()
+            seen += [row['id'] for row in data['data']]
+            if len(data['data']) < length:
+                return seen
+            start += length
+            after = data['after']
+
+    def expected(self, descending):
+        ordered = sorted(self.suppliers, key=lambda supplier: (supplier.score, supplier.pk), reverse=descending)
+        return [supplier.pk for supplier in ordered]
+
+    def test_cursor_pages_cover_every_row_once(self):
+        self.assertEqual(self.walk(5, 'asc'), self.expected(False))
+        self.assertEqual(self.walk(4, 'desc'), self.expected(True))
+
+    def test_cursor_keeps_the_stored_value(self):
+        data = self.client.get(self.url, {'draw': 1, 'length': 1, 'order[0][column]': self.score_column}).json()
+        self.assertEqual(data['after'], [1.0, self.suppliers[0].pk])
+        data = self.client.get(self.url, {'draw': 1, 'length': 2, 'order[0][column]': self.score_column, 'order[0][dir]': 'desc'}).json()
+        self.assertEqual(data['after'][0], 1 + 4 / 3000)
+
+    def test_nullable_sort_columns_fall_back_to_offsets(self):
+        phone_column = SUPPLIER_FIELDS.index('phone')
+        data = self.client.get(self.url, {'draw': 1, 'length': 5, 'order[0][column]': phone_column}).json()
+        self.assertNotIn('after', data)
+
+    def test_malformed_cursor_falls_back_to_the_offset(self):
+        data = self.client.get(self.url, {'draw': 1, 'layout': 'rows', 'start': 5, 'length': 5, 'after': 'nonsense'}).json()
+        self.assertEqual([row['id'] for row in data['data']], [supplier.pk for supplier in self.suppliers[5:10]])
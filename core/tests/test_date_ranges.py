@@ -0,0 +1,88 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.urls import reverse
+
+from core.analytics import date_range_filter, parse_date_range, summary_metrics
+from core.models import Invoice, SpendEntry, Supplier
+from core.partitions import _months, ensure_spend_partitions, is_partitioned, next_month, split_default_partition
+
+from .base import CoreTestCase, make_invoice, make_spend, make_supplier
+
+
+class DateRangeTests(CoreTestCase):
+    def test_parse_date_range(self):
+        self.assertEqual(parse_date_range(QueryDict('')), (None, None))
+        self.assertEqual(
+            parse_date_range(QueryDict('date_from=2024-01-01&date_to=2024-03-31')),
+            (date(2024, 1, 1), date(2024, 3, 31)),
+        )
+        with self.assertRaisesMessage(ValueError, 'date_to must be a date in YYYY-MM-DD format.'):
+            parse_date_range(QueryDict('date_to=31/03/2024'))
+
+    def test_filter_uses_each_models_date_field(self):
+        self.assertEqual(
+            date_range_filter(Invoice, date(2024, 1, 1), None).children, [('invoice_date__gte', date(2024, 1, 1))],
+        )
+        self.assertEqual(date_range_filter(SpendEntry, None, date(2024, 1, 31)).children, [('date__lte', date(2024, 1, 31))])
+        self.assertFalse(date_range_filter(Supplier, date(2024, 1, 1), date(2024, 1, 31)))
+
+    def test_summary_spend_is_limited_to_the_range(self):
+        supplier = make_supplier()
+        make_spend('10.00', day=date(2024, 1, 31), supplier=supplier)
+        make_spend('20.00', day=date(2024, 2, 1), supplier=supplier)
+        make_spend('40.00', day=date(2024, 3, 1), supplier=supplier)
+        metrics = summary_metrics(date(2024, 2, 1), date(2024, 2, 29))
+        self.assertEqual(metrics['total_spend_entries_summary'], 1)
+        self.assertEqual(metrics['total_spend_amount_summary'], Decimal('20.00'))
+        self.assertEqual(summary_metrics(date_to=date(2024, 2, 1))['total_spend_amount_summary'], Decimal('30.00'))
+
+    def test_rows_endpoint_applies_the_range(self):
+        supplier = make_supplier()
+        make_invoice(supplier, 'INV-1', invoiced=date(2024, 1, 15))
+        make_invoice(supplier, 'INV-2', invoiced=date(2024, 5, 15))
+        url = reverse('model_rows_json', args=['invoice-data'])
+        response = self.client.get(url, {'draw': 1, 'start': 0, 'length': 10, 'date_from': '2024-05-01'})
+        self.assertEqual(response.json()['recordsTotal'], 1)
+        response = self.client.get(url, {'draw': 1, 'date_from': 'May'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_page_passes_the_range_to_the_rows_url(self):
+        response = self.client.get(reverse('spend_entry_list'), {'date_from': '2024-02-01'})
+        self.assertEqual(response.context['date_field'], 'date')
+        self.assertIn('date_from=2024-02-01', response.context['rows_url'])
+        response = self.client.get(reverse('supplier_list'), {'date_from': '2024-02-01'})
+        self.assertNotIn('date_from', response.context['rows_url'])
+
+
+class PartitionTests(CoreTestCase):
+    def test_months(self):
+        self.assertEqual(next_month(date(2024, 12, 15)), date(2025, 1, 1))
+        self.assertEqual(
+            list(_months(date(2024, 11, 20), date(2025, 1, 1))),
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)],
+        )
+
+    @skipUnless(connection.vendor != 'postgresql', 'Partitioning is PostgreSQL only')
+    def test_no_op_without_partitioning(self):
+        self.assertFalse(is_partitioned())
+        self.assertEqual(ensure_spend_partitions(date(2024, 1, 1), date(2024, 6, 1)), [])
+        self.assertEqual(split_default_partition(), [])
+        out = StringIO()
+        call_command('spend_partitions', stdout=out)
+        self.assertIn('not partitioned', out.getvalue())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partitioning is PostgreSQL only')
+    def test_rows_move_out_of_the_default_partition(self):
+        self.assertTrue(is_partitioned())
+        entry = make_spend('10.00', day=date(2099, 5, 17))
+        self.assertEqual(split_default_partition(), ['core_spendentry_p2099_05'])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT id FROM core_spendentry_p2099_05')
+            self.assertEqual(cursor.fetchall(), [(entry.pk,)])
+        self.assertEqual(ensure_spend_partitions(date(2099, 5, 1), date(2099, 5, 31)), [])
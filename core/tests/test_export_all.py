@@ -0,0 +1,98 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+import openpyxl
+from django.core.management import call_command
+from django.urls import reverse
+
+from core import export_all
+from core.export_all import write_export_all, write_model_part
+from core.exports import sheet_title
+from core.models import Invoice, Supplier
+from core.views import MODEL_MAP
+
+from .base import CoreTestCase, make_invoice, make_supplier
+
+
+class ExportAllTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        supplier = make_supplier('Acme Brakes')
+        make_supplier('Bolt Castings')
+        make_invoice(supplier, 'INV-1', amount='12.50', invoiced=date(2024, 1, 15))
+        make_invoice(supplier, 'INV-2', invoiced=date(2024, 6, 15))
+        self.models = list(MODEL_MAP.values())
+
+    def test_workbook_has_a_sheet_per_model(self):
+        path = os.path.join(self.dir, 'all.xlsx')
+        counts = write_export_all(self.models, path, 'xlsx', workers=1)
+        self.assertEqual((counts[Supplier], counts[Invoice]), (2, 2))
+        workbook = openpyxl.load_workbook(path)
+        self.assertEqual(workbook.sheetnames, [sheet_title(model) for model in self.models])
+        invoices = list(workbook[sheet_title(Invoice)].iter_rows(values_only=True))
+        self.assertEqual(invoices[0][:2], ('Invoice Number', 'Supplier'))
+        self.assertEqual([row[:2] for row in invoices[1:]], [('INV-1', 'Acme Brakes'), ('INV-2', 'Acme Brakes')])
+        self.assertEqual(workbook[sheet_title(Supplier)].max_row, 3)
+
+    def test_csv_zip_with_a_date_range(self):
+        path = os.path.join(self.dir, 'all.zip')
+        counts = write_export_all(self.models, path, 'csv', {'date_from': '2024-06-01', 'date_to': ''}, workers=1)
+        self.assertEqual((counts[Supplier], counts[Invoice]), (2, 1))
+        with zipfile.ZipFile(path) as archive:
+            self.assertIn('supplier_data.csv', archive.namelist())
+            rows = list(csv.DictReader(io.TextIOWrapper(archive.open('invoice_data.csv'), encoding='utf-8')))
+        self.assertEqual([row['Invoice Number'] for row in rows], ['INV-2'])
+
+    def test_bad_date_fails_before_writing(self):
+        path = os.path.join(self.dir, 'all.zip')
+        with self.assertRaises(ValueError):
+            write_export_all(self.models, path, 'csv', {'date_to': 'later'}, workers=1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_workers_share_one_long_lived_pool(self):
+        class InlinePool:
+            # Stands in for the spawned pool: runs the parts in this process
+            def map(self, function, args):
+                return [write_model_part(*arg) for arg in args]
+
+        with mock.patch.object(export_all, 'ProcessPoolExecutor', return_value=InlinePool()) as executor, \
+                mock.patch.dict(export_all._pools, clear=True):
+            for name in ('first.zip', 'second.zip'):
+                counts = write_export_all(self.models, os.path.join(self.dir, name), 'csv', workers=2)
+                self.assertEqual(counts[Invoice], 2)
+        executor.assert_called_once()
+        self.assertEqual(executor.call_args.kwargs['max_workers'], 2)
+
+    def test_in_process_inside_a_worker(self):
+        with mock.patch.object(export_all, 'in_worker', return_value=True), \
+                mock.patch.object(export_all, '_map_parts') as map_parts:
+            counts = write_export_all(self.models, os.path.join(self.dir, 'all.zip'), 'csv', workers=4)
+        map_parts.assert_not_called()
+        self.assertEqual(counts[Supplier], 2)
+
+    def test_view(self):
+        url = reverse('export_all')
+        with mock.patch.object(export_all, 'EXPORT_ALL_WORKERS', 1):
+            response = self.client.get(url, {'format': 'csv'})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('procurement_data_csv.zip', response['Content-Disposition'])
+            with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+                self.assertEqual(len(archive.namelist()), len(self.models))
+        self.assertEqual(self.client.get(url, {'format': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'date_from': 'soon'}).status_code, 400)
+
+    def test_command(self):
+        path = os.path.join(self.dir, 'all.xlsx')
+        out = StringIO()
+        call_command('export_all', path, workers=1, stdout=out)
+        self.assertIn('Invoice: 2 rows', out.getvalue())
+        self.assertTrue(zipfile.is_zipfile(path))
@@ -0,0 +1,126 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from core import export_jobs
+from core.export_jobs import cleanup_export_jobs, create_export_job, job_progress, run_export_job, run_pending_export_jobs
+from core.models import ExportJob, ExportJobStatus
+
+from .base import CoreTestCase, make_invoice, make_supplier
+
+
+class ExportJobTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool)
+        patcher = mock.patch.object(export_jobs, 'EXPORT_SPOOL_DIR', spool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.spool = spool
+        supplier = make_supplier()
+        make_invoice(supplier, 'INV-1', invoiced=date(2024, 1, 15))
+        make_invoice(supplier, 'INV-2', invoiced=date(2024, 6, 15))
+
+    def create(self, **data):
+        """POSTs a job request; the worker pool hand-off is captured instead of run."""
+        with mock.patch.object(export_jobs, 'submit_export_job') as submit, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('export_job_create'), {'model_name': 'invoice-data', **data})
+        self.submitted = [call.args[0] for call in submit.call_args_list]
+        return response
+
+    def test_create_queues_the_job_once_committed(self):
+        response = self.create(format='csv', date_from='2024-06-01')
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertTrue(response.json()['created'])
+        self.assertEqual((job['state'], job['params']), ('Pending', {'date_from': '2024-06-01'}))
+        self.assertEqual(self.submitted, [job['id']])
+
+    def test_identical_requests_share_a_job(self):
+        first = self.create(format='csv')
+        second = self.create(format='csv')
+        self.assertFalse(second.json()['created'])
+        self.assertEqual(second.json()['job']['id'], first.json()['job']['id'])
+        self.assertEqual(self.submitted, [])
+        self.assertNotEqual(self.create(format='ndjson').json()['job']['id'], first.json()['job']['id'])
+
+    def test_other_users_get_their_own_job(self):
+        mine = create_export_job('invoice-data', 'csv', user=self.user)[0]
+        theirs, created = create_export_job('invoice-data', 'csv', user=User.objects.create_user('other'))
+        self.assertTrue(created)
+        self.assertNotEqual(theirs.pk, mine.pk)
+
+    def test_run_and_download(self):
+        job_id = self.create(format='csv', date_from='2024-06-01').json()['job']['id']
+        run_export_job(job_id)
+        status = self.client.get(reverse('export_job_status', args=[job_id])).json()['job']
+        self.assertEqual((status['state'], status['rows_total'], status['rows_processed'], status['percent']), ('Done', 1, 1, 100.0))
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual([row[rows[0].index('Invoice Number')] for row in rows[1:]], ['INV-2'])
+
+    def test_jobs_are_private(self):
+        job_id = self.create(format='csv').json()['job']['id']
+        run_export_job(job_id)
+        self.client.force_login(User.objects.create_user('other'))
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[job_id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job_id])).status_code, 404)
+
+    def test_download_before_done_and_after_expiry(self):
+        job_id = self.create(format='csv').json()['job']['id']
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job_id])).status_code, 409)
+        run_export_job(job_id)
+        path = ExportJob.objects.get(pk=job_id).file_path
+        self.assertEqual(cleanup_export_jobs(now=timezone.now() + timedelta(days=2)), 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job_id])).status_code, 410)
+
+    def test_failures_are_recorded(self):
+        job, _ = create_export_job('no-such-data', 'csv', user=self.user)
+        self.assertEqual(run_pending_export_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJobStatus.FAILED)
+        self.assertTrue(job.error)
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_pool_failures_close_the_callback_thread_connection(self):
+        job, _ = create_export_job('invoice-data', 'csv', user=self.user)
+        future = Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+        with mock.patch.object(export_jobs.connections, 'close_all') as close_all, self.assertLogs('core.export_jobs', 'ERROR'):
+            export_jobs._report_failure(job.pk, future, submitter=threading.get_ident())
+            close_all.assert_not_called() # The submitting thread's connection is its own business
+            job.status = ExportJobStatus.RUNNING
+            job.save()
+            export_jobs._report_failure(job.pk, future, submitter=None) # As on the pool's callback thread
+            close_all.assert_called_once_with()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (ExportJobStatus.FAILED, 'worker died'))
+
+    def test_bad_requests(self):
+        self.assertEqual(self.create(model_name='nope').status_code, 404)
+        self.assertEqual(self.create(format='pdf').status_code, 400)
+        self.assertEqual(self.create(date_to='June').status_code, 400)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_progress_eta(self):
+        job = ExportJob(
+            pk=1, model_name='invoice-data', format='csv', status=ExportJobStatus.RUNNING,
+            rows_total=100, rows_processed=25, started_at=timezone.now() - timedelta(seconds=10),
+        )
+        progress = job_progress(job)
+        self.assertEqual(progress['percent'], 25.0)
+        self.assertAlmostEqual(progress['eta_seconds'], 30, delta=1)
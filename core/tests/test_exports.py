@@ -0,0 +1,68 @@
+import io
+from decimal import Decimal
+
+import openpyxl
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.exports import compute_column_widths, get_export_columns
+from core.models import Invoice
+
+from .base import CoreTestCase, make_invoice, make_order, make_supplier
+
+
+def read_workbook(response):
+    return openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+
+
+class ExcelExportTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = make_supplier('Acme Brakes')
+        self.order = make_order(self.supplier, 'PO-1')
+        self.url = reverse('export_model_excel', args=['invoice-data'])
+
+    def export(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+            workbook = read_workbook(response)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('invoice_data.xlsx', response['Content-Disposition'])
+        return workbook.active, len(queries)
+
+    def test_writes_fk_names_instead_of_ids(self):
+        make_invoice(self.supplier, 'INV-1', amount='12.50', purchase_order=self.order)
+        make_invoice(self.supplier, 'INV-2')
+        sheet, _ = self.export()
+        rows = list(sheet.iter_rows(values_only=True))
+        headers = rows[0]
+        self.assertEqual(headers[:3], ('Invoice Number', 'Supplier', 'Purchase Order'))
+        self.assertEqual(rows[1][:3], ('INV-1', 'Acme Brakes', 'PO-1'))
+        self.assertEqual(rows[2][:3], ('INV-2', 'Acme Brakes', 'N/A'))
+        self.assertEqual(rows[1][headers.index('Amount')], 12.5)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        make_invoice(self.supplier, 'INV-1', purchase_order=self.order)
+        _, few = self.export()
+        for index in range(2, 40):
+            make_invoice(make_supplier(f"Supplier {index}"), f'INV-{index}', purchase_order=self.order)
+        sheet, many = self.export()
+        self.assertEqual(sheet.max_row, 40)
+        self.assertEqual(few, many)
+
+    def test_column_widths_fit_the_longest_value(self):
+        make_invoice(make_supplier('A supplier with a rather long name'), 'INV-1')
+        columns = get_export_columns(Invoice)
+        widths = compute_column_widths(Invoice.objects.all(), columns)
+        supplier_column = [column.header for column in columns].index('Supplier')
+        self.assertGreaterEqual(widths[supplier_column], len('A supplier with a rather long name'))
+
+    def test_unknown_model_is_404(self):
+        self.assertEqual(self.client.get(reverse('export_model_excel', args=['nothing-data'])).status_code, 404)
+
+    def test_decimal_values_are_numbers(self):
+        make_invoice(self.supplier, 'INV-1', amount='1234.56')
+        sheet, _ = self.export()
+        headers = [cell.value for cell in sheet[1]]
+        self.assertEqual(Decimal(str(sheet.cell(2, headers.index('Amount') + 1).value)), Decimal('1234.56'))
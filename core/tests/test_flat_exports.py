@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import date
+from unittest import mock, skipUnless
+
+from django.urls import reverse
+
+from core import flat_exports
+from core.flat_exports import iter_csv, iter_ndjson
+from core.models import Invoice
+
+from .base import CoreTestCase, make_invoice, make_order, make_supplier
+
+
+class FlatExportTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = make_supplier('Acme Brakes')
+        order = make_order(self.supplier, 'PO-1')
+        make_invoice(self.supplier, 'INV-1', amount='12.50', purchase_order=order, invoiced=date(2024, 1, 15))
+        make_invoice(self.supplier, 'INV-2', amount='0.10', invoiced=date(2024, 6, 15))
+
+    def export(self, export_format, **params):
+        response = self.client.get(reverse('export_model_excel', args=['invoice-data']), {'format': export_format, **params})
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, body = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('invoice_data.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(
+            [(row['Invoice Number'], row['Supplier'], row['Purchase Order'], row['Amount'], row['Paid Date']) for row in rows],
+            [('INV-1', 'Acme Brakes', 'PO-1', '12.50', ''), ('INV-2', 'Acme Brakes', '', '0.10', '')],
+        )
+
+    def test_ndjson_keeps_decimals_exact(self):
+        response, body = self.export('ndjson', date_from='2024-06-01')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        [row] = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual((row['invoice_number'], row['amount'], row['invoice_date'], row['paid_date']), ('INV-2', '0.10', '2024-06-15', None))
+
+    def test_blocks_follow_the_chunks(self):
+        # One row per chunk
+        with mock.patch.object(flat_exports.iter_export_chunks, '__defaults__', (1,)):
+            progress = []
+            blocks = list(iter_ndjson(Invoice, Invoice.objects.all(), progress.append))
+        self.assertEqual((len(blocks), progress), (2, [1, 2]))
+
+    def test_empty_csv_has_the_header(self):
+        self.assertEqual(''.join(iter_csv(Invoice, Invoice.objects.none())).splitlines()[0].split(',')[0], 'Invoice Number')
+
+    def test_unknown_format_is_400_before_parquet_is_checked(self):
+        url = reverse('export_model_excel', args=['invoice-data'])
+        self.assertEqual(self.client.get(url, {'format': 'pdf'}).status_code, 400)
+        with mock.patch('core.views.parquet_available', return_value=False):
+            self.assertEqual(self.client.get(url, {'format': 'parquet'}).status_code, 501)
+            self.assertEqual(self.client.get(url, {'format': 'pdf'}).status_code, 400)
+
+    @skipUnless(flat_exports.parquet_available(), 'pyarrow is not installed')
+    def test_parquet(self):
+        response = self.client.get(reverse('export_model_excel', args=['invoice-data']), {'format': 'parquet'})
+        table = flat_exports.pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.column('invoice_number').to_pylist(), ['INV-1', 'INV-2'])
@@ -0,0 +1,83 @@
+import csv
+import filecmp
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from core.generate_data import DEFAULT_COUNTS, HEADERS, generate, main
+from core.models import Invoice, PurchaseOrder, SpendEntry, Supplier
+
+from .base import CoreTestCase
+
+SMALL_COUNTS = {**DEFAULT_COUNTS, 'suppliers': 30, 'purchase_orders': 400, 'spend_entries': 600}
+
+
+class GenerateDataTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def out_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def read_csv(self, name, filename):
+        with open(os.path.join(self.out_dir(name), filename), newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def test_same_seed_same_files(self):
+        generate(self.out_dir('a'), SMALL_COUNTS, seed=7, log=None)
+        generate(self.out_dir('b'), SMALL_COUNTS, seed=7, log=None)
+        generate(self.out_dir('c'), SMALL_COUNTS, seed=8, log=None)
+        match, mismatch, errors = filecmp.cmpfiles(self.out_dir('a'), self.out_dir('b'), list(HEADERS), shallow=False)
+        self.assertEqual((sorted(match), mismatch, errors), (sorted(HEADERS), [], []))
+        self.assertFalse(filecmp.cmp(
+            os.path.join(self.out_dir('a'), 'spendentry.csv'), os.path.join(self.out_dir('c'), 'spendentry.csv'), shallow=False,
+        ))
+
+    def test_row_counts_follow_the_arguments(self):
+        written = generate(self.out_dir('a'), SMALL_COUNTS, seed=7, log=None)
+        self.assertEqual(written['supplier.csv'], 30)
+        self.assertEqual(written['purchaseorder.csv'], 400)
+        self.assertEqual(written['spendentry.csv'], 600)
+        self.assertEqual(len(self.read_csv('a', 'spendentry.csv')), 600)
+        # One invoice per issued or delivered order, never more than there are orders
+        self.assertLessEqual(written['invoice.csv'], 400)
+        self.assertEqual(list(self.read_csv('a', 'invoice.csv')[0]), HEADERS['invoice.csv'])
+
+    def test_foreign_keys_point_at_generated_rows(self):
+        generate(self.out_dir('a'), SMALL_COUNTS, seed=7, log=None)
+        supplier_ids = {row['id'] for row in self.read_csv('a', 'supplier.csv')}
+        orders = {row['id']: row for row in self.read_csv('a', 'purchaseorder.csv')}
+        self.assertLessEqual({row['supplier'] for row in orders.values()}, supplier_ids)
+        for invoice in self.read_csv('a', 'invoice.csv'):
+            order = orders[invoice['purchase_order']]
+            self.assertEqual((invoice['supplier'], invoice['amount']), (order['supplier'], order['amount']))
+
+    def test_generated_files_load_without_skips(self):
+        generate(self.out_dir('a'), {**DEFAULT_COUNTS, 'suppliers': 25, 'purchase_orders': 300}, seed=3, log=None)
+        out = StringIO()
+        call_command('load_brake_data', mode='bulk', data_dir=self.out_dir('a'), workers=1, stdout=out)
+        self.assertNotIn('Skipping', out.getvalue())
+        self.assertEqual(Supplier.objects.count(), 25)
+        self.assertEqual(PurchaseOrder.objects.count(), 300)
+        self.assertEqual(Invoice.objects.count(), len(self.read_csv('a', 'invoice.csv')))
+        self.assertEqual(SpendEntry.objects.count(), DEFAULT_COUNTS['spend_entries'])
+
+    def test_command_line_counts(self):
+        with mock.patch('core.generate_data.generate') as generate_mock:
+            main(['--out', self.out_dir('a'), '--seed', '3', '--suppliers', '25', '--spend-entries', '10'])
+        generate_mock.assert_called_once_with(
+            self.out_dir('a'), {**DEFAULT_COUNTS, 'suppliers': 25, 'spend_entries': 10}, seed=3,
+        )
+
+    def test_output_directory_is_required(self):
+        # Never overwrites the committed sample in core/data by default
+        with mock.patch('core.generate_data.generate') as generate_mock, \
+                mock.patch('sys.stderr', new_callable=StringIO), self.assertRaises(SystemExit):
+            main(['--seed', '3'])
+        generate_mock.assert_not_called()
@@ -0,0 +1,196 @@
+import csv
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Sum
+
+from core.bulkload import copy_text, parse_copy_line
+from core.management.commands.load_brake_data import (
+    ALL_MODELS, TABLE_SPECS, dependency_graph, dependency_levels,
+)
+from core.models import (
+    AlternateSupplier, Category, CategoryClosure, Invoice, PurchaseOrder, SpendEntry, Supplier,
+    SupplierContract, SupplierDiscount, SupplierProductPricing, SupplierScorecard,
+)
+from core.rollups import verify_spend_rollups
+from core.scorecards import rebuild_supplier_scorecards
+
+from .base import CoreTestCase
+
+
+def load(**options):
+    out = StringIO()
+    options.setdefault('workers', 1)
+    call_command('load_brake_data', stdout=out, **options)
+    return out.getvalue()
+
+
+def table_counts():
+    return {model: model.objects.count() for model in ALL_MODELS}
+
+
+def scorecard_values(supplier_id):
+    return list(
+        SupplierScorecard.objects.filter(supplier_id=supplier_id).order_by('period')
+        .values_list('period', 'invoice_count', 'po_count', 'spend_amount', 'on_time_rate', 'score')
+    )
+
+
+class BulkLoadTests(CoreTestCase):
+    def test_bulk_mode_loads_what_create_mode_loads(self):
+        load(mode='create')
+        created = table_counts()
+        invoice_total = Invoice.objects.aggregate(total=Sum('amount'))['total']
+
+        output = load(mode='bulk', batch_size=64)
+        self.assertIn('bulk_create, batch size 64', output)
+        self.assertEqual(table_counts(), created)
+        self.assertEqual(Invoice.objects.aggregate(total=Sum('amount'))['total'], invoice_total)
+        self.assertTrue(all(created.values()))
+
+    def test_bulk_mode_rebuilds_the_derived_tables(self):
+        load(mode='bulk')
+        self.assertEqual(verify_spend_rollups(), [])
+        self.assertTrue(CategoryClosure.objects.exists())
+        self.assertTrue(SupplierScorecard.objects.exists())
+
+    def test_new_rows_get_ids_past_the_loaded_ones(self):
+        load(mode='bulk')
+        highest = Supplier.objects.order_by('-pk').values_list('pk', flat=True).first()
+        supplier = Supplier.objects.create(name='Fresh Supplier', contact_email='fresh@example.com', type='Direct')
+        self.assertGreater(supplier.pk, highest)
+
+    def test_a_missing_csv_is_reported(self):
+        output = load(mode='bulk', data_dir='/nonexistent')
+        self.assertIn('supplier.csv not found', output)
+        self.assertFalse(SpendEntry.objects.exists())
+
+    def test_upsert_options_are_refused_in_other_modes(self):
+        output = load(mode='bulk', prune=True)
+        self.assertIn('--match and --prune only apply to --mode=upsert', output)
+
+
+class CopyTextTests(CoreTestCase):
+    def test_round_trip(self):
+        values = ['plain', 'tab\there', 'new\nline', 'back\\slash', None, '']
+        line = '\t'.join(copy_text(value) for value in values) + '\n'
+        self.assertEqual(parse_copy_line(line), values)
+
+    def test_booleans_and_dates(self):
+        self.assertEqual([copy_text(True), copy_text(False), copy_text(date(2024, 1, 2))], ['t', 'f', '2024-01-02'])
+
+
+class LoadPlanTests(CoreTestCase):
+    def test_levels_follow_the_foreign_keys(self):
+        levels = [set(level) for level in dependency_levels(dependency_graph(TABLE_SPECS))]
+        self.assertEqual(levels, [
+            {Supplier, Category},
+            {PurchaseOrder, SpendEntry, SupplierProductPricing, SupplierContract, SupplierDiscount, AlternateSupplier},
+            {Invoice},
+        ])
+
+    def test_graph_ignores_self_references_and_tables_not_loaded(self):
+        graph = dependency_graph([spec for spec in TABLE_SPECS if spec.model in (Category, PurchaseOrder)])
+        self.assertEqual(graph, {Category: set(), PurchaseOrder: {Category}})
+
+    def test_a_cycle_is_refused(self):
+        with self.assertRaisesMessage(ValueError, 'Circular foreign key dependency'):
+            dependency_levels({Supplier: {Invoice}, Invoice: {Supplier}})
+
+    def test_sqlite_loads_one_table_at_a_time(self):
+        output = load(mode='bulk', workers=8)
+        self.assertIn('Load plan (1 worker): Suppliers, Categories -> Purchase Orders', output)
+        self.assertIn('Total (wall clock)', output)
+
+
+class UpsertLoadTests(CoreTestCase):
+    """Upsert runs against a copy of core/data the tests can edit."""
+
+    def setUp(self):
+        super().setUp()
+        self.data_dir = os.path.join(tempfile.mkdtemp(), 'data')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.data_dir))
+        shutil.copytree(os.path.join(settings.BASE_DIR, 'core', 'data'), self.data_dir)
+        load(mode='bulk', data_dir=self.data_dir)
+
+    def upsert(self, **options):
+        return load(mode='upsert', data_dir=self.data_dir, **options)
+
+    def edit_csv(self, filename, edit):
+        """Rewrites one CSV; `edit` takes and returns the list of row dicts."""
+        path = os.path.join(self.data_dir, filename)
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = edit(list(reader))
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def change_row(self, filename, row_id, **changes):
+        def edit(rows):
+            for row in rows:
+                if row['id'] == str(row_id):
+                    row.update(changes)
+            return rows
+        self.edit_csv(filename, edit)
+
+    def test_unchanged_data_writes_nothing(self):
+        counts = table_counts()
+        output = self.upsert()
+        self.assertIn(f"Invoices: 0 inserted, 0 updated, {counts[Invoice]} unchanged", output)
+        self.assertIn(f"Spend Entries: 0 inserted, 0 updated, {counts[SpendEntry]} unchanged", output)
+        self.assertIn("Refreshed the spend rollups of 0 days and the scorecards of 0 suppliers in", output)
+        self.assertEqual(table_counts(), counts)
+
+    def test_a_moved_spend_entry_refreshes_both_days(self):
+        entry = SpendEntry.objects.get(pk=1)
+        self.change_row('spendentry.csv', 1, date='2019-06-01', amount='12.34')
+        output = self.upsert()
+        self.assertIn("Spend Entries: 0 inserted, 1 updated", output)
+        self.assertIn("Refreshed the spend rollups of 2 days and the scorecards of 0 suppliers", output)
+        entry.refresh_from_db()
+        self.assertEqual((entry.date, str(entry.amount)), (date(2019, 6, 1), '12.34'))
+        self.assertEqual(verify_spend_rollups(), [])
+
+    def test_a_changed_invoice_refreshes_its_suppliers_scorecards(self):
+        invoice = Invoice.objects.get(pk=1)
+        self.change_row('invoice.csv', 1, amount='1.00', status='Overdue', paid_date='')
+        self.assertIn("Invoices: 0 inserted, 1 updated", self.upsert())
+        refreshed = scorecard_values(invoice.supplier_id)
+        rebuild_supplier_scorecards()
+        self.assertEqual(refreshed, scorecard_values(invoice.supplier_id))
+
+    def test_new_rows_are_inserted_and_the_rest_kept(self):
+        SpendEntry.objects.filter(pk__in=[1, 2]).delete()
+        counts = table_counts()
+        output = self.upsert()
+        self.assertIn("Spend Entries: 2 inserted, 0 updated", output)
+        self.assertEqual(SpendEntry.objects.count(), counts[SpendEntry] + 2)
+        self.assertEqual(verify_spend_rollups(), [])
+
+    def test_natural_key_matching_ignores_the_csv_ids(self):
+        counts = table_counts()
+
+        def shift_ids(rows):
+            for row in rows:
+                row['id'] = str(int(row['id']) + 10000)
+            return rows
+        self.edit_csv('invoice.csv', shift_ids)
+        output = self.upsert(match='natural')
+        self.assertIn(f"Invoices: 0 inserted, 0 updated, {counts[Invoice]} unchanged", output)
+        self.assertEqual(table_counts(), counts)
+
+    def test_prune_deletes_rows_missing_from_the_csv(self):
+        self.edit_csv('spendentry.csv', lambda rows: [row for row in rows if row['id'] != '1'])
+        self.upsert()
+        self.assertTrue(SpendEntry.objects.filter(pk=1).exists())
+        self.assertIn("Pruned 1 spend entries.", self.upsert(prune=True))
+        self.assertFalse(SpendEntry.objects.filter(pk=1).exists())
+        self.assertEqual(verify_spend_rollups(), [])
@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core import rollups
+from core.analytics import spend_metrics
+from core.models import SpendDailyRollup, SpendEntry
+from core.rollups import (
+    rebuild_spend_rollups, refresh_spend_rollups, rollups_are_suspended, rollups_suspended, verify_spend_rollups,
+)
+
+from .base import CoreTestCase, make_category, make_spend, make_supplier
+
+JAN_10 = date(2024, 1, 10)
+JAN_11 = date(2024, 1, 11)
+
+
+class SpendRollupTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = make_supplier()
+        self.category = make_category('Castings')
+
+    def rollup(self, day):
+        return SpendDailyRollup.objects.values_list('total_amount', 'entry_count', 'min_amount', 'max_amount').get(date=day)
+
+    def test_writes_keep_the_day_current(self):
+        entry = make_spend('10.00', day=JAN_10, supplier=self.supplier, category=self.category)
+        make_spend('30.00', day=JAN_10, supplier=self.supplier, category=self.category)
+        self.assertEqual(self.rollup(JAN_10), (Decimal('40.00'), 2, Decimal('10.00'), Decimal('30.00')))
+
+        entry.amount = Decimal('5.00')
+        entry.save()
+        self.assertEqual(self.rollup(JAN_10), (Decimal('35.00'), 2, Decimal('5.00'), Decimal('30.00')))
+
+        entry.delete()
+        self.assertEqual(self.rollup(JAN_10), (Decimal('30.00'), 1, Decimal('30.00'), Decimal('30.00')))
+        self.assertEqual(verify_spend_rollups(), [])
+
+    def test_moving_an_entry_refreshes_both_days(self):
+        entry = make_spend('10.00', day=JAN_10, supplier=self.supplier)
+        entry.date = JAN_11
+        entry.save()
+        self.assertFalse(SpendDailyRollup.objects.filter(date=JAN_10).exists())
+        self.assertEqual(self.rollup(JAN_11)[:2], (Decimal('10.00'), 1))
+
+    def test_groups_are_kept_apart(self):
+        make_spend('10.00', day=JAN_10, supplier=self.supplier, cost_center='CC-1')
+        make_spend('20.00', day=JAN_10, supplier=self.supplier, cost_center='CC-2')
+        make_spend('40.00', day=JAN_10, category=self.category, cost_center='CC-1')
+        self.assertEqual(SpendDailyRollup.objects.filter(date=JAN_10).count(), 3)
+        self.assertEqual(verify_spend_rollups(), [])
+
+    def test_suspended_writes_are_caught_by_a_refresh(self):
+        with rollups_suspended():
+            self.assertTrue(rollups_are_suspended())
+            make_spend('10.00', day=JAN_10)
+            SpendEntry.objects.create(amount=Decimal('2.00'), date=JAN_11, cost_center='CC-1')
+        self.assertFalse(rollups_are_suspended())
+        self.assertEqual(len(verify_spend_rollups()), 2)
+        refresh_spend_rollups({JAN_10, JAN_11, None})
+        self.assertEqual(verify_spend_rollups(), [])
+
+    def test_refresh_batches_many_days(self):
+        with rollups_suspended():
+            for offset in range(7):
+                make_spend('1.00', day=date(2024, 2, 1 + offset))
+        original = rollups.REFRESH_BATCH_SIZE
+        rollups.REFRESH_BATCH_SIZE = 3
+        try:
+            refresh_spend_rollups({date(2024, 2, 1 + offset) for offset in range(7)})
+        finally:
+            rollups.REFRESH_BATCH_SIZE = original
+        self.assertEqual(SpendDailyRollup.objects.count(), 7)
+        self.assertEqual(verify_spend_rollups(), [])
+
+    def test_spend_metrics_read_the_rollups(self):
+        make_spend('10.00', day=JAN_10, supplier=self.supplier, category=self.category)
+        make_spend('15.50', day=JAN_11, supplier=self.supplier)
+        with self.assertNumQueries(3):
+            metrics = spend_metrics()
+        self.assertEqual((metrics['total_records'], metrics['total_spend_amount']), (2, Decimal('25.50')))
+        self.assertEqual(metrics['spend_by_category'], [
+            {'category__name': None, 'total': Decimal('15.50')},
+            {'category__name': 'Castings', 'total': Decimal('10.00')},
+        ])
+
+    def test_rebuild_and_verify_command(self):
+        with rollups_suspended():
+            make_spend('10.00', day=JAN_10)
+        with self.assertRaisesMessage(CommandError, 'Spend rollups do not match SpendEntry.'):
+            call_command('rebuild_spend_rollups', verify_only=True, stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_spend_rollups', stdout=out)
+        self.assertIn('Spend rollups match SpendEntry.', out.getvalue())
+        self.assertEqual(rebuild_spend_rollups(), 1)
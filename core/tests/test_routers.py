@@ -0,0 +1,68 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from core.models import Supplier
+from core.routers import (
+    REPLICA_PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, pinned_to_primary, replica_for_read, replica_reads,
+)
+
+
+@skipUnless('replica' in settings.DATABASES, "needs a 'replica' database alias (e.g. DATABASE_SQLITE=1)")
+@override_settings(READ_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    # TransactionTestCase: inside TestCase's transaction every read stays on the primary
+    databases = {'default', 'replica'}
+
+    def test_marked_reads_go_to_the_replica(self):
+        self.assertIsNone(replica_for_read())
+        with replica_reads():
+            self.assertEqual(replica_for_read(), 'replica')
+            self.assertEqual(ReplicaRouter().db_for_read(Supplier), 'replica')
+
+    def test_writes_always_go_to_the_primary(self):
+        with replica_reads():
+            self.assertEqual(ReplicaRouter().db_for_write(Supplier), 'default')
+            supplier = Supplier.objects.create(name='Acme')
+        self.assertEqual(supplier._state.db, 'default')
+
+    def test_reads_after_a_write_in_a_transaction_stay_on_the_primary(self):
+        with replica_reads():
+            with transaction.atomic():
+                Supplier.objects.create(name='Acme')
+                self.assertIsNone(replica_for_read())
+                self.assertEqual(Supplier.objects.count(), 1)
+
+    def test_pinned_reads_stay_on_the_primary(self):
+        with replica_reads(), pinned_to_primary():
+            self.assertIsNone(replica_for_read())
+
+    def _middleware(self, write=False):
+        seen = {}
+
+        def view(request):
+            if write:
+                Supplier.objects.create(name='Acme')
+            with replica_reads():
+                seen['alias'] = replica_for_read()
+            return HttpResponse()
+        return ReplicaRoutingMiddleware(view), seen
+
+    def test_unsafe_requests_are_pinned_and_set_the_pin_cookie(self):
+        middleware, seen = self._middleware(write=True)
+        response = middleware(RequestFactory().post('/'))
+        self.assertIsNone(seen['alias'])
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_requests_after_a_write_read_from_the_primary(self):
+        middleware, seen = self._middleware()
+        request = RequestFactory().get('/')
+        request.COOKIES[REPLICA_PIN_COOKIE] = '1'
+        middleware(request)
+        self.assertIsNone(seen['alias'])
+
+        middleware(RequestFactory().get('/'))
+        self.assertEqual(seen['alias'], 'replica')
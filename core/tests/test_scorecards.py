@@ -0,0 +1,245 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Invoice, InvoiceStatus, PurchaseOrder, PurchaseOrderStatus, SupplierScorecard
+from core.scorecards import (
+    SCORE_WEIGHTS, SCORECARD_WINDOW_MONTHS, _PendingRefresh, latest_scorecards, parse_period,
+    rebuild_supplier_scorecards, refresh_supplier_scorecards, scorecard_count, scorecard_rows,
+)
+
+from .base import CoreTestCase, make_invoice, make_order, make_supplier
+
+
+def expected_scorecards(supplier):
+    """The scorecard rows of `supplier`, computed in Python from its invoices and orders."""
+    months = defaultdict(lambda: defaultdict(Decimal))
+    for invoice in Invoice.objects.filter(supplier=supplier):
+        month = months[invoice.invoice_date.replace(day=1)]
+        month['invoice_count'] += 1
+        if invoice.paid_date:
+            month['paid_count'] += 1
+            month['on_time_count'] += invoice.paid_date <= invoice.due_date
+            month['days_to_pay'] += (invoice.paid_date - invoice.invoice_date).days
+        month['overdue_count'] += bool(
+            (invoice.paid_date and invoice.paid_date > invoice.due_date)
+            or (not invoice.paid_date and invoice.status == InvoiceStatus.OVERDUE)
+        )
+    for order in PurchaseOrder.objects.filter(supplier=supplier):
+        month = months[order.issue_date.replace(day=1)]
+        month['po_count'] += 1
+        if order.status == PurchaseOrderStatus.CANCELLED:
+            month['cancelled_count'] += 1
+        else:
+            month['spend_amount'] += order.amount
+
+    def rate(window, numerator, denominator):
+        total = sum(month[denominator] for month in window)
+        return float(sum(month[numerator] for month in window) / total) if total else None
+
+    expected = {}
+    periods = sorted(months)
+    for index, period in enumerate(periods):
+        window = [months[p] for p in periods[max(0, index - SCORECARD_WINDOW_MONTHS + 1):index + 1]]
+        rates = {
+            'on_time_rate': rate(window, 'on_time_count', 'paid_count'),
+            'avg_days_to_pay': rate(window, 'days_to_pay', 'paid_count'),
+            'overdue_ratio': rate(window, 'overdue_count', 'invoice_count'),
+            'cancellation_rate': rate(window, 'cancelled_count', 'po_count'),
+        }
+        known = {name: weight for name, (weight, _) in SCORE_WEIGHTS.items() if rates[name] is not None}
+        score = None
+        if known:
+            score = 10 * sum(
+                weight * (rates[name] if SCORE_WEIGHTS[name][1] else 1 - rates[name]) for name, weight in known.items()
+            ) / sum(known.values())
+        expected[period] = {
+            **rates, 'score': score, 'invoice_count': int(months[period]['invoice_count']),
+            'po_count': int(months[period]['po_count']), 'spend_amount': months[period]['spend_amount'],
+        }
+    return expected
+
+
+class ScorecardTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.acme = make_supplier('Acme Brakes')
+        self.bolt = make_supplier('Bolt Castings')
+        self.quiet = make_supplier('Quiet Parts') # No invoices or orders, so no scorecards
+        with self.captureOnCommitCallbacks(execute=True):
+            # Acme: active January to April, with a gap in March
+            make_invoice(self.acme, 'A-1', invoiced=date(2024, 1, 15), due=date(2024, 2, 14), paid_date=date(2024, 2, 1))
+            make_invoice(self.acme, 'A-2', invoiced=date(2024, 1, 20), due=date(2024, 2, 19), paid_date=date(2024, 3, 1))
+            make_order(self.acme, 'PO-A1', amount='100.00', issued=date(2024, 1, 5))
+            make_order(self.acme, 'PO-A2', amount='50.00', issued=date(2024, 1, 6), status=PurchaseOrderStatus.CANCELLED)
+            make_invoice(self.acme, 'A-3', invoiced=date(2024, 2, 3), due=date(2024, 3, 4), paid_date=date(2024, 2, 20))
+            make_order(self.acme, 'PO-A3', amount='75.50', issued=date(2024, 4, 2))
+            make_invoice(self.acme, 'A-4', invoiced=date(2024, 4, 9), due=date(2024, 5, 9))
+            # Bolt: one unpaid overdue invoice, no orders
+            make_invoice(self.bolt, 'B-1', invoiced=date(2024, 1, 11), due=date(2024, 1, 31), status=InvoiceStatus.OVERDUE)
+
+    def assertScorecardsMatch(self, supplier):
+        expected = expected_scorecards(supplier)
+        cards = {card.period: card for card in SupplierScorecard.objects.filter(supplier=supplier)}
+        self.assertEqual(sorted(cards), sorted(expected))
+        for period, values in expected.items():
+            for name, value in values.items():
+                with self.subTest(supplier=supplier.name, period=period, field=name):
+                    actual = getattr(cards[period], name)
+                    if isinstance(value, float):
+                        self.assertAlmostEqual(actual, value, places=6)
+                    else:
+                        self.assertEqual(actual, value)
+
+    def test_scorecards_match_python_calculation(self):
+        for supplier in (self.acme, self.bolt, self.quiet):
+            self.assertScorecardsMatch(supplier)
+        january = SupplierScorecard.objects.get(supplier=self.acme, period=date(2024, 1, 1))
+        self.assertAlmostEqual(january.score, 5.0)
+        self.assertEqual(january.spend_amount, Decimal('100.00'))
+        self.assertAlmostEqual(SupplierScorecard.objects.get(supplier=self.bolt).score, 0.0)
+
+    def test_rebuild_matches_incremental_refresh(self):
+        incremental = set(SupplierScorecard.objects.values_list(
+            'supplier_id', 'period', 'invoice_count', 'po_count', 'spend_amount', 'score',
+        ))
+        self.assertEqual(rebuild_supplier_scorecards(), len(incremental))
+        self.assertEqual(set(SupplierScorecard.objects.values_list(
+            'supplier_id', 'period', 'invoice_count', 'po_count', 'spend_amount', 'score',
+        )), incremental)
+
+    def test_refresh_leaves_other_suppliers_alone(self):
+        bolt_rows = list(SupplierScorecard.objects.filter(supplier=self.bolt).values_list('pk', 'computed_at'))
+        SupplierScorecard.objects.filter(supplier=self.acme).delete()
+        refresh_supplier_scorecards([self.acme.pk, None])
+        self.assertScorecardsMatch(self.acme)
+        self.assertEqual(list(SupplierScorecard.objects.filter(supplier=self.bolt).values_list('pk', 'computed_at')), bolt_rows)
+
+    def test_signals_refresh_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            invoice = make_invoice(self.bolt, 'B-2', invoiced=date(2024, 1, 12), paid_date=date(2024, 1, 20))
+            make_order(self.bolt, 'PO-B1', issued=date(2024, 1, 13))
+        self.assertEqual(SupplierScorecard.objects.get(supplier=self.bolt).invoice_count, 1) # Not before the commit
+        for callback in callbacks:
+            callback()
+        self.assertScorecardsMatch(self.bolt)
+
+        # Moving an invoice to another supplier refreshes both
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.supplier = self.quiet
+            invoice.save()
+        for supplier in (self.bolt, self.quiet):
+            self.assertScorecardsMatch(supplier)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.filter(supplier=self.quiet).delete()
+        self.assertFalse(SupplierScorecard.objects.filter(supplier=self.quiet).exists())
+
+    def test_one_refresh_per_transaction(self):
+        with mock.patch('core.scorecards.refresh_supplier_scorecards', wraps=refresh_supplier_scorecards) as refresh:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                make_invoice(self.acme, 'A-5', invoiced=date(2024, 4, 20))
+                for number in range(3):
+                    make_order(self.bolt, f'PO-B{number}', issued=date(2024, 2, 1))
+        self.assertEqual(len([callback for callback in callbacks if isinstance(callback, _PendingRefresh)]), 1)
+        refresh.assert_called_once_with({self.acme.pk, self.bolt.pk}, 'default')
+        self.assertScorecardsMatch(self.bolt)
+
+    def test_rolled_back_changes_are_not_carried_over(self):
+        with mock.patch('core.scorecards.refresh_supplier_scorecards') as refresh:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                make_order(self.acme, 'PO-A9', issued=date(2024, 2, 1))
+                raise RuntimeError
+            with self.captureOnCommitCallbacks(execute=True):
+                make_order(self.bolt, 'PO-B9', issued=date(2024, 2, 1))
+        refresh.assert_called_once_with({self.bolt.pk}, 'default')
+
+    def test_latest_scorecards_ranked(self):
+        cards = list(latest_scorecards())
+        self.assertEqual([(card.supplier_id, card.rank) for card in cards], [(self.acme.pk, 1), (self.bolt.pk, 2)])
+        self.assertEqual(cards[0].period, date(2024, 4, 1)) # Acme's latest month, not its best one
+        self.assertEqual(cards[1].period, date(2024, 1, 1))
+
+        # Ties share a rank; a NULL score ranks last
+        SupplierScorecard.objects.filter(supplier=self.bolt).update(score=cards[0].score)
+        self.assertEqual([card.rank for card in latest_scorecards()], [1, 1])
+        SupplierScorecard.objects.filter(supplier=self.acme).update(score=None)
+        self.assertEqual([card.supplier_id for card in latest_scorecards()], [self.bolt.pk, self.acme.pk])
+
+    def test_latest_scorecards_for_period(self):
+        cards = list(latest_scorecards(date(2024, 2, 1)))
+        self.assertEqual([(card.supplier_id, card.rank) for card in cards], [(self.acme.pk, 1)])
+
+    def test_scorecard_rows_keep_rank_for_one_supplier(self):
+        rows = scorecard_rows(supplier_id=self.bolt.pk)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['rank'], 2)
+        self.assertEqual(rows[0]['supplier'], 'Bolt Castings')
+        self.assertEqual(rows[0]['period'], '2024-01-01')
+        self.assertIsNone(rows[0]['on_time_rate'])
+
+    def test_scorecard_rows_paged_in_sql(self):
+        self.assertEqual([row['supplier_id'] for row in scorecard_rows(limit=1)], [self.acme.pk])
+        self.assertEqual([(row['supplier_id'], row['rank']) for row in scorecard_rows(limit=1, offset=1)], [(self.bolt.pk, 2)])
+        self.assertEqual(scorecard_rows(offset=2), [])
+        self.assertEqual(scorecard_count(), 2)
+        self.assertEqual(scorecard_count(date(2024, 2, 1)), 1)
+        with CaptureQueriesContext(connection) as queries:
+            scorecard_rows(supplier_id=self.bolt.pk)
+        self.assertEqual(len(queries), 1) # Names joined in, one supplier's row filtered by the database
+        self.assertIn('WHERE ranked.supplier_id =', queries[0]['sql'])
+
+    def test_parse_period(self):
+        self.assertEqual(parse_period('2024-03'), date(2024, 3, 1))
+        self.assertEqual(parse_period(' 2024-03-17 '), date(2024, 3, 1))
+        self.assertIsNone(parse_period(''))
+        for raw in ('March', '2024-13', '2024-02-30'):
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                parse_period(raw)
+
+    def test_endpoint(self):
+        url = reverse('supplier_scorecards_json')
+        data = self.client.get(url).json()
+        self.assertIsNone(data['period'])
+        self.assertEqual([row['supplier_id'] for row in data['scorecards']], [self.acme.pk, self.bolt.pk])
+        self.assertEqual(data['scorecards'][0]['spend_amount'], '75.50')
+
+        data = self.client.get(url, {'period': '2024-01', 'supplier': self.acme.pk}).json()
+        self.assertEqual(data['period'], '2024-01-01')
+        self.assertEqual([(row['supplier_id'], row['rank'], row['score']) for row in data['scorecards']], [(self.acme.pk, 1, 5.0)])
+
+        data = self.client.get(url, {'limit': 1, 'offset': 1}).json()
+        self.assertEqual((data['limit'], data['offset'], data['total']), (1, 1, 2))
+        self.assertEqual([(row['supplier_id'], row['rank']) for row in data['scorecards']], [(self.bolt.pk, 2)])
+
+        for params in ({'period': 'March'}, {'supplier': 'acme'}, {'limit': 0}, {'limit': 5000}, {'offset': '-1'}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['status'], 'error')
+
+    def test_endpoint_sees_refreshed_scorecards(self):
+        url = reverse('supplier_scorecards_json')
+        self.assertEqual(self.client.get(url, {'supplier': self.bolt.pk}).json()['scorecards'][0]['invoice_count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_invoice(self.bolt, 'B-2', invoiced=date(2024, 1, 12))
+        self.assertEqual(self.client.get(url, {'supplier': self.bolt.pk}).json()['scorecards'][0]['invoice_count'], 2)
+
+    def test_command(self):
+        SupplierScorecard.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_supplier_scorecards', supplier=[self.bolt.pk], stdout=out)
+        self.assertIn('Rebuilt 1 supplier scorecard rows', out.getvalue())
+        self.assertFalse(SupplierScorecard.objects.filter(supplier=self.acme).exists())
+
+        out = StringIO()
+        call_command('rebuild_supplier_scorecards', stdout=out)
+        self.assertIn(f'Rebuilt {SupplierScorecard.objects.count()} supplier scorecard rows', out.getvalue())
+        self.assertScorecardsMatch(self.acme)
@@ -0,0 +1,39 @@
+from datetime import date
+from decimal import Decimal
+
+from core.models import Invoice, Supplier
+from core.serializers import get_serializer
+
+from .base import CoreTestCase, make_invoice, make_supplier
+
+
+class RowSerializerTests(CoreTestCase):
+    def test_converters_follow_the_field_types(self):
+        serializer = get_serializer(Invoice, ['id', 'amount', 'invoice_date', 'paid_date', 'supplier_id', 'status'])
+        rows = [(1, Decimal('10.50'), date(2024, 1, 2), None, 7, 'Paid')]
+        self.assertEqual(serializer.columns(rows), [[1], ['10.50'], ['2024-01-02'], [None], [7], ['Paid']])
+        # Columns that are already JSON friendly get no converter at all
+        self.assertEqual([convert is None for convert in serializer.converters], [True, False, False, False, True, True])
+
+    def test_floats_are_rounded_for_display(self):
+        serializer = get_serializer(Supplier, ['score'])
+        self.assertEqual(serializer.columns([(1 / 3,), (None,)]), [[0.33, None]])
+
+    def test_compiled_once_per_model_and_fields(self):
+        self.assertIs(get_serializer(Supplier, ['id', 'name']), get_serializer(Supplier, ('id', 'name')))
+        self.assertIsNot(get_serializer(Supplier, ['id', 'name']), get_serializer(Supplier, ['name', 'id']))
+
+    def test_no_rows_gives_empty_columns(self):
+        self.assertEqual(get_serializer(Supplier, ['id', 'name']).columns([]), [[], []])
+
+    def test_payload_streams_in_chunks(self):
+        supplier = make_supplier()
+        for index in range(5):
+            make_invoice(supplier, f'INV-{index}', amount=f'{index}.10')
+        serializer = get_serializer(Invoice, ['invoice_number', 'amount'])
+        queryset = Invoice.objects.order_by('pk')
+        self.assertEqual(serializer.stream_columns(queryset, chunk_size=2), serializer.payload(queryset)['columns'])
+        self.assertEqual(serializer.payload(queryset), {
+            'fields': ['invoice_number', 'amount'],
+            'columns': [[f'INV-{index}' for index in range(5)], [f'{index}.10' for index in range(5)]],
+        })
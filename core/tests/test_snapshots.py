@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core.models import ExportJob, Invoice, RowDeletion, Supplier
+from core.snapshots import MANIFEST_NAME, restore_snapshot, snapshot_models, write_snapshot
+
+from .base import CoreTestCase, make_category, make_invoice, make_order, make_spend, make_supplier
+
+
+def table_contents():
+    return {
+        model: list(model._base_manager.order_by('pk').values_list(*[field.attname for field in model._meta.concrete_fields]))
+        for model in snapshot_models()
+    }
+
+
+class SnapshotTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'demo.snapshot.zip')
+        # Values COPY's text format has to escape, NULLs, booleans, decimals, dates and datetimes
+        supplier = make_supplier('Acme Brakes', address='Line 1\nLine\t2 \\ back', is_active=False, score=7.25)
+        make_supplier('Bolt Castings', phone=None)
+        parent = make_category('Materials')
+        category = make_category('Castings', parent)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = make_order(supplier, 'PO-1', category=category)
+            make_invoice(supplier, 'INV-1', amount='123.45', purchase_order=order, paid_date=date(2024, 2, 1))
+            make_spend('10.00', supplier=supplier, category=category, description='tab\there')
+
+    def rewrite_manifest(self, change):
+        rewritten = os.path.join(self.dir, 'rewritten.zip')
+        with zipfile.ZipFile(self.path) as source, zipfile.ZipFile(rewritten, 'w') as target:
+            for info in source.infolist():
+                data = source.read(info.filename)
+                if info.filename == MANIFEST_NAME:
+                    manifest = json.loads(data)
+                    change(manifest)
+                    data = json.dumps(manifest)
+                target.writestr(info, data)
+        return rewritten
+
+    def test_round_trip(self):
+        before = table_contents()
+        manifest = write_snapshot(self.path)
+        self.assertEqual({table['model'] for table in manifest['tables']}, {model._meta.label for model in snapshot_models()})
+        Invoice.objects.all().delete()
+        make_supplier('Changed Later')
+        ExportJob.objects.create(model_name='invoice-data', format='csv', dedup_key='k')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            row_counts = restore_snapshot(self.path)
+        self.assertEqual(row_counts['core_supplier'], 2)
+        self.assertEqual(table_contents(), before)
+        self.assertEqual(ExportJob.objects.count(), 1)  # Not part of the snapshot
+        # The columnar copies are told to reload
+        self.assertTrue(RowDeletion.objects.filter(table_name='core_spendentry', row_id=None).exists())
+        # Sequences were moved past the restored ids
+        self.assertGreater(make_supplier('After Restore').pk, max(row[0] for row in before[Supplier]))
+
+    def test_schema_version_must_match(self):
+        write_snapshot(self.path)
+        path = self.rewrite_manifest(lambda manifest: manifest.update(schema_version='0001_initial'))
+        with self.assertRaisesMessage(ValueError, 'migrate the database to that version first'):
+            restore_snapshot(path)
+        self.assertEqual(Supplier.objects.count(), 2)
+
+    def test_row_count_mismatch_changes_nothing(self):
+        write_snapshot(self.path)
+
+        def miscount(manifest):
+            manifest['tables'][-1]['rows'] += 1
+        path = self.rewrite_manifest(miscount)
+        before = table_contents()
+        with self.assertRaisesMessage(ValueError, 'the manifest says'):
+            restore_snapshot(path)
+        self.assertEqual(table_contents(), before)
+
+    def test_not_a_snapshot(self):
+        with zipfile.ZipFile(self.path, 'w') as archive:
+            archive.writestr('hello.txt', 'hi')
+        with self.assertRaisesMessage(ValueError, 'manifest.json is missing'):
+            restore_snapshot(self.path)
+
+    def test_commands(self):
+        out = StringIO()
+        call_command('snapshot', self.path, stdout=out)
+        self.assertIn('core_supplier', out.getvalue())
+        out = StringIO()
+        call_command('restore', self.path, stdout=out)
+        self.assertIn('Restored', out.getvalue())
+        with self.assertRaisesMessage(CommandError, 'Restore failed, nothing was changed'):
+            call_command('restore', os.path.join(self.dir, 'missing.zip'), stdout=StringIO())
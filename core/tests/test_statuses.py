@@ -0,0 +1,56 @@
+from importlib import import_module
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.analytics import invoice_metrics, purchase_order_metrics
+from core.models import Invoice, InvoiceStatus, PurchaseOrder, PurchaseOrderStatus, normalize_status
+
+from .base import CoreTestCase, make_invoice, make_order, make_supplier
+
+status_migration = import_module('core.migrations.0005_status_choices_and_indexes')
+
+
+class StatusTests(CoreTestCase):
+    def test_normalize_status(self):
+        self.assertEqual(normalize_status(InvoiceStatus, ' paid '), InvoiceStatus.PAID)
+        self.assertEqual(normalize_status(PurchaseOrderStatus, 'CANCELLED'), PurchaseOrderStatus.CANCELLED)
+        self.assertIsNone(normalize_status(InvoiceStatus, 'Approved'))
+        self.assertIsNone(normalize_status(InvoiceStatus, None))
+
+    def test_unknown_statuses_are_refused_by_the_database(self):
+        supplier = make_supplier()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_invoice(supplier, 'INV-1', status='paid')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_order(supplier, 'PO-1', status='Shipped')
+
+    def test_metrics_compare_statuses_exactly(self):
+        # A case-insensitive comparison (UPPER(status) = UPPER(%s)) could not use the status index
+        with CaptureQueriesContext(connection) as queries:
+            invoice_metrics()
+            purchase_order_metrics()
+        for query in queries:
+            self.assertNotIn('UPPER(', query['sql'].upper())
+
+    @skipUnless(connection.vendor == 'sqlite', 'Writes rows the check constraints refuse')
+    def test_migration_canonicalizes_stored_statuses(self):
+        supplier = make_supplier()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA ignore_check_constraints = ON')
+        try:
+            make_invoice(supplier, 'INV-1', status=' paid')
+            make_invoice(supplier, 'INV-2', status='OVERDUE')
+            make_invoice(supplier, 'INV-3', status='lost')
+            make_order(supplier, 'PO-1', status='approved')
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA ignore_check_constraints = OFF')
+        status_migration._canonicalize(Invoice, status_migration.INVOICE_STATUSES)
+        status_migration._canonicalize(PurchaseOrder, status_migration.PURCHASE_ORDER_STATUSES)
+        self.assertEqual(
+            dict(Invoice.objects.values_list('invoice_number', 'status')),
+            {'INV-1': 'Paid', 'INV-2': 'Overdue', 'INV-3': 'Pending'},
+        )
+        self.assertEqual(PurchaseOrder.objects.get().status, 'Approved')
@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+
+from django.urls import reverse
+
+from core.timeseries import MAX_BUCKETS, bucket_label, bucket_start, previous_year_bucket, spend_time_series
+
+from .base import CoreTestCase, make_category, make_invoice, make_order, make_spend, make_supplier
+
+
+class BucketTests(CoreTestCase):
+    def test_bucket_starts(self):
+        day = date(2024, 2, 29)  # A Thursday
+        self.assertEqual(bucket_start(day, 'day'), day)
+        self.assertEqual(bucket_start(day, 'week'), date(2024, 2, 26))
+        self.assertEqual(bucket_start(day, 'month'), date(2024, 2, 1))
+        self.assertEqual(bucket_start(day, 'quarter'), date(2024, 1, 1))
+        self.assertEqual(bucket_start(day, 'fiscal_year'), date(2023, 4, 1))
+        self.assertEqual(bucket_start(date(2024, 4, 1), 'fiscal_year'), date(2024, 4, 1))
+
+    def test_labels(self):
+        self.assertEqual(bucket_label(date(2024, 2, 26), 'week'), '2024-W09')
+        self.assertEqual(bucket_label(date(2024, 4, 1), 'quarter'), '2024-Q2')
+        self.assertEqual(bucket_label(date(2099, 4, 1), 'fiscal_year'), 'FY2099-00')
+
+    def test_previous_year_of_a_leap_day(self):
+        self.assertEqual(previous_year_bucket(date(2024, 2, 29), 'day'), date(2023, 2, 28))
+
+
+class SpendTimeSeriesTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = make_supplier()
+        self.materials = make_category('Materials')
+        self.castings = make_category('Castings', self.materials)
+        make_spend('10.00', day=date(2023, 1, 5), category=self.castings, supplier=self.supplier)
+        make_spend('20.00', day=date(2024, 1, 20), category=self.castings)
+        make_spend('5.00', day=date(2024, 1, 21), category=self.materials, cost_center='CC-2')
+        make_spend('7.00', day=date(2024, 3, 3))
+
+    def summarize(self, buckets, *keys):
+        return [tuple(bucket[key] for key in ('label', *keys)) for bucket in buckets]
+
+    def test_monthly_buckets_fill_the_gaps(self):
+        buckets = spend_time_series('spend', 'month', date_from=date(2024, 1, 1))
+        self.assertEqual(self.summarize(buckets, 'total', 'count'), [
+            ('2024-01', Decimal('25.00'), 2), ('2024-02', Decimal('0.00'), 0), ('2024-03', Decimal('7.00'), 1),
+        ])
+
+    def test_weeks_and_fiscal_years_match_python(self):
+        weeks = spend_time_series('spend', 'week', date_from=date(2024, 1, 15), date_to=date(2024, 1, 28))
+        self.assertEqual(self.summarize(weeks, 'period', 'total'), [
+            ('2024-W03', date(2024, 1, 15), Decimal('25.00')), ('2024-W04', date(2024, 1, 22), Decimal('0.00')),
+        ])
+        fiscal = spend_time_series('spend', 'fiscal_year')
+        self.assertEqual(self.summarize(fiscal, 'total'), [('FY2022-23', Decimal('10.00')), ('FY2023-24', Decimal('32.00'))])
+
+    def test_year_over_year(self):
+        buckets = spend_time_series('spend', 'quarter', date_from=date(2024, 1, 1), date_to=date(2024, 3, 31), yoy=True)
+        self.assertEqual(self.summarize(buckets, 'total', 'previous_year_total', 'yoy_change_pct'), [
+            ('2024-Q1', Decimal('32.00'), Decimal('10.00'), 220.0),
+        ])
+
+    def test_category_filter_includes_subcategories(self):
+        buckets = spend_time_series('spend', 'month', filters={'category': self.materials.pk}, date_from=date(2024, 1, 1))
+        self.assertEqual(buckets[0]['total'], Decimal('25.00'))
+        buckets = spend_time_series('spend', 'month', filters={'category': self.castings.pk}, date_from=date(2024, 1, 1))
+        self.assertEqual(buckets[0]['total'], Decimal('20.00'))
+        buckets = spend_time_series('spend', 'month', filters={'cost_center': 'CC-2'})
+        self.assertEqual(self.summarize(buckets, 'total'), [('2024-01', Decimal('5.00'))])
+
+    def test_invoices_by_the_category_of_their_order(self):
+        order = make_order(self.supplier, 'PO-1', category=self.castings)
+        make_invoice(self.supplier, 'INV-1', amount='40.00', purchase_order=order, invoiced=date(2024, 2, 1))
+        make_invoice(self.supplier, 'INV-2', amount='1.00', invoiced=date(2024, 2, 2))
+        buckets = spend_time_series('invoices', 'month', filters={'category': self.materials.pk})
+        self.assertEqual(self.summarize(buckets, 'total', 'count'), [('2024-02', Decimal('40.00'), 1)])
+
+    def test_too_many_buckets(self):
+        with self.assertRaisesMessage(ValueError, f'More than {MAX_BUCKETS} buckets'):
+            spend_time_series('spend', 'day', date_from=date(2000, 1, 1), date_to=date(2024, 1, 1))
+
+    def test_endpoint(self):
+        url = reverse('time_series_json', args=['spend'])
+        response = self.client.get(url, {'interval': 'quarter', 'supplier': self.supplier.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['buckets'][0]['label'], '2023-Q1')
+        self.assertEqual(response.json()['filters'], {'supplier': self.supplier.pk})
+        self.assertEqual(self.client.get(url, {'interval': 'decade'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'supplier': 'acme'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('time_series_json', args=['payroll'])).status_code, 404)
@@ -0,0 +1,76 @@
+from core.analytics import cached_summary_metrics
+from core.models import Invoice, PurchaseOrder, SpendEntry, Supplier
+from core.versioning import (
+    bump_model_versions, cached_aggregate, get_last_modified, get_model_version, get_model_versions,
+)
+
+from .base import CoreTestCase, make_invoice, make_supplier
+
+
+class ModelVersionTests(CoreTestCase):
+    def test_versions_are_seeded_once_and_stable(self):
+        first = get_model_versions([Invoice, Supplier])
+        self.assertEqual(get_model_versions([Invoice, Supplier]), first)
+        self.assertNotEqual(first[Invoice], first[Supplier])
+
+    def test_every_bump_gives_a_new_token(self):
+        seen = {get_model_version(Invoice)}
+        for _ in range(5):
+            bump_model_versions(Invoice)
+            seen.add(get_model_version(Invoice))
+        self.assertEqual(len(seen), 6)
+
+    def test_save_bumps_only_after_commit(self):
+        supplier = make_supplier()
+        before = get_model_version(Invoice)
+        with self.captureOnCommitCallbacks() as callbacks:
+            make_invoice(supplier, 'INV-1')
+            self.assertEqual(get_model_version(Invoice), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_model_version(Invoice), before)
+
+    def test_delete_bumps_the_models_that_point_at_the_row(self):
+        supplier = make_supplier()
+        before = get_model_versions([Invoice, PurchaseOrder, SpendEntry])
+        with self.captureOnCommitCallbacks(execute=True):
+            supplier.delete()
+        after = get_model_versions([Invoice, PurchaseOrder, SpendEntry])
+        for model in before:
+            self.assertNotEqual(after[model], before[model], model)
+
+    def test_last_modified_moves_with_a_bump(self):
+        before = get_last_modified([Invoice])
+        bump_model_versions(Invoice)
+        self.assertGreaterEqual(get_last_modified([Invoice]), before)
+        self.assertGreaterEqual(get_last_modified([Invoice, Supplier]), get_last_modified([Supplier]))
+
+
+class CachedAggregateTests(CoreTestCase):
+    def test_served_from_cache_until_a_dependency_changes(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cached_aggregate('probe', [Invoice], compute), 1)
+        self.assertEqual(cached_aggregate('probe', [Invoice], compute), 1)
+        bump_model_versions(Supplier)
+        self.assertEqual(cached_aggregate('probe', [Invoice], compute), 1)
+        bump_model_versions(Invoice)
+        self.assertEqual(cached_aggregate('probe', [Invoice], compute), 2)
+
+    def test_params_are_part_of_the_key(self):
+        self.assertEqual(cached_aggregate('probe', [Invoice], lambda: 'a', params=('x',)), 'a')
+        self.assertEqual(cached_aggregate('probe', [Invoice], lambda: 'b', params=('y',)), 'b')
+        self.assertEqual(cached_aggregate('probe', [Invoice], lambda: 'c', params=('x',)), 'a')
+
+    def test_cached_summary_sees_a_committed_write(self):
+        supplier = make_supplier()
+        self.assertEqual(cached_summary_metrics()['total_invoices_summary'], 0)
+        with self.assertNumQueries(0):
+            cached_summary_metrics()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_invoice(supplier, 'INV-1')
+        self.assertEqual(cached_summary_metrics()['total_invoices_summary'], 1)
@@ -0,0 +1,210 @@
+# core/timeseries.py
+"""
+Spend, purchase order and invoice amounts over time, bucketed in the database.
+
+Buckets are computed with Trunc* functions (day, week, month, quarter) or, for the
+Indian fiscal year (April to March), a CASE over the year and month. Spend is read from
+the daily rollups (core/rollups.py), so a five year monthly series only groups a few
+thousand pre-aggregated rows; purchase orders and invoices are grouped directly.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, Count, DateField, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear, TruncDay, TruncMonth, TruncQuarter, TruncWeek
+
+from .analytics import ZERO_AMOUNT
+from .models import CategoryClosure, Invoice, PurchaseOrder, SpendDailyRollup, SpendEntry
+from .versioning import cached_aggregate
+
+INTERVALS = ('day', 'week', 'month', 'quarter', 'fiscal_year')
+FISCAL_YEAR_START_MONTH = 4 # Indian fiscal year: April to March
+MAX_BUCKETS = 5000 # e.g. about 13 years of days
+CENTS = Decimal('0.01')
+
+TRUNC_FUNCTIONS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+}
+
+
+class Series:
+    """Where one time series reads from and which filters it accepts."""
+
+    def __init__(self, model, date_field, amount, count, filters, dependencies):
+        self.model = model
+        self.date_field = date_field
+        self.amount = amount # Aggregate expression for the bucket total
+        self.count = count # Aggregate expression for the number of rows behind the bucket
+        self.filters = filters # {query parameter: lookup}
+        self.dependencies = dependencies # Models whose versions key the cache
+
+
+SERIES = {
+    'spend': Series(
+        SpendDailyRollup, 'date', Sum('total_amount'), Sum('entry_count'),
+        {'category': 'category', 'supplier': 'supplier_id', 'cost_center': 'cost_center'},
+        (SpendEntry, SpendDailyRollup, CategoryClosure),
+    ),
+    'purchase-orders': Series(
+        PurchaseOrder, 'issue_date', Sum('amount'), Count('id'),
+        {'category': 'category', 'supplier': 'supplier_id'},
+        (PurchaseOrder, CategoryClosure),
+    ),
+    'invoices': Series(
+        Invoice, 'invoice_date', Sum('amount'), Count('id'),
+        {'category': 'purchase_order__category', 'supplier': 'supplier_id'},
+        (Invoice, PurchaseOrder, CategoryClosure),
+    ),
+}
+
+
+# --- Buckets ---
+
+def fiscal_year_start(day):
+    year = day.year if day.month >= FISCAL_YEAR_START_MONTH else day.year - 1
+    return date(year, FISCAL_YEAR_START_MONTH, 1)
+
+
+def bucket_start(day, interval):
+    """The first day of the bucket `day` falls in, matching what the database returns."""
+    if interval == 'day':
+        return day
+    if interval == 'week':
+        return day - timedelta(days=day.weekday()) # ISO weeks start on Monday
+    if interval == 'month':
+        return date(day.year, day.month, 1)
+    if interval == 'quarter':
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return fiscal_year_start(day)
+
+
+def _add_months(day, months):
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def next_bucket(start, interval):
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(weeks=1)
+    if interval == 'month':
+        return _add_months(start, 1)
+    if interval == 'quarter':
+        return _add_months(start, 3)
+    return _add_months(start, 12)
+
+
+def previous_year_bucket(start, interval):
+    """The bucket a year earlier, for year-over-year deltas."""
+    if interval == 'week':
+        return start - timedelta(weeks=52) # Same ISO week number in (almost) every year
+    if interval == 'day' and start.month == 2 and start.day == 29:
+        return date(start.year - 1, 2, 28)
+    return start.replace(year=start.year - 1)
+
+
+def bucket_label(start, interval):
+    if interval == 'day':
+        return start.isoformat()
+    if interval == 'week':
+        iso_year, iso_week, _ = start.isocalendar()
+        return f"{iso_year}-W{iso_week:02d}"
+    if interval == 'month':
+        return start.strftime('%Y-%m')
+    if interval == 'quarter':
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return f"FY{start.year}-{(start.year + 1) % 100:02d}"
+
+
+def _bucket_expression(date_field, interval):
+    if interval in TRUNC_FUNCTIONS:
+        return TRUNC_FUNCTIONS[interval](date_field, output_field=DateField())
+    # Fiscal year: the calendar year it starts in, resolved to a date in Python
+    return Case(
+        When(**{f'{date_field}__month__gte': FISCAL_YEAR_START_MONTH}, then=ExtractYear(date_field)),
+        default=ExtractYear(date_field) - Value(1),
+        output_field=IntegerField(),
+    )
+
+
+# --- Query ---
+
+def _filter_q(series, filters):
+    q = Q()
+    for name, value in filters.items():
+        lookup = series.filters[name]
+        if name == 'category':
+            # A category includes everything below it in the tree (core/closure.py)
+            q &= Q(**{f'{lookup}__ancestor_links__ancestor_id': value})
+        else:
+            q &= Q(**{lookup: value})
+    return q
+
+
+def spend_time_series(series_name, interval='month', date_from=None, date_to=None, filters=None, yoy=False):
+    """
+    Buckets of {'period', 'label', 'total', 'count'} for the series, oldest first, with
+    empty buckets filled in between the first and the last. With `yoy`, every bucket also
+    gets the total of the same bucket a year earlier and the percentage change.
+    Raises ValueError when the range would need more than MAX_BUCKETS buckets.
+    """
+    series = SERIES[series_name]
+    filters = filters or {}
+    queryset = series.model.objects.filter(_filter_q(series, filters))
+
+    # Year-over-year needs the year before the first requested bucket as well
+    query_from = date_from
+    if date_from and yoy:
+        query_from = previous_year_bucket(bucket_start(date_from, interval), interval)
+    if query_from:
+        queryset = queryset.filter(**{f'{series.date_field}__gte': query_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{series.date_field}__lte': date_to})
+
+    rows = (
+        queryset.annotate(bucket=_bucket_expression(series.date_field, interval))
+        .values('bucket').order_by('bucket')
+        .annotate(total=series.amount, count=series.count)
+    )
+    found = {}
+    for row in rows:
+        start = row['bucket']
+        if interval == 'fiscal_year':
+            start = date(start, FISCAL_YEAR_START_MONTH, 1)
+        found[start] = (Decimal(row['total'] or ZERO_AMOUNT).quantize(CENTS), row['count'] or 0)
+
+    if not found:
+        return []
+    first = bucket_start(date_from, interval) if date_from else min(found)
+    last = bucket_start(date_to, interval) if date_to else max(found)
+
+    buckets = []
+    start = first
+    while start <= last:
+        if len(buckets) >= MAX_BUCKETS:
+            raise ValueError(f"More than {MAX_BUCKETS} buckets; narrow the date range or use a longer interval.")
+        total, count = found.get(start, (ZERO_AMOUNT, 0))
+        bucket = {'period': start, 'label': bucket_label(start, interval), 'total': total, 'count': count}
+        if yoy:
+            previous_total = found.get(previous_year_bucket(start, interval), (ZERO_AMOUNT, 0))[0]
+            bucket['previous_year_total'] = previous_total
+            bucket['yoy_change_pct'] = (
+                round(float((Decimal(total) - previous_total) / previous_total * 100), 2) if previous_total else None
+            )
+        buckets.append(bucket)
+        start = next_bucket(start, interval)
+    return buckets
+
+
+def cached_spend_time_series(series_name, interval='month', date_from=None, date_to=None, filters=None, yoy=False):
+    """spend_time_series(), served from the versioned cache until the underlying tables change."""
+    filters = filters or {}
+    return cached_aggregate(
+        'timeseries', SERIES[series_name].dependencies,
+        lambda: spend_time_series(series_name, interval, date_from, date_to, filters, yoy),
+        params=(series_name, interval, date_from, date_to, sorted(filters.items()), yoy),
+    )
@@ -7,6 +7,7 @@ from django.contrib.auth import views as auth_views # Import Django's auth views
 urlpatterns = [
     path('', views.data_home, name='data_home'),
     path('summary/', views.summary_page, name='summary_page'), # KEEP THIS
+    path('summary/async/', views.summary_page_async, name='summary_page_async'),
 
     # Data listing URLs
     path('suppliers/', views.supplier_list, name='supplier_list'),
@@ -19,12 +20,37 @@ urlpatterns = [
     path('supplier-discounts/', views.supplier_discount_list, name='supplier_discount_list'),
     path('alternate-suppliers/', views.alternate_supplier_list, name='alternate_supplier_list'),
 
+    # Server-side DataTables endpoint used by the list pages
+    path('api/<str:model_name>/rows/', views.model_rows_json, name='model_rows_json'),
+
+    # Summary metrics as JSON, groups computed concurrently
+    path('api/summary/', views.summary_json_async, name='summary_json_async'),
+
+    # Spend per category, subtree totals included
+    path('api/spend/categories/', views.category_spend_json, name='category_spend_json'),
+
+    # Amounts over time: spend, purchase-orders or invoices
+    path('api/timeseries/<str:series_name>/', views.time_series_json, name='time_series_json'),
+
+    # Supplier scorecards, ranked by score
+    path('api/scorecards/', views.supplier_scorecards_json, name='supplier_scorecards_json'),
+
+    # Group-by totals from the in-memory columnar store
+    path('api/columnar/<str:table_name>/', views.columnar_group_by_json, name='columnar_group_by_json'),
+
     # Export URLs
     path('export/<str:model_name>/', views.export_model_excel, name='export_model_excel'),
+    path('export-all/', views.export_all, name='export_all'),
+
+    # Background exports: queue, poll, download
+    path('export-jobs/', views.export_job_create, name='export_job_create'),
+    path('export-jobs/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('export-jobs/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
 
     # Edit and Delete URLs for each model
     path('edit/<str:model_name>/<int:pk>/', views.edit_model_record, name='edit_model_record'),
     path('delete/<str:model_name>/<int:pk>/', views.delete_model_record, name='delete_model_record'),
+    path('bulk-delete/<str:model_name>/', views.bulk_delete_records, name='bulk_delete_records'),
 
     # Add a logout URL if you don't have one in your main urls.py
     path('logout/', auth_views.LogoutView.as_view(next_page='/'), name='logout'),
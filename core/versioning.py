@@ -0,0 +1,126 @@
+# core/versioning.py
+"""
+Per-model change versions and a versioned cache for the dashboard aggregates.
+
+Each core model has a version token stored in the Django cache. It is bumped
+(after commit) by the post_save/post_delete signals in core/signals.py and by
+load_brake_data. A bump writes a new unique token rather than incrementing: the
+file-based cache's incr() is a read-modify-write, so two concurrent bumps could land
+on the same value and the second write would go unnoticed. Cached aggregates are keyed on the versions of every model they
+read, so a write simply makes the old key unreachable and a stale entry is never
+served; old entries age out through the backend's normal eviction.
+
+Next to each version the time of the last bump is kept, for Last-Modified headers
+(core/conditional.py).
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .routers import REPLICA_MAX_LAG_SECONDS, replica_for_read
+
+VERSION_KEY_PREFIX = 'core:model-version:'
+CHANGED_KEY_PREFIX = 'core:model-changed:'
+ANALYTICS_KEY_PREFIX = 'core:analytics:'
+ANALYTICS_CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60 * 24)
+
+_MISSING = object()
+
+
+def _version_key(model):
+    return VERSION_KEY_PREFIX + model._meta.label_lower
+
+
+def _changed_key(model):
+    return CHANGED_KEY_PREFIX + model._meta.label_lower
+
+
+def _fresh_version():
+    # Clock first, so a token that was evicted and re-created can never come back with a
+    # value an older cache key was built from; the random part keeps concurrent bumps apart
+    return f'{time.time_ns()}-{uuid.uuid4().hex[:12]}'
+
+
+def get_model_versions(models):
+    """Returns {model: version} for the given models, seeding any missing tokens."""
+    keys = {model: _version_key(model) for model in models}
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for model, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _fresh_version(), timeout=None)
+            version = cache.get(key)
+        versions[model] = version
+    return versions
+
+
+def get_model_version(model):
+    return get_model_versions([model])[model]
+
+
+def get_last_modified(models):
+    """
+    When any of the given models last changed, as an aware datetime.
+    A time that was evicted (or never recorded) is seeded with now, which can only
+    make clients refetch, never keep a stale copy.
+    """
+    keys = [_changed_key(model) for model in models]
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, timeout=None)
+            found[key] = cache.get(key, now)
+    return datetime.fromtimestamp(max(found.values(), default=now), tz=timezone.utc)
+
+
+def replica_may_be_stale(models):
+    """
+    True when reads are going to a replica and one of `models` changed so recently that
+    the replica may not have the change yet.
+    """
+    return bool(replica_for_read()) and time.time() - get_last_modified(models).timestamp() < REPLICA_MAX_LAG_SECONDS
+
+
+def bump_model_versions(*models):
+    """Invalidates everything cached from these models by moving their versions on."""
+    cache.set_many({_version_key(model): _fresh_version() for model in models}, timeout=None)
+    cache.set_many({_changed_key(model): time.time() for model in models}, timeout=None)
+
+
+def bump_model_versions_on_commit(*models):
+    """
+    Bumps after the current transaction commits (immediately in autocommit mode).
+    Bumping before commit would let a concurrent reader cache the old rows under the new version.
+    """
+    transaction.on_commit(lambda: bump_model_versions(*models))
+
+
+def cached_aggregate(name, models, compute, params=(), timeout=ANALYTICS_CACHE_TIMEOUT):
+    """
+    Returns compute() cached under a key built from `name`, `params` and the current
+    versions of `models` (every model the computation reads).
+    """
+    versions = get_model_versions(models)
+    version_part = ':'.join(
+        f'{model._meta.label_lower}={versions[model]}'
+        for model in sorted(models, key=lambda m: m._meta.label_lower)
+    )
+    param_part = ':'.join(str(param) for param in params)
+    # Hashed so the key stays within memcached's 250 character limit however many models are involved
+    digest = hashlib.sha1(f'{param_part}|{version_part}'.encode()).hexdigest()
+    key = f'{ANALYTICS_KEY_PREFIX}{name}:{digest}'
+    result = cache.get(key, _MISSING)
+    if result is _MISSING:
+        result = compute()
+        if replica_may_be_stale(models):
+            # Don't keep what the replica returned under the new versions for long
+            timeout = REPLICA_MAX_LAG_SECONDS
+        cache.set(key, result, timeout)
+    return result
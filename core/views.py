@@ -1,283 +1,441 @@
 # core/views.py
 
 import csv
+import logging
 import os
+import time
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST, require_GET
-from datetime import date
-from decimal import Decimal
-import datetime
-
-# For analytics
-from django.db.models import Sum, F, Q, Count # Added Count
-
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+from asgiref.sync import sync_to_async
 
 from .models import (
+    ExportJob, ExportJobStatus,
     Supplier, Category, PurchaseOrder, Invoice, SpendEntry,
     SupplierProductPricing, SupplierContract, SupplierDiscount, AlternateSupplier
 )
-from django.db.models import ForeignKey, OneToOneField
-from django.db.models.fields.related import ManyToManyField
 from django.apps import apps # Import apps to dynamically get models
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from . import columnar
+from .analytics import (
+    cached_summary_metrics, cached_model_card_metrics, cached_category_spend_tree, summary_context,
+    parse_date_range, date_range_filter, card_dependencies, DATE_FIELDS, SUMMARY_DEPENDENCIES, CATEGORY_SPEND_DEPENDENCIES,
+)
+from .async_summary import SUMMARY_GROUPS, gather_summary_groups
+from .bulk_delete import DeletePlan, selected_rows
+from .conditional import conditional_on
+from .routers import use_primary, use_replica
+from .datatables import datatables_response
+from .exports import excel_export_response, export_dependencies
+from .export_all import EXPORT_ALL_FORMATS, export_all_response
+from .export_jobs import EXPORT_FORMATS, create_export_job, job_progress
+from .flat_exports import (
+    CSV_CONTENT_TYPE, NDJSON_CONTENT_TYPE, iter_csv, iter_ndjson, parquet_available, parquet_export_response, streaming_text_response,
+)
+from .scorecards import MAX_SCORECARD_PAGE_SIZE, SCORECARD_DEPENDENCIES, SCORECARD_PAGE_SIZE, cached_scorecard_page, parse_period
+from .timeseries import SERIES, INTERVALS, cached_spend_time_series
+
+logger = logging.getLogger(__name__)
+
+# Define a consistent mapping from URL names to actual Django Model classes
+MODEL_MAP = {
+    'supplier-data': Supplier,
+    'category-data': Category,
+    'purchase-order-data': PurchaseOrder,
+    'invoice-data': Invoice,
+    'spend-entry-data': SpendEntry,
+    'supplier-product-pricing-data': SupplierProductPricing,
+    'supplier-contract-data': SupplierContract,
+    'supplier-discount-data': SupplierDiscount,
+    'alternate-supplier-data': AlternateSupplier,
+}
+
+# Columns shown on each list page (these already provide the correct field names including '_id')
+MODEL_LIST_FIELDS = {
+    'supplier-data': ['id', 'name', 'contact_email', 'phone', 'address', 'gstin', 'pan', 'score', 'type', 'is_active', 'share_of_business', 'lead_time_days', 'base_currency', 'unit_of_measure'],
+    'category-data': ['id', 'name', 'parent_id'],
+    'purchase-order-data': ['id', 'po_number', 'supplier_id', 'category_id', 'amount', 'issue_date', 'status'],
+    'invoice-data': ['id', 'invoice_number', 'supplier_id', 'purchase_order_id', 'invoice_date', 'due_date', 'paid_date', 'amount', 'status'],
+    'spend-entry-data': ['id', 'category_id', 'supplier_id', 'date', 'amount', 'cost_center', 'description'],
+    'supplier-product-pricing-data': ['id', 'supplier_id', 'product_name', 'price', 'currency', 'unit_of_measure'],
+    'supplier-contract-data': ['id', 'supplier_id', 'contract_name', 'start_date', 'end_date', 'terms'],
+    'supplier-discount-data': ['id', 'supplier_id', 'product_name', 'discount_percent', 'valid_from', 'valid_to'],
+    'alternate-supplier-data': ['id', 'product_name', 'primary_supplier_id', 'alternate_supplier_id', 'lead_time_days'],
+}
 
 @login_required
 def data_home(request):
     return render(request, 'core/data_home.html')
 
+def _get_date_range(request):
+    """
+    (date_from, date_to, error) from the query string. An invalid date is reported
+    through `error` and the range is ignored, so the page still renders.
+    """
+    try:
+        date_from, date_to = parse_date_range(request.GET)
+    except ValueError as e:
+        return None, None, str(e)
+    return date_from, date_to, None
+
 @login_required
+@use_replica
+@conditional_on(SUMMARY_DEPENDENCIES)
 def summary_page(request):
     """
     Dedicated view for comprehensive analytics across models.
     """
-    # --- Analytics Logic for Summary Page ---
-    # Invoice Analytics
-    total_invoices_summary = Invoice.objects.count()
-    total_pending_invoices_summary = Invoice.objects.filter(Q(status__iexact='Pending')).count()
-    sum_pending_invoice_amount_summary = Invoice.objects.filter(Q(status__iexact='Pending')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-    total_paid_invoices_summary = Invoice.objects.filter(Q(status__iexact='Paid')).count()
-    sum_paid_invoice_amount_summary = Invoice.objects.filter(Q(status__iexact='Paid')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-    # Purchase Order Analytics
-    total_purchase_orders_summary = PurchaseOrder.objects.count()
-    total_pending_pos_summary = PurchaseOrder.objects.filter(Q(status__iexact='Pending')).count()
-    sum_pending_po_amount_summary = PurchaseOrder.objects.filter(Q(status__iexact='Pending')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-    total_approved_pos_summary = PurchaseOrder.objects.filter(Q(status__iexact='Approved')).count()
-    sum_approved_po_amount_summary = PurchaseOrder.objects.filter(Q(status__iexact='Approved')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-    # Spend Entry Analytics
-    total_spend_entries_summary = SpendEntry.objects.count()
-    total_spend_amount_summary = SpendEntry.objects.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-    spend_by_category_summary = list(SpendEntry.objects.values('category__name').annotate(total=Sum('amount')).order_by('-total'))
-    spend_by_supplier_summary = list(SpendEntry.objects.values('supplier__name').annotate(total=Sum('amount')).order_by('-total'))
-
-    # Supplier Analytics
-    total_suppliers_summary = Supplier.objects.count()
-    active_suppliers_summary = Supplier.objects.filter(is_active=True).count()
-    inactive_suppliers_summary = Supplier.objects.filter(is_active=False).count()
-    suppliers_by_type_summary = list(Supplier.objects.values('type').annotate(count=Count('id')).order_by('-count'))
+    # All counts and sums come from the analytics service: one query per table
+    # (plus the spend and supplier breakdowns) instead of one per metric, and
+    # repeat visits are served from the versioned cache until the data changes.
+    # An optional date_from/date_to range limits invoices, POs and spend; on PostgreSQL
+    # spend queries then only touch the monthly partitions in that range.
+    date_from, date_to, date_range_error = _get_date_range(request)
+    context = dict(cached_summary_metrics(date_from, date_to))
+    context.update({'date_from': date_from, 'date_to': date_to, 'date_range_error': date_range_error})
+    return render(request, 'core/summary_page.html', context)
 
+@login_required
+@use_replica
+async def summary_page_async(request):
+    """
+    summary_page with the invoice, PO, spend and supplier metrics computed concurrently
+    (core/async_summary.py). Groups that miss the timeout are listed on the page instead
+    of holding it up. Serve it through asgi.py for the concurrency to pay off.
+    """
+    date_from, date_to, date_range_error = _get_date_range(request)
+    started = time.perf_counter()
+    results, missing, errors = await gather_summary_groups(date_from=date_from, date_to=date_to)
+    logger.debug(
+        "Async summary in %.1f ms, missing: %s, errors: %s", (time.perf_counter() - started) * 1000, missing, errors,
+    )
+    context = summary_context(**results)
+    context.update({
+        'date_from': date_from, 'date_to': date_to, 'date_range_error': date_range_error,
+        'summary_unavailable': [SUMMARY_GROUPS[name].label for name in [*missing, *errors]],
+    })
+    return await sync_to_async(render)(request, 'core/summary_page.html', context)
 
-    context = {
-        'total_invoices_summary': total_invoices_summary,
-        'total_pending_invoices_summary': total_pending_invoices_summary,
-        'sum_pending_invoice_amount_summary': sum_pending_invoice_amount_summary,
-        'total_paid_invoices_summary': total_paid_invoices_summary,
-        'sum_paid_invoice_amount_summary': sum_paid_invoice_amount_summary,
-
-        'total_purchase_orders_summary': total_purchase_orders_summary,
-        'total_pending_pos_summary': total_pending_pos_summary,
-        'sum_pending_po_amount_summary': sum_pending_po_amount_summary,
-        'total_approved_pos_summary': total_approved_pos_summary,
-        'sum_approved_po_amount_summary': sum_approved_po_amount_summary,
-
-        'total_spend_entries_summary': total_spend_entries_summary,
-        'total_spend_amount_summary': total_spend_amount_summary,
-        'spend_by_category_summary': spend_by_category_summary,
-        'spend_by_supplier_summary': spend_by_supplier_summary,
-
-        'total_suppliers_summary': total_suppliers_summary,
-        'active_suppliers_summary': active_suppliers_summary,
-        'inactive_suppliers_summary': inactive_suppliers_summary,
-        'suppliers_by_type_summary': suppliers_by_type_summary,
-    }
-    return render(request, 'core/summary_page.html', context)
+@login_required
+@use_replica
+@require_GET
+async def summary_json_async(request):
+    """
+    The summary metrics as JSON, groups computed concurrently.
+    Query parameters: groups (comma separated, default all of invoices, purchase_orders,
+    spend, suppliers) and date_from/date_to. Missing or failed groups are reported
+    alongside the ones that finished.
+    """
+    names = [name.strip() for name in request.GET.get('groups', '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in SUMMARY_GROUPS]
+    if unknown:
+        return JsonResponse({'status': 'error', 'message': f"Unknown groups: {', '.join(unknown)}."}, status=400)
+    try:
+        date_from, date_to = parse_date_range(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    started = time.perf_counter()
+    results, missing, errors = await gather_summary_groups(names, date_from, date_to)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    return JsonResponse({
+        'groups': results, 'missing': missing, 'errors': errors,
+        'partial': bool(missing or errors), 'elapsed_ms': elapsed_ms,
+    })
 
 
 def _render_model_list(request, model, title, fields_to_display):
     """
-    Helper function to fetch all objects of a model and render them.
-    Prepares data and field names for DataTables consumption via JSON.
+    Helper function to render the list page for a model.
+    Rows are no longer embedded in the page: DataTables fetches them page by page
+    from model_rows_json (server-side processing).
     Also calculates and passes basic analytics for the current model.
     """
-    print(f"\n--- Entering _render_model_list for: {title} ---")
-    print(f"Model: {model.__name__}, Fields to Display (from view func): {fields_to_display}")
+    # URL-friendly model name (e.g., PurchaseOrder -> 'purchase-order-data')
+    url_model_name = _get_name_for_model(model)
 
-    objects_data = [] # Initialize in case of error
-    try:
-        # Ensure 'id' is always included for actions even if not in fields_to_display
-        all_fields_for_values = list(set(fields_to_display + ['id']))
-        objects_data = list(model.objects.all().values(*all_fields_for_values))
-        print(f"Step 1: Fetched {len(objects_data)} records from {model.__name__}.")
-        if objects_data:
-            print(f"Step 1: First record's data keys (from .values()): {list(objects_data[0].keys())}")
-            print(f"Step 1: First record's full data (from .values()): {objects_data[0]}")
-        else:
-            print(f"Step 1: No records fetched from the database for {model.__name__}.")
-    except Exception as e:
-        print(f"Step 1: ERROR fetching data for {model.__name__}: {e}")
-        objects_data = [] # Ensure it's an empty list on error for json_script
-
-    data_list_for_json = [] # Data after cleaning for JSON
-    for obj in objects_data:
-        cleaned_obj = {}
-        for key, value in obj.items():
-            if isinstance(value, float):
-                cleaned_obj[key] = round(value, 2)
-            elif isinstance(value, Decimal):
-                cleaned_obj[key] = str(value) # Convert Decimal to string
-            elif isinstance(value, date):
-                cleaned_obj[key] = value.isoformat() # Convert date to ISO format string
-            elif isinstance(value, datetime.datetime):
-                cleaned_obj[key] = value.isoformat()
-            else:
-                cleaned_obj[key] = value
-        data_list_for_json.append(cleaned_obj)
-
-    print(f"Step 2: Prepared data_list_for_json length (after cleaning): {len(data_list_for_json)}")
-    if data_list_for_json:
-        print(f"Step 2: First cleaned record example: {data_list_for_json[0]}")
-    else:
-        print("Step 2: Cleaned data_list_for_json is empty.")
-
-    # Convert model name to URL-friendly format (e.g., 'Supplier' -> 'supplier-data')
-    url_model_name = model.__name__.lower().replace('_', '-') + '-data'
+    # --- Optional date range (only for models listed in DATE_FIELDS) ---
+    date_from, date_to, date_range_error = _get_date_range(request)
+    rows_url = reverse('model_rows_json', args=[url_model_name]) # Server-side DataTables endpoint
+    date_query = {name: value.isoformat() for name, value in (('date_from', date_from), ('date_to', date_to)) if value}
+    if model in DATE_FIELDS and date_query:
+        rows_url += '?' + urlencode(date_query) # DataTables adds its own parameters after these
 
     # --- Analytics for the current model (for display on model_list page) ---
-    analytics_data = {}
-    if model == Invoice:
-        analytics_data['total_records'] = Invoice.objects.count()
-        analytics_data['total_pending'] = Invoice.objects.filter(Q(status__iexact='Pending')).count()
-        analytics_data['sum_pending_amount'] = Invoice.objects.filter(Q(status__iexact='Pending')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        analytics_data['total_paid'] = Invoice.objects.filter(Q(status__iexact='Paid')).count()
-        analytics_data['sum_paid_amount'] = Invoice.objects.filter(Q(status__iexact='Paid')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        analytics_data['analytics_title'] = "Invoice Status Summary"
-    elif model == PurchaseOrder:
-        analytics_data['total_records'] = PurchaseOrder.objects.count()
-        analytics_data['total_pending'] = PurchaseOrder.objects.filter(Q(status__iexact='Pending')).count()
-        analytics_data['sum_pending_amount'] = PurchaseOrder.objects.filter(Q(status__iexact='Pending')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        analytics_data['total_approved'] = PurchaseOrder.objects.filter(Q(status__iexact='Approved')).count()
-        analytics_data['sum_approved_amount'] = PurchaseOrder.objects.filter(Q(status__iexact='Approved')).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        analytics_data['analytics_title'] = "Purchase Order Status Summary"
-    elif model == SpendEntry:
-        analytics_data['total_records'] = SpendEntry.objects.count()
-        analytics_data['total_spend_amount'] = SpendEntry.objects.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        analytics_data['analytics_title'] = "Spend Entry Summary"
-    elif model == Supplier:
-        analytics_data['total_records'] = Supplier.objects.count()
-        analytics_data['active_suppliers'] = Supplier.objects.filter(is_active=True).count()
-        analytics_data['inactive_suppliers'] = Supplier.objects.filter(is_active=False).count()
-        analytics_data['analytics_title'] = "Supplier Status Summary"
-    else:
-        analytics_data['total_records'] = model.objects.count()
-        analytics_data['analytics_title'] = f"{model.__name__} Data Summary"
+    analytics_data = cached_model_card_metrics(model, date_from, date_to)
 
     context = {
         'model_name': title,
-        'data': data_list_for_json,
         'fields': fields_to_display, # Pass original fields for header generation
         'url_model_name': url_model_name, # Pass the URL-friendly model name for JS to build links
+        'rows_url': rows_url,
+        'bulk_delete_url': reverse('bulk_delete_records', args=[url_model_name]),
         'analytics': analytics_data, # NEW: Pass analytics data to template
+        'date_field': DATE_FIELDS.get(model), # Shows the date range form when set
+        'date_from': date_from,
+        'date_to': date_to,
+        'date_range_error': date_range_error,
     }
-    print(f"Step 3: Context 'data' length: {len(context['data'])}, 'fields' length: {len(context['fields'])}, 'url_model_name': {context['url_model_name']}")
-    print(f"Analytics Data (for {model.__name__}): {analytics_data}") # DEBUG
-    print(f"--- Exiting _render_model_list for: {title} ---\n")
     return render(request, 'core/model_list.html', context)
 
 @login_required
+@use_replica
+@conditional_on(lambda request, model_name: export_dependencies(MODEL_MAP[model_name]) if model_name in MODEL_MAP else ())
 def export_model_excel(request, model_name):
-    # This function remains unchanged
-    model_map = {
-        'supplier-data': Supplier,
-        'category-data': Category,
-        'purchase-order-data': PurchaseOrder,
-        'invoice-data': Invoice,
-        'spend-entry-data': SpendEntry,
-        'supplier-product-pricing-data': SupplierProductPricing,
-        'supplier-contract-data': SupplierContract,
-        'supplier-discount-data': SupplierDiscount,
-        'alternate-supplier-data': AlternateSupplier,
-    }
-
-    model = model_map.get(model_name)
+    """
+    Streams an export of the model. Rows are read in chunks with FK names joined in, so
+    memory and query count stay flat. ?format= picks xlsx (default, a write-only
+    workbook), csv or ndjson (streamed as they are read) or parquet (needs pyarrow);
+    date_from/date_to limit dated models.
+    """
+    model = _get_model_from_name(model_name)
     if not model:
         return HttpResponse("Model not found.", status=404)
+    export_format = request.GET.get('format', 'xlsx')
+    known_formats = list(dict.fromkeys([*EXPORT_FORMATS, 'parquet'])) # parquet is known even without pyarrow
+    if export_format not in known_formats:
+        return JsonResponse({'status': 'error', 'message': f"format must be one of {', '.join(known_formats)}."}, status=400)
+    if export_format == 'parquet' and not parquet_available():
+        return JsonResponse({'status': 'error', 'message': "Parquet export needs pyarrow, which is not installed."}, status=501)
+    try:
+        date_from, date_to = parse_date_range(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    queryset = model.objects.filter(date_range_filter(model, date_from, date_to))
+    filename = f"{model.__name__.lower()}_data.{EXPORT_FORMATS[export_format].extension}"
+
+    if export_format == 'csv':
+        return streaming_text_response(iter_csv, model, queryset, filename, CSV_CONTENT_TYPE)
+    if export_format == 'ndjson':
+        return streaming_text_response(iter_ndjson, model, queryset, filename, NDJSON_CONTENT_TYPE)
+    if export_format == 'parquet':
+        return parquet_export_response(model, queryset, filename)
+    return excel_export_response(model, queryset)
+
+@login_required
+@use_replica
+@conditional_on(lambda request: tuple({dep for model in MODEL_MAP.values() for dep in export_dependencies(model)}))
+def export_all(request):
+    """
+    Every model in MODEL_MAP in one file: ?format=xlsx (default, one sheet per model) or
+    csv (a zip of per-model CSVs), with optional date_from/date_to. The models are
+    written in parallel worker processes (core/export_all.py).
+    """
+    export_format = request.GET.get('format', 'xlsx')
+    if export_format not in EXPORT_ALL_FORMATS:
+        return JsonResponse({'status': 'error', 'message': f"format must be one of {', '.join(EXPORT_ALL_FORMATS)}."}, status=400)
+    params = {name: request.GET.get(name, '').strip() for name in ('date_from', 'date_to')}
+    try:
+        parse_date_range(params)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return export_all_response(list(MODEL_MAP.values()), export_format, params)
+
+def _export_job_json(job):
+    data = job_progress(job)
+    data['status_url'] = reverse('export_job_status', args=[job.pk])
+    if job.status == ExportJobStatus.DONE:
+        data['download_url'] = reverse('export_job_download', args=[job.pk])
+    return data
 
-    fields_to_export = []
-    for field in model._meta.get_fields(include_hidden=False):
-        if field.concrete and not field.auto_created and not isinstance(field, ManyToManyField):
-            fields_to_export.append(field)
-
-    workbook = openpyxl.Workbook()
-    worksheet = workbook.active
-    worksheet.title = model.__name__ + " Data"
-
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = openpyxl.styles.PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-    border_thin = Side(style='thin', color="000000")
-    header_border = Border(left=border_thin, right=border_thin, top=border_thin, bottom=border_thin)
-
-    headers = []
-    for field in fields_to_export:
-        headers.append(field.verbose_name.replace('_', ' ').title())
-
-    worksheet.append(headers)
-    for cell in worksheet[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = header_border
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    for obj in model.objects.all():
-        row_data = []
-        for field in fields_to_export:
-            value = getattr(obj, field.name)
-
-            if isinstance(field, (ForeignKey, OneToOneField)):
-                row_data.append(str(value) if value else 'N/A')
-            elif isinstance(value, (date, datetime.date, datetime.datetime)):
-                row_data.append(value)
-            elif isinstance(value, Decimal):
-                row_data.append(float(value))
-            elif isinstance(value, bool):
-                row_data.append("Yes" if value else "No")
-            else:
-                row_data.append(value)
-        worksheet.append(row_data)
-
-    for col_idx, col in enumerate(worksheet.columns, 1):
-        max_length = 0
-        column = get_column_letter(col_idx)
-        for cell in col:
-            try:
-                cell_value_str = str(cell.value) if cell.value is not None else ""
-                if len(cell_value_str) > max_length:
-                    max_length = len(cell_value_str)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        if adjusted_width > 75:
-            adjusted_width = 75
-        elif adjusted_width < 10:
-            adjusted_width = 10
-        worksheet.column_dimensions[column].width = adjusted_width
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="{model.__name__.lower()}_data.xlsx"'
-    workbook.save(response)
-    return response
+@login_required
+@use_primary
+@require_POST
+def export_job_create(request):
+    """
+    Queues a background export. POST fields: model_name (e.g. 'invoice-data'), format
+    (default xlsx) and optional date_from/date_to. Answers 202 with the job; an identical
+    export already queued or running is returned instead of starting another.
+    """
+    model_name = request.POST.get('model_name', '')
+    export_format = request.POST.get('format', 'xlsx')
+    if model_name not in MODEL_MAP:
+        return JsonResponse({'status': 'error', 'message': 'Model not found.'}, status=404)
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'status': 'error', 'message': f"format must be one of {', '.join(EXPORT_FORMATS)}."}, status=400)
+    params = {name: request.POST.get(name, '').strip() for name in ('date_from', 'date_to')}
+    try:
+        job, created = create_export_job(model_name, export_format, params, request.user)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'status': 'success', 'created': created, 'job': _export_job_json(job)}, status=202)
+
+@login_required
+@use_primary
+@require_GET
+def export_job_status(request, job_id):
+    """Progress of an export job: rows processed, percentage, ETA and, once done, the download URL."""
+    job = get_object_or_404(ExportJob, pk=job_id, created_by=request.user)
+    return JsonResponse({'status': 'success', 'job': _export_job_json(job)})
+
+@login_required
+@use_primary
+@require_GET
+def export_job_download(request, job_id):
+    """Serves the file of a finished export job."""
+    job = get_object_or_404(ExportJob, pk=job_id, created_by=request.user)
+    if job.status == ExportJobStatus.EXPIRED:
+        return JsonResponse({'status': 'error', 'message': 'This export has expired; start a new one.'}, status=410)
+    if job.status != ExportJobStatus.DONE:
+        return JsonResponse({'status': 'error', 'message': f"Export is {job.status.lower()}."}, status=409)
+    try:
+        handle = open(job.file_path, 'rb')
+    except OSError:
+        return JsonResponse({'status': 'error', 'message': 'Export file is missing; start a new one.'}, status=410)
+    export_format = EXPORT_FORMATS[job.format]
+    return FileResponse(
+        handle, as_attachment=True, filename=f"{job.model_name.replace('-data', '')}_data.{export_format.extension}",
+        content_type=export_format.content_type,
+    )
+
+BULK_DELETE_RESERVED_FIELDS = ('pks', 'confirm', 'csrfmiddlewaretoken')
 
 # Helper function to get model from string name (used by edit/delete views)
 def _get_model_from_name(model_name):
-    # Define a consistent mapping from URL names to actual Django Model classes
-    model_map = {
-        'supplier-data': Supplier,
-        'category-data': Category,
-        'purchase-order-data': PurchaseOrder,
-        'invoice-data': Invoice,
-        'spend-entry-data': SpendEntry,
-        'supplier-product-pricing-data': SupplierProductPricing,
-        'supplier-contract-data': SupplierContract,
-        'supplier-discount-data': SupplierDiscount,
-        'alternate-supplier-data': AlternateSupplier,
-    }
-    return model_map.get(model_name)
+    return MODEL_MAP.get(model_name)
+
+# Reverse lookup: model class -> URL name (e.g., PurchaseOrder -> 'purchase-order-data')
+def _get_name_for_model(model):
+    for url_name, mapped_model in MODEL_MAP.items():
+        if mapped_model is model:
+            return url_name
+    return model.__name__.lower() + '-data'
+
+@login_required
+@use_replica
+@require_GET
+@conditional_on(lambda request, model_name: (MODEL_MAP[model_name],) if model_name in MODEL_MAP else ())
+def model_rows_json(request, model_name):
+    """
+    DataTables server-side endpoint: returns one page of rows for the list pages,
+    with sorting, global search and per-column filters applied in SQL.
+    """
+    model = _get_model_from_name(model_name)
+    if not model:
+        return JsonResponse({'status': 'error', 'message': 'Model not found.'}, status=404)
+    try:
+        date_from, date_to = parse_date_range(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    queryset = model.objects.filter(date_range_filter(model, date_from, date_to))
+    return JsonResponse(datatables_response(request, model, MODEL_LIST_FIELDS[model_name], queryset))
+
+@login_required
+@use_replica
+@require_GET
+@conditional_on(CATEGORY_SPEND_DEPENDENCIES)
+def category_spend_json(request):
+    """
+    Spend per category as a tree: each node has its own spend and the total for its
+    whole subtree. Accepts the same date_from/date_to range as the summary page.
+    """
+    try:
+        date_from, date_to = parse_date_range(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse(cached_category_spend_tree(date_from, date_to))
+
+@login_required
+@use_replica
+@require_GET
+@conditional_on(lambda request, series_name: SERIES[series_name].dependencies if series_name in SERIES else ())
+def time_series_json(request, series_name):
+    """
+    Amounts over time for 'spend', 'purchase-orders' or 'invoices'.
+    Query parameters: interval (day, week, month, quarter or fiscal_year; default month),
+    date_from/date_to, category (includes its subcategories), supplier, cost_center
+    (spend only) and yoy=1 for year-over-year deltas.
+    """
+    series = SERIES.get(series_name)
+    if not series:
+        return JsonResponse({'status': 'error', 'message': 'Series not found.'}, status=404)
+    interval = request.GET.get('interval', 'month')
+    if interval not in INTERVALS:
+        return JsonResponse({'status': 'error', 'message': f"interval must be one of {', '.join(INTERVALS)}."}, status=400)
+    try:
+        date_from, date_to = parse_date_range(request.GET)
+        filters = {}
+        for name in series.filters:
+            value = request.GET.get(name, '').strip()
+            if value and name != 'cost_center' and not value.isdigit():
+                raise ValueError(f"{name} must be an id.")
+            if value:
+                filters[name] = value if name == 'cost_center' else int(value)
+        yoy = request.GET.get('yoy') in ('1', 'true', 'yes')
+        buckets = cached_spend_time_series(series_name, interval, date_from, date_to, filters, yoy)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'series': series_name, 'interval': interval, 'filters': filters, 'buckets': buckets})
+
+@login_required
+@use_replica
+@require_GET
+@conditional_on(SCORECARD_DEPENDENCIES)
+def supplier_scorecards_json(request):
+    """
+    Supplier scorecards ranked by score, one page at a time. Query parameters: period
+    (YYYY-MM or YYYY-MM-DD, any day of the month; default each supplier's latest month),
+    supplier (an id), limit (rows per page, at most MAX_SCORECARD_PAGE_SIZE) and offset.
+    """
+    try:
+        period = parse_period(request.GET.get('period', ''))
+        supplier_id = request.GET.get('supplier', '').strip()
+        if supplier_id and not supplier_id.isdigit():
+            raise ValueError("supplier must be an id.")
+        supplier_id = int(supplier_id) if supplier_id else None
+        limit = request.GET.get('limit', '').strip() or str(SCORECARD_PAGE_SIZE)
+        offset = request.GET.get('offset', '').strip() or '0'
+        if not limit.isdigit() or not 0 < int(limit) <= MAX_SCORECARD_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_SCORECARD_PAGE_SIZE}.")
+        if not offset.isdigit():
+            raise ValueError("offset must be a non-negative number.")
+        limit, offset = int(limit), int(offset)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    page = cached_scorecard_page(period, supplier_id, limit, offset)
+    return JsonResponse({'period': period.isoformat() if period else None, 'limit': limit, 'offset': offset, **page})
 
 @login_required
+@use_replica
+@require_GET
+@conditional_on(lambda request, table_name: (columnar.TABLE_SPECS[table_name].model,) if table_name in columnar.TABLE_SPECS else ())
+def columnar_group_by_json(request, table_name):
+    """
+    Sum and count of amounts for 'spend' or 'invoices', grouped by one column.
+    Query parameters: group_by (e.g. supplier_id, category_id, cost_center, status, month),
+    date_from/date_to, and equality filters on the id and text columns (e.g. supplier_id=3).
+    Served from the in-memory columnar store (core/columnar.py) when it is enabled.
+    """
+    spec = columnar.TABLE_SPECS.get(table_name)
+    if not spec:
+        return JsonResponse({'status': 'error', 'message': 'Table not found.'}, status=404)
+    key = request.GET.get('group_by', spec.group_keys[0])
+    if key not in spec.group_keys:
+        return JsonResponse({'status': 'error', 'message': f"group_by must be one of {', '.join(spec.group_keys)}."}, status=400)
+    try:
+        date_from, date_to = parse_date_range(request.GET)
+        filters = {}
+        for name in spec.filter_keys:
+            value = request.GET.get(name, '').strip()
+            if value and name in spec.fk_columns and not value.isdigit():
+                raise ValueError(f"{name} must be an id.")
+            if value:
+                filters[name] = int(value) if name in spec.fk_columns else value
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    started = time.perf_counter()
+    groups, source = columnar.group_by(table_name, key, filters, date_from, date_to)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    response = {'table': table_name, 'group_by': key, 'filters': filters, 'source': source, 'elapsed_ms': elapsed_ms, 'groups': groups}
+    if source == 'columnar':
+        response['memory_bytes'] = columnar.get_table(table_name).memory_usage()
+    return JsonResponse(response)
+
+@login_required
+@use_primary
 @require_GET
 def edit_model_record(request, model_name, pk):
     model = _get_model_from_name(model_name)
@@ -295,6 +453,7 @@ def edit_model_record(request, model_name, pk):
     return render(request, 'core/edit_record.html', context)
 
 @login_required
+@use_primary
 @require_POST
 def delete_model_record(request, model_name, pk):
     model = _get_model_from_name(model_name)
@@ -308,49 +467,88 @@ def delete_model_record(request, model_name, pk):
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
-
-# Specific views for each model (these already provide the correct field names including '_id')
 @login_required
+@use_primary
+@require_POST
+def bulk_delete_records(request, model_name):
+    """
+    Deletes many rows in one transaction with set-based SQL (core/bulk_delete.py).
+    POST fields: pks (repeated, or comma-separated) or exact field filters (e.g.
+    supplier=12) and/or date_from/date_to. Without confirm=1 nothing is deleted and the
+    answer is the cascade preview: how many rows of each model would go or lose a reference.
+    """
+    model = _get_model_from_name(model_name)
+    if not model:
+        return JsonResponse({'status': 'error', 'message': 'Model not found.'}, status=404)
+    params = {
+        'pks': [pk for value in request.POST.getlist('pks') for pk in value.split(',')],
+        'filter': {name: request.POST.get(name) for name in request.POST if name not in BULK_DELETE_RESERVED_FIELDS},
+    }
+    try:
+        plan = DeletePlan(model, selected_rows(model, params))
+        if request.POST.get('confirm') not in ('1', 'true'):
+            return JsonResponse({'status': 'success', 'deleted': False, 'preview': plan.preview()})
+        deleted = plan.execute()
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    # Audit trail: who deleted what, selected how
+    logger.warning(
+        "Bulk delete on %s by %s (pks=%s, filter=%s): %s",
+        model_name, request.user.get_username(), params['pks'], params['filter'], deleted,
+    )
+    return JsonResponse({'status': 'success', 'deleted': True, 'counts': deleted})
+
+# Specific views for each model (column lists live in MODEL_LIST_FIELDS)
+@login_required
+@use_replica
+@conditional_on(card_dependencies(Supplier))
 def supplier_list(request):
-    fields = ['id', 'name', 'contact_email', 'phone', 'address', 'gstin', 'pan', 'score', 'type', 'is_active', 'share_of_business', 'lead_time_days', 'base_currency', 'unit_of_measure']
-    return _render_model_list(request, Supplier, 'Supplier Data', fields)
+    return _render_model_list(request, Supplier, 'Supplier Data', MODEL_LIST_FIELDS['supplier-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(Category))
 def category_list(request):
-    fields = ['id', 'name', 'parent_id']
-    return _render_model_list(request, Category, 'Category Data', fields)
+    return _render_model_list(request, Category, 'Category Data', MODEL_LIST_FIELDS['category-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(PurchaseOrder))
 def purchase_order_list(request):
-    fields = ['id', 'po_number', 'supplier_id', 'category_id', 'amount', 'issue_date', 'status']
-    return _render_model_list(request, PurchaseOrder, 'Purchase Order Data', fields)
+    return _render_model_list(request, PurchaseOrder, 'Purchase Order Data', MODEL_LIST_FIELDS['purchase-order-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(Invoice))
 def invoice_list(request):
-    fields = ['id', 'invoice_number', 'supplier_id', 'purchase_order_id', 'invoice_date', 'due_date', 'paid_date', 'amount', 'status']
-    return _render_model_list(request, Invoice, 'Invoice Data', fields)
+    return _render_model_list(request, Invoice, 'Invoice Data', MODEL_LIST_FIELDS['invoice-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(SpendEntry))
 def spend_entry_list(request):
-    fields = ['id', 'category_id', 'supplier_id', 'date', 'amount', 'cost_center', 'description']
-    return _render_model_list(request, SpendEntry, 'Spend Entry Data', fields)
+    return _render_model_list(request, SpendEntry, 'Spend Entry Data', MODEL_LIST_FIELDS['spend-entry-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(SupplierProductPricing))
 def supplier_product_pricing_list(request):
-    fields = ['id', 'supplier_id', 'product_name', 'price', 'currency', 'unit_of_measure']
-    return _render_model_list(request, SupplierProductPricing, 'Supplier Product Pricing Data', fields)
+    return _render_model_list(request, SupplierProductPricing, 'Supplier Product Pricing Data', MODEL_LIST_FIELDS['supplier-product-pricing-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(SupplierContract))
 def supplier_contract_list(request):
-    fields = ['id', 'supplier_id', 'contract_name', 'start_date', 'end_date', 'terms']
-    return _render_model_list(request, SupplierContract, 'Supplier Contract Data', fields)
+    return _render_model_list(request, SupplierContract, 'Supplier Contract Data', MODEL_LIST_FIELDS['supplier-contract-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(SupplierDiscount))
 def supplier_discount_list(request):
-    fields = ['id', 'supplier_id', 'product_name', 'discount_percent', 'valid_from', 'valid_to']
-    return _render_model_list(request, SupplierDiscount, 'Alternate Supplier Data', fields)
+    return _render_model_list(request, SupplierDiscount, 'Alternate Supplier Data', MODEL_LIST_FIELDS['supplier-discount-data'])
 
 @login_required
+@use_replica
+@conditional_on(card_dependencies(AlternateSupplier))
 def alternate_supplier_list(request):
-    fields = ['id', 'product_name', 'primary_supplier_id', 'alternate_supplier_id', 'lead_time_days']
-    return _render_model_list(request, AlternateSupplier, 'Alternate Supplier Data', fields)
\ No newline at end of file
+    return _render_model_list(request, AlternateSupplier, 'Alternate Supplier Data', MODEL_LIST_FIELDS['alternate-supplier-data'])
\ No newline at end of file
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,10 +43,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresses HTML/JSON responses on the fly; sits high so it sees the final body
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Inside the session middleware, so saving the session doesn't count as a write
+    'core.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,8 +86,54 @@ DATABASES = {
         'PASSWORD': 'huddar',                 # The password you used 'huddar'
         'HOST': 'localhost',                  # Or the IP address of your PostgreSQL server
         'PORT': '5432',                       # Default PostgreSQL port
+        'CONN_MAX_AGE': 60,                   # Keep connections open between requests...
+        'CONN_HEALTH_CHECKS': True,           # ...and check them before reusing one
     }
 }
+# Optional read replica for the analytics pages and exports (see core/routers.py):
+# same credentials as the primary, on another host
+if os.environ.get('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = {**DATABASES['default'], 'HOST': os.environ['DATABASE_REPLICA_HOST']}
+# Local setup without PostgreSQL: two SQLite files standing in for the primary and its
+# replica. Tests run against the primary only (the replica mirrors it).
+if os.environ.get('DATABASE_SQLITE'):
+    DATABASES = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'primary.sqlite3'},
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica.sqlite3',
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10  # Reads from a client that just wrote stay on the primary this long
+# Cache used for the dashboard aggregates (see core/versioning.py).
+# Keys embed per-model version tokens, so the cache must be shared by every
+# worker process: the file-based cache works on a single host, swap in
+# Redis/Memcached when running on several.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.django_cache',
+    }
+}
+ANALYTICS_CACHE_TIMEOUT = 60 * 60 * 24  # Old versions simply age out
+
+# In-memory columnar copy of SpendEntry and Invoice for the group-by API (core/columnar.py).
+# Needs numpy; every worker process holds its own copy, so size the workers' memory for it.
+COLUMNAR_ANALYTICS = False
+
+# Async summary views (core/async_summary.py): metric groups still running after the
+# timeout are left out of the response; the pool is shared by all requests
+SUMMARY_TIMEOUT_SECONDS = 5
+SUMMARY_MAX_WORKERS = 4
+
+# Background exports (core/export_jobs.py): worker processes, where finished files are
+# kept and for how long
+EXPORT_WORKERS = 2
+EXPORT_SPOOL_DIR = BASE_DIR / 'export_spool'
+EXPORT_TTL_SECONDS = 60 * 60 * 24
+
 # Redirect to the data home page after successful login
 LOGIN_REDIRECT_URL = '/data/'
 # Optional: redirect to login after logout